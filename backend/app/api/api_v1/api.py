@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from backend.app.api.api_v1.endpoints import document, expense, fraud, health, chat, login, ocr, user , document_analysis , dashboard, imagekit, webhook, insights
+from backend.app.api.api_v1.endpoints import document, expense, fraud, health, chat, login, ocr, user , document_analysis , dashboard, imagekit, webhook, insights, jobs
 api_router = APIRouter()
 
 api_router.include_router(login.router, prefix="/login", tags=["login"])
@@ -15,4 +15,5 @@ api_router.include_router(dashboard.router, prefix="/dashboard", tags=["dashboar
 api_router.include_router(imagekit.router, prefix="/imagekit", tags=["imagekit"])
 api_router.include_router(webhook.router, prefix="/ondemand", tags=["ondemand"])
 api_router.include_router(insights.router, prefix="/financial", tags=["financial"])
+api_router.include_router(jobs.router, prefix="/jobs", tags=["jobs"])
 
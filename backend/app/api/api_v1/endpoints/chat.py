@@ -1,11 +1,20 @@
-from fastapi import APIRouter, Depends
+import logging
+import time
+from datetime import datetime
+from typing import List
+
+from fastapi import APIRouter, BackgroundTasks, Depends, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
-from backend.app.schemas.chat_message import ChatMessageCreateDB
+from backend.app.schemas.chat_message import ChatMessage, ChatMessageCreateDB
 from backend.app.schemas.chat import ChatMessageResponse, ChatMessageCreate
-from backend.app.services.chat_service import generate_gemini_response
+from backend.app.services import conversation_memory_service, intent_router_service
 from backend.app.api import deps
-from backend.db import crud
+from backend.app.api.pagination import decode_cursor, set_next_cursor
+from backend.app.api.sse import SSE_HEADERS, SSE_MEDIA_TYPE, sse_event
+from backend.app.core.executors import run_blocking_io
+from backend.db import crud, session
 from backend.models.user import User as UserModel
 
 
@@ -13,37 +22,139 @@ router = APIRouter()
 
 
 @router.post("/", response_model=ChatMessageResponse)
-def process_chat_message(
+async def process_chat_message(
     *,
     db: Session = Depends(deps.get_db),
     chat_in: ChatMessageCreate,
+    background_tasks: BackgroundTasks,
     current_user: UserModel = Depends(deps.get_current_user)
 ):
     """
     Processes a chat message using the new LangChain agent, which can use tools.
-    Saves the user's message and the agent's final response to the database.
+    Messages with an obvious intent (a suspicious message to check, a bill to
+    read) skip the agent and go straight to the matching service. The agent
+    sees a running summary of the conversation plus the latest messages.
+    Saves the user's message and the final response to the database.
     """
-    from backend.app.services import agent_service 
-    # 1. Save the user's message to the database
+    from backend.app.services import agent_service
+    start = time.perf_counter()
+    owner_id: int = current_user.id  # type: ignore
+    # 1. Route the message; the agent also gets the conversation so far
+    intent, payload = intent_router_service.classify_intent(chat_in.message)
+    if intent == "agent":
+        chat_history = await run_blocking_io(conversation_memory_service.build_conversation_context, db, owner_id)
+
+    # 2. Save the user's message to the database
     user_message_to_save = ChatMessageCreateDB(message=chat_in.message, is_from_user=True)
-    crud.create_chat_message(db=db, msg=user_message_to_save, owner_id=current_user.id)
+    await run_blocking_io(crud.create_chat_message, db=db, msg=user_message_to_save, owner_id=owner_id)
+
+    # 3. Answer directly, or run the agent executor with a personalized and
+    #    multilingual input
+    if intent == "agent":
+        agent_input = _build_agent_input(current_user, chat_in)
+        response_text = await run_blocking_io(
+            agent_service.run_agent_conversation, user_input=agent_input, user_id=owner_id, chat_history=chat_history
+        )
+    else:
+        response_text = await intent_router_service.answer_directly(
+            intent, payload, message=chat_in.message, language=chat_in.language
+        )
+
+    # 4. Save the final response to the database, and fold older messages
+    #    into the running summary once the response is sent
+    ai_message_to_save = ChatMessageCreateDB(message=response_text, is_from_user=False)
+    await run_blocking_io(crud.create_chat_message, db=db, msg=ai_message_to_save, owner_id=owner_id)
+    intent_router_service.router_stats.record(intent, time.perf_counter() - start)
+    background_tasks.add_task(conversation_memory_service.update_running_summary, owner_id)
+
+    # 5. Return the response to the user
+    return {"response": response_text, "message": chat_in.message}
+
+
+@router.post("/stream")
+async def process_chat_message_stream(
+    *,
+    db: Session = Depends(deps.get_db),
+    chat_in: ChatMessageCreate,
+    background_tasks: BackgroundTasks,
+    current_user: UserModel = Depends(deps.get_current_user)
+):
+    """
+    Streaming version of /chat/ (Server-Sent Events). Emits `tool_start` and
+    `tool_end` events as tools are used, `token` events with the final answer
+    as it is written, then a `message` event with the complete
+    ChatMessageResponse once it is saved, or an `error` event.
+    """
+    from backend.app.services import agent_service
+    start = time.perf_counter()
+    owner_id: int = current_user.id  # type: ignore
+    intent, payload = intent_router_service.classify_intent(chat_in.message)
+    if intent == "agent":
+        chat_history = await run_blocking_io(conversation_memory_service.build_conversation_context, db, owner_id)
 
-    # 2. Create a personalized and multilingual input for the agent
+    user_message_to_save = ChatMessageCreateDB(message=chat_in.message, is_from_user=True)
+    await run_blocking_io(crud.create_chat_message, db=db, msg=user_message_to_save, owner_id=owner_id)
+
+    if intent == "agent":
+        events = agent_service.stream_agent_conversation(
+            user_input=_build_agent_input(current_user, chat_in), user_id=owner_id, chat_history=chat_history
+        )
+    else:
+        events = intent_router_service.stream_direct_answer(
+            intent, payload, message=chat_in.message, language=chat_in.language
+        )
+
+    async def event_stream():
+        try:
+            async for event, data in events:
+                if event != "final":
+                    yield sse_event(event, data)
+                    continue
+                # The request's session is closed once streaming starts
+                await run_blocking_io(_save_agent_response, data["response"], owner_id)
+                intent_router_service.router_stats.record(intent, time.perf_counter() - start)
+                yield sse_event("message", {"response": data["response"], "message": chat_in.message})
+        except Exception as e:
+            logging.error(f"Error while streaming the chat response: {e}")
+            yield sse_event("error", {"detail": "Could not process the chat message."})
+
+    # Runs after the stream ends, once the response is saved
+    background_tasks.add_task(conversation_memory_service.update_running_summary, owner_id)
+    return StreamingResponse(event_stream(), media_type=SSE_MEDIA_TYPE, headers=SSE_HEADERS)
+
+
+@router.get("/history", response_model=List[ChatMessage])
+def read_chat_history(
+    response: Response,
+    db: Session = Depends(deps.get_db),
+    current_user: UserModel = Depends(deps.get_current_user),
+    skip: int = 0,
+    limit: int = 100,
+    cursor: str | None = None,
+):
+    """
+    Lists the user's chat messages, oldest first. When more may follow, the
+    X-Next-Cursor response header holds the `cursor` for the next page.
+    """
+    after = decode_cursor(cursor, datetime, int) if cursor else None
+    messages = crud.get_user_chat_history(db, user_id=current_user.id, skip=skip, limit=limit, after=after)  # type: ignore
+    set_next_cursor(response, messages, limit, key=lambda message: (message.timestamp, message.id))
+    return messages
+
+
+def _build_agent_input(current_user: UserModel, chat_in: ChatMessageCreate) -> str:
     # The agent's prompt already knows to respond in the user's language.
-    agent_input = (
+    return (
         f"My name is {current_user.full_name} and my user_id is {current_user.id}. "
         f"I would like to speak in {chat_in.language}. "
         f"Here is my request: '{chat_in.message}'"
     )
 
-    # 3. Run the agent executor
-    agent_response_text = agent_service.run_agent_conversation(user_input=agent_input, user_id=current_user.id) #type: ignore
-
-
-    # 4. Save the agent's final response to the database
-    ai_message_to_save = ChatMessageCreateDB(message=agent_response_text, is_from_user=False)
-    crud.create_chat_message(db=db, msg=ai_message_to_save, owner_id=current_user.id)
-
-    # 5. Return the response to the user
-    return {"response": agent_response_text, "message": chat_in.message}
 
+def _save_agent_response(response_text: str, owner_id: int) -> None:
+    db = session.SessionLocal()
+    try:
+        ai_message_to_save = ChatMessageCreateDB(message=response_text, is_from_user=False)
+        crud.create_chat_message(db=db, msg=ai_message_to_save, owner_id=owner_id)
+    finally:
+        db.close()
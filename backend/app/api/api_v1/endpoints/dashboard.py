@@ -1,9 +1,11 @@
-from fastapi import APIRouter, Depends
+from datetime import date
+
+from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 
 from backend.app.schemas.dashboard import DashboardSummary
+from backend.app.services import dashboard_service
 from backend.app.api import deps
-from backend.db import crud
 from backend.models.user import User as UserModel
 
 router = APIRouter()
@@ -11,12 +13,20 @@ router = APIRouter()
 
 @router.get("/summary", response_model=DashboardSummary)
 def get_dashboard_summary(
+    period: dashboard_service.Period = "month",
+    start_date: date | None = None,
+    end_date: date | None = None,
     db: Session = Depends(deps.get_db),
     current_user: UserModel = Depends(deps.get_current_user),
 ):
     """
-    Retrieve a summary of the user's financial activity for the current month.
-    Requires authentication.
+    Retrieve a summary of the user's financial activity for the current
+    week, month (the default) or quarter, or for a custom period from
+    start_date to end_date (both inclusive). Requires authentication.
     """
-    summary_data = crud.get_monthly_spending_summary(db, user_id=current_user.id)
-    return summary_data
+    try:
+        return dashboard_service.get_spending_summary(
+            db, user_id=current_user.id, period=period, start_date=start_date, end_date=end_date  # type: ignore
+        )
+    except dashboard_service.InvalidPeriodError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
@@ -1,9 +1,10 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Response
 from sqlalchemy.orm import Session
 from typing import List
 
 from backend.app.schemas.document import Document
 from backend.app.api import deps
+from backend.app.api.pagination import decode_cursor, set_next_cursor
 from backend.db import crud
 from backend.models.user import User as UserModel
 
@@ -12,13 +13,19 @@ router = APIRouter()
 
 @router.get("/", response_model=List[Document])
 def read_user_documents(
+    response: Response,
     db: Session = Depends(deps.get_db),
     current_user: UserModel = Depends(deps.get_current_user),
     skip: int = 0,
     limit: int = 100,
+    cursor: str | None = None,
 ):
     """
-    Retrieve all documents for the currently logged-in user.
+    Retrieve all documents for the currently logged-in user, oldest first.
+    When more may follow, the X-Next-Cursor response header holds the
+    `cursor` for the next page.
     """
-    documents = crud.get_user_documents(db, user_id=current_user.id, skip=skip, limit=limit)
-    return documents
\ No newline at end of file
+    after_id = decode_cursor(cursor, int)[0] if cursor else None
+    documents = crud.get_user_documents(db, user_id=current_user.id, skip=skip, limit=limit, after_id=after_id)  # type: ignore
+    set_next_cursor(response, documents, limit, key=lambda document: (document.id,))
+    return documents
@@ -1,7 +1,12 @@
+import logging
+from contextlib import aclosing
+
 from fastapi import APIRouter, File, UploadFile, Depends
+from fastapi.responses import StreamingResponse
 from backend.app.schemas.document_analysis import DocumentAnalysisResponse
-from backend.app.services import ocr_service
+from backend.app.services import document_pipeline_service
 from backend.app.api import deps
+from backend.app.api.sse import SSE_HEADERS, SSE_MEDIA_TYPE, sse_event
 from backend.models.user import User as UserModel
 
 router = APIRouter()
@@ -17,17 +22,36 @@ async def analyze_document_image(
     Accepts a document image, performs OCR, and then uses an AI model
     to extract structured data from the text. Requires authentication.
     """
-    # 1. Read the image file contents
     contents = await file.read()
+    return await document_pipeline_service.run_document_analysis(
+        contents, filename=file.filename, content_type=file.content_type  # type: ignore
+    )
 
 
-    # 2. Extract the raw text
-    if file.content_type == "application/pdf" or file.filename.lower().endswith(".pdf"):
-        raw_text = ocr_service.extract_text_from_pdf(contents)
-    else:
-        raw_text = ocr_service.extract_text_from_image(contents)
+@router.post("/analyze/stream")
+async def analyze_document_image_stream(
+    *,
+    file: UploadFile = File(...),
+    current_user: UserModel = Depends(deps.get_current_user)
+):
+    """
+    Streaming version of /analyze (Server-Sent Events). Emits a `page` event
+    with each page's text as soon as it is ready, then an `analysis` event with
+    the structured extraction, or an `error` event.
+    """
+    contents = await file.read()
 
-    # 3. Use the AI service to analyze the raw text and get structured data
-    structured_data = ocr_service.extract_structured_data_from_text(raw_text)
+    async def event_stream():
+        events = document_pipeline_service.stream_document_analysis(
+            contents, filename=file.filename, content_type=file.content_type  # type: ignore
+        )
+        try:
+            # Closed (stopping OCR of the remaining pages) as soon as the client goes away
+            async with aclosing(events):
+                async for event, data in events:
+                    yield sse_event(event, data)
+        except Exception as e:
+            logging.error(f"Error while streaming document analysis: {e}")
+            yield sse_event("error", {"detail": "Could not analyze the document."})
 
-    return structured_data
+    return StreamingResponse(event_stream(), media_type=SSE_MEDIA_TYPE, headers=SSE_HEADERS)
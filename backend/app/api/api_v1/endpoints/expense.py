@@ -1,9 +1,17 @@
-from fastapi import APIRouter, File, UploadFile, Depends, HTTPException, status
+from datetime import datetime
+from typing import List
+
+from fastapi import APIRouter, File, UploadFile, Depends, HTTPException, Response, status
 from sqlalchemy.orm import Session
 
-from backend.app.schemas.transactions import Transaction
-from backend.app.services import ocr_service, expense_analysis_service
+from backend.app.core.config import settings
+from backend.app.schemas.transactions import Transaction, TransactionCategoryUpdate
+from backend.app.schemas.bulk_receipt import BulkReceiptResponse
+from backend.app.schemas.statement_import import StatementImportResponse
+from backend.app.services import bulk_receipt_service, document_pipeline_service, statement_import_service
+from backend.app.services.vendor_category_service import vendor_category_memo
 from backend.app.api import deps
+from backend.app.api.pagination import decode_cursor, set_next_cursor
 from backend.db import crud
 from backend.models.user import User as UserModel
 
@@ -25,31 +33,153 @@ async def process_bill_and_create_transaction(
     4. Intelligently categorizes the expense.
     5. Saves the result as a transaction in the database.
     """
-    # Step 1 & 2: OCR and Structured Data Extraction
     contents = await file.read()
-    raw_text = ocr_service.extract_text_from_image(contents)
-    if "Error:" in raw_text:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Could not read text from the uploaded image."
+    try:
+        return await document_pipeline_service.run_bill_processing(
+            db, contents, filename=file.filename, content_type=file.content_type, owner_id=current_user.id  # type: ignore
+        )
+    except document_pipeline_service.BillProcessingError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+@router.post("/process-bills", response_model=BulkReceiptResponse)
+async def process_bills_in_bulk(
+    *,
+    db: Session = Depends(deps.get_db),
+    files: list[UploadFile] = File(...),
+    current_user: UserModel = Depends(deps.get_current_user)
+):
+    """
+    Bulk version of /process-bill for many receipts at once. Accepts any mix
+    of images, PDFs and zip archives of them. OCR, AI analysis (batched across
+    receipts) and saving run as overlapping stages, and every transaction is
+    saved in a single insert. Returns a result or error for every receipt and
+    the throughput of the batch.
+    """
+    uploads = await _read_bulk_uploads(files)
+    try:
+        return await bulk_receipt_service.run_bulk_bill_processing(
+            db, uploads, owner_id=current_user.id  # type: ignore
         )
+    except document_pipeline_service.BillProcessingError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+_UPLOAD_CHUNK_BYTES = 1024 * 1024
 
-    structured_data = ocr_service.extract_structured_data_from_text(raw_text)
-    
-    # Step 3: Categorize Expense and Prepare Transaction
-    transaction_to_create = expense_analysis_service.categorize_expense_and_create_transaction(
-        extracted_data=structured_data.get("extracted_data", {})
-    )
-
-    if not transaction_to_create:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Could not analyze the expense from the document, likely missing a vendor name or total amount."
+
+async def _read_bulk_uploads(files: list[UploadFile]) -> list[tuple[str | None, str | None, bytes]]:
+    """
+    Reads the files of a bulk upload in chunks, so no more than the limits
+    is ever held in memory. A single receipt is read up to one byte past
+    BULK_RECEIPT_MAX_FILE_BYTES (unpack_uploads then reports it as too
+    large); zip archives only count against the total.
+
+    Raises:
+        HTTPException: 413 if the files add up to more than BULK_RECEIPT_MAX_TOTAL_BYTES.
+    """
+    uploads = []
+    total_bytes = 0
+    for file in files:
+        is_zip = bulk_receipt_service.is_zip_upload(file.filename, file.content_type)
+        file_limit = settings.BULK_RECEIPT_MAX_TOTAL_BYTES if is_zip else settings.BULK_RECEIPT_MAX_FILE_BYTES
+        chunks = []
+        file_bytes = 0
+        while file_bytes <= file_limit:
+            chunk = await file.read(min(_UPLOAD_CHUNK_BYTES, file_limit + 1 - file_bytes))
+            if not chunk:
+                break
+            chunks.append(chunk)
+            file_bytes += len(chunk)
+            total_bytes += len(chunk)
+            if total_bytes > settings.BULK_RECEIPT_MAX_TOTAL_BYTES:
+                raise HTTPException(
+                    status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                    detail=f"Uploads are limited to {settings.BULK_RECEIPT_MAX_TOTAL_BYTES // (1024 * 1024)} MB in total.",
+                )
+        uploads.append((file.filename, file.content_type, b"".join(chunks)))
+    return uploads
+
+
+@router.post("/import-statement", response_model=StatementImportResponse)
+async def import_bank_statement(
+    *,
+    db: Session = Depends(deps.get_db),
+    file: UploadFile = File(...),
+    current_user: UserModel = Depends(deps.get_current_user)
+):
+    """
+    Imports the debits of a bank or card statement, as a CSV export or a
+    downloaded (not scanned) PDF, as transactions. Payees are categorized in
+    bulk and all rows are saved in a single transaction. Rows already
+    imported (same day, amount and vendor) are skipped, so importing
+    overlapping statements is safe.
+    """
+    contents = await file.read()
+    try:
+        return await statement_import_service.import_statement(
+            db, contents, filename=file.filename, content_type=file.content_type, owner_id=current_user.id  # type: ignore
         )
+    except statement_import_service.StatementImportError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+@router.get("/transactions", response_model=List[Transaction])
+def read_user_transactions(
+    response: Response,
+    db: Session = Depends(deps.get_db),
+    current_user: UserModel = Depends(deps.get_current_user),
+    skip: int = 0,
+    limit: int = 100,
+    cursor: str | None = None,
+):
+    """
+    Lists the user's transactions, latest first. When more may follow, the
+    X-Next-Cursor response header holds the `cursor` for the next page.
+    """
+    before = decode_cursor(cursor, datetime, int) if cursor else None
+    transactions = crud.get_user_transactions(db, user_id=current_user.id, skip=skip, limit=limit, before=before)  # type: ignore
+    set_next_cursor(response, transactions, limit, key=lambda transaction: (transaction.transaction_date, transaction.id))
+    return transactions
+
+
+@router.patch("/transactions/{transaction_id}/category", response_model=Transaction)
+def recategorize_transaction(
+    *,
+    db: Session = Depends(deps.get_db),
+    transaction_id: int,
+    category_in: TransactionCategoryUpdate,
+    current_user: UserModel = Depends(deps.get_current_user)
+):
+    """
+    Manually changes the category of one of the user's transactions. The
+    correction is also remembered for the user, so their future expenses from
+    the same vendor get this category without asking the AI model. Other
+    users are not affected.
+    """
+    transaction = crud.get_user_transaction(db, transaction_id=transaction_id, user_id=current_user.id)  # type: ignore
+    if transaction is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Transaction not found.")
+
+    transaction = crud.update_transaction_category(db, transaction, category=category_in.category)
+    if transaction.vendor_name:
+        vendor_category_memo.remember_correction(current_user.id, transaction.vendor_name, category_in.category)  # type: ignore
+    return transaction
+
 
-    # Step 4: Save the Transaction to the Database
-    created_transaction = crud.create_user_transaction(
-        db=db, transaction=transaction_to_create, owner_id=current_user.id
-    )
 
-    return created_transaction
+@router.delete("/transactions/{transaction_id}", status_code=status.HTTP_204_NO_CONTENT)
+def delete_transaction(
+    *,
+    db: Session = Depends(deps.get_db),
+    transaction_id: int,
+    current_user: UserModel = Depends(deps.get_current_user)
+):
+    """
+    Deletes one of the user's transactions; it no longer counts towards the
+    dashboard's spending totals.
+    """
+    transaction = crud.get_user_transaction(db, transaction_id=transaction_id, user_id=current_user.id)  # type: ignore
+    if transaction is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Transaction not found.")
+    crud.delete_user_transaction(db, transaction)
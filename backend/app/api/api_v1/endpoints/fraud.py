@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 
 from backend.app.schemas.fraud import FraudAnalysisRequest, FraudAnalysisResponse
@@ -10,7 +10,7 @@ router = APIRouter()
 
 
 @router.post("/analyze", response_model=FraudAnalysisResponse)
-def analyze_text(
+async def analyze_text(
     *,
     db: Session = Depends(deps.get_db),
     request_body: FraudAnalysisRequest,
@@ -22,7 +22,13 @@ def analyze_text(
     """
     # We have the current_user object, which can be used for logging or context.
     # For now, we pass the text directly to our specialized service.
-    analysis_result = fraud_detection_service.analyze_text_for_fraud(
-        text_to_analyze=request_body.text
-    )
+    try:
+        analysis_result = await fraud_detection_service.analyze_text_for_fraud_async(
+            text_to_analyze=request_body.text
+        )
+    except fraud_detection_service.FraudAnalysisError:
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail="Could not analyze the message. Please try again, and be cautious until then.",
+        )
     return analysis_result
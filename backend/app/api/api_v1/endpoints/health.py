@@ -1,4 +1,17 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
+
+from backend.app.api import deps
+from backend.app.services import ocr_job_service
+from backend.app.services.conversation_memory_service import memory_stats
+from backend.app.services.extraction_cache_service import extraction_cache
+from backend.app.services.fraud_classifier_service import fraud_classifier
+from backend.app.services.fraud_fingerprint_service import fraud_fingerprint_index
+from backend.app.services.image_preprocessing_service import preprocessing_stats
+from backend.app.services.intent_router_service import router_stats
+from backend.app.services.llm_batching_service import coalescer_stats
+from backend.app.services.llm_gateway_service import gateway_stats
+from backend.app.services.prompt_compaction_service import compaction_stats
+from backend.app.services.vendor_category_service import vendor_category_memo
 
 router = APIRouter()
 
@@ -9,3 +22,24 @@ async def check_health():
     Returns a success message if the API is running.
     """
     return {"status": "ok", "message": "API is healthy"}
+
+
+@router.get("/metrics", dependencies=[Depends(deps.verify_metrics_token)])
+async def read_metrics():
+    """
+    Returns in-process performance counters (cache hit rates, etc.).
+    Requires the METRICS_TOKEN as a bearer token; disabled when it is unset.
+    """
+    return {
+        "chat_router": router_stats.snapshot(),
+        "conversation_memory": memory_stats.snapshot(),
+        "extraction_cache": extraction_cache.stats(),
+        "fraud_classifier": fraud_classifier.stats(),
+        "fraud_fingerprints": fraud_fingerprint_index.stats(),
+        "llm_batching": coalescer_stats(),
+        "llm_gateway": gateway_stats(),
+        "ocr_jobs": {"queue_depth": ocr_job_service.queue_depth()},
+        "ocr_preprocessing": preprocessing_stats.snapshot(),
+        "prompt_compaction": compaction_stats.snapshot(),
+        "vendor_category_memo": vendor_category_memo.stats(),
+    }
@@ -8,6 +8,7 @@ from fastapi import APIRouter, File, UploadFile, Depends, Request
 from backend.app.api import deps
 from backend.models.user import User as UserModel
 from backend.app.api import deps
+from backend.app.services.llm_gateway_service import LLMUnavailableError, ondemand_gateway
 router = APIRouter()
 from dotenv import load_dotenv
 load_dotenv()
@@ -66,12 +67,9 @@ async def get_insights(
                 "agentIds": []
             }
 
-            session_res = await client.post(
-                f"{BASE_URL}/sessions",
-                headers=ondemand_headers,
-                json=session_payload
+            session_res = await _post_to_ondemand(
+                client, f"{BASE_URL}/sessions", ondemand_headers, session_payload
             )
-            session_res.raise_for_status()
             session_id = session_res.json()["data"]["id"]
 
             # --------------------------------
@@ -103,12 +101,9 @@ async def get_insights(
                 }
             }
 
-            query_res = await client.post(
-                f"{BASE_URL}/sessions/{session_id}/query",
-                headers=ondemand_headers,
-                json=query_payload
+            query_res = await _post_to_ondemand(
+                client, f"{BASE_URL}/sessions/{session_id}/query", ondemand_headers, query_payload
             )
-            query_res.raise_for_status()
             query_data = query_res.json()
 
         # --------------------------------
@@ -121,8 +116,22 @@ async def get_insights(
         except json.JSONDecodeError:
             return {"answer": raw_answer}
 
+    except LLMUnavailableError:
+        # Answered with 503/429 by the application's exception handler
+        raise
+
     except httpx.HTTPStatusError as e:
         raise HTTPException(status_code=e.response.status_code, detail=e.response.text)
 
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+async def _post_to_ondemand(client: httpx.AsyncClient, url: str, headers: dict, payload: dict) -> httpx.Response:
+    # Goes through the On-Demand gateway, which retries 429/5xx responses
+    async def send() -> httpx.Response:
+        response = await client.post(url, headers=headers, json=payload)
+        response.raise_for_status()
+        return response
+
+    return await ondemand_gateway.call(send)
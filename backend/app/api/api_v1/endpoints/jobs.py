@@ -0,0 +1,68 @@
+from fastapi import APIRouter, File, Form, UploadFile, Depends, HTTPException, status
+
+from backend.app.schemas.job import Job, JobKind, JobSubmitted
+from backend.app.core.config import settings
+from backend.app.core.executors import run_blocking_io
+from backend.app.services import ocr_job_service
+from backend.app.api import deps
+from backend.models.user import User as UserModel
+
+router = APIRouter()
+
+
+@router.post("/{kind}", response_model=JobSubmitted, status_code=status.HTTP_202_ACCEPTED)
+async def submit_job(
+    *,
+    kind: JobKind,
+    file: UploadFile = File(...),
+    callback_url: str | None = Form(None),
+    current_user: UserModel = Depends(deps.get_current_user)
+):
+    """
+    Queues a document for background processing and returns a job id at once.
+    `kind` selects the pipeline: 'ocr' (/ocr/upload), 'analyze'
+    (/document-analysis/analyze) or 'process_bill' (/expense/process-bill).
+    Poll GET /jobs/{job_id}, or pass a callback_url to receive the final job
+    state as a POST. The callback must be an https URL on a public host.
+    """
+    if callback_url:
+        try:
+            await run_blocking_io(ocr_job_service.validate_callback_url, callback_url)
+        except ocr_job_service.InvalidCallbackUrlError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    # Read at most one byte past the limit, so oversized uploads are never held in full
+    contents = await file.read(settings.OCR_JOB_MAX_FILE_BYTES + 1)
+    if len(contents) > settings.OCR_JOB_MAX_FILE_BYTES:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="File is too large.")
+    try:
+        # Spooling the upload and recording the job block on disk and database I/O
+        job = await run_blocking_io(
+            ocr_job_service.submit_job,
+            owner_id=current_user.id,  # type: ignore
+            kind=kind,
+            file_bytes=contents,
+            filename=file.filename,  # type: ignore
+            content_type=file.content_type,
+            callback_url=callback_url,
+        )
+    except ocr_job_service.JobQueueFullError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many documents are being processed right now. Please retry shortly.",
+            headers={"Retry-After": "10"},
+        )
+    return {"job_id": job.id, "status": job.status}
+
+
+@router.get("/{job_id}", response_model=Job)
+def read_job(
+    job_id: str,
+    current_user: UserModel = Depends(deps.get_current_user)
+):
+    """
+    Returns the state of a background job and, once done, its result.
+    """
+    job = ocr_job_service.get_job(job_id, owner_id=current_user.id)  # type: ignore
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found.")
+    return job
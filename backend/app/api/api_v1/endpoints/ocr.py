@@ -1,11 +1,14 @@
+import logging
+from contextlib import aclosing
+
 from fastapi import APIRouter, File, UploadFile, Depends
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
 from backend.app.schemas.ocr import OCRResponse
-from backend.app.schemas.document import Document, DocumentCreate
-from backend.app.services.ocr_service import extract_text_from_image, extract_text_from_pdf
+from backend.app.services import document_pipeline_service
 from backend.app.api import deps
-from backend.db import crud
+from backend.app.api.sse import SSE_HEADERS, SSE_MEDIA_TYPE, sse_event
 from backend.models.user import User as UserModel
 
 router = APIRouter()
@@ -18,20 +21,37 @@ async def upload_image_for_ocr(
     current_user: UserModel = Depends(deps.get_current_user)
 ):
     contents = await file.read()
-    
-    if file.content_type == "application/pdf" or file.filename.lower().endswith(".pdf"):
-        extracted_text = extract_text_from_pdf(contents) # type: ignore
-    else:
-        extracted_text = extract_text_from_image(contents) #type: ignore
-
-    # 2. Prepare the document data for the database
-    doc_in = DocumentCreate(
-        filename=file.filename,  # type: ignore
-        extracted_text=extracted_text
-    )
     owner_id: int = current_user.id  # type: ignore
-    created_document = crud.create_user_document(
-        db=db, doc=doc_in, owner_id=owner_id
+    return await document_pipeline_service.run_ocr_upload(
+        db, contents, filename=file.filename, content_type=file.content_type, owner_id=owner_id  # type: ignore
     )
 
-    return created_document
\ No newline at end of file
+
+@router.post("/upload/stream")
+async def upload_image_for_ocr_stream(
+    *,
+    file: UploadFile = File(...),
+    current_user: UserModel = Depends(deps.get_current_user)
+):
+    """
+    Streaming version of /upload (Server-Sent Events). Emits a `page` event
+    with each page's text as soon as it is ready, then a `document` event with
+    the saved OCRResponse, or an `error` event.
+    """
+    contents = await file.read()
+    owner_id: int = current_user.id  # type: ignore
+
+    async def event_stream():
+        events = document_pipeline_service.stream_ocr_upload(
+            contents, filename=file.filename, content_type=file.content_type, owner_id=owner_id  # type: ignore
+        )
+        try:
+            # Closed (stopping OCR of the remaining pages) as soon as the client goes away
+            async with aclosing(events):
+                async for event, data in events:
+                    yield sse_event(event, data)
+        except Exception as e:
+            logging.error(f"Error while streaming OCR results: {e}")
+            yield sse_event("error", {"detail": "Could not extract text from the document."})
+
+    return StreamingResponse(event_stream(), media_type=SSE_MEDIA_TYPE, headers=SSE_HEADERS)
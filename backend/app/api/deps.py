@@ -1,16 +1,21 @@
+import secrets
+
 from fastapi import Depends, HTTPException, status
-from fastapi.security import OAuth2PasswordBearer
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer, OAuth2PasswordBearer
 from sqlalchemy.orm import Session
 from jose import JWTError, jwt
 
 from backend.app.core import security
 from backend.app.core.config import settings
+from backend.app.core.executors import run_blocking_io
+from backend.app.services.llm_gateway_service import current_user_id
 from backend.db import crud
 from backend.app.schemas.token import TokenData
 from backend.models.user import User
 from backend.db.session import SessionLocal
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/login/token")
+metrics_scheme = HTTPBearer(auto_error=False)
 
 def get_db():
     db = SessionLocal()
@@ -19,9 +24,15 @@ def get_db():
     finally:
         db.close()
 
-def get_current_user(
+async def get_current_user(
     db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)
 ) -> User:
+    user = await run_blocking_io(_get_user_from_token, db, token)
+    # Lets the LLM gateway apply per-user rate limits for the rest of the request
+    current_user_id.set(user.id)  # type: ignore
+    return user
+
+def _get_user_from_token(db: Session, token: str) -> User:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -42,3 +53,18 @@ def get_current_user(
     if user is None:
         raise credentials_exception
     return user
+
+
+def verify_metrics_token(credentials: HTTPAuthorizationCredentials | None = Depends(metrics_scheme)) -> None:
+    """
+    Guards the metrics endpoint with settings.METRICS_TOKEN. The endpoint is
+    not served at all while no token is configured.
+    """
+    if not settings.METRICS_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if credentials is None or not secrets.compare_digest(credentials.credentials.encode(), settings.METRICS_TOKEN.encode()):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid metrics token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
@@ -0,0 +1,48 @@
+import base64
+import json
+from datetime import datetime
+from typing import Callable, Sequence
+
+from fastapi import HTTPException, Response, status
+
+# List endpoints return a plain JSON array; when more rows may follow, this
+# header carries the cursor to pass back as `?cursor=` for the next page.
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(*key) -> str:
+    """Encodes the sort key of the last row of a page (e.g. its date and id) as an opaque cursor."""
+    values = [value.isoformat() if isinstance(value, datetime) else value for value in key]
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, *types: type) -> tuple:
+    """
+    Decodes a cursor made by encode_cursor.
+
+    Args:
+        cursor: The cursor sent by the client.
+        types: The expected type of each value of the key (datetime or int).
+
+    Returns:
+        The sort key.
+
+    Raises:
+        HTTPException: 400 if the cursor is malformed.
+    """
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if not isinstance(values, list) or len(values) != len(types):
+            raise ValueError("wrong number of values")
+        return tuple(
+            datetime.fromisoformat(value) if expected is datetime else expected(value)
+            for value, expected in zip(values, types)
+        )
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid pagination cursor.")
+
+
+def set_next_cursor(response: Response, rows: Sequence, limit: int, key: Callable[[object], tuple]) -> None:
+    """Sets the next-page cursor header when the page is full, i.e. more rows may follow."""
+    if rows and len(rows) >= limit:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(*key(rows[-1]))
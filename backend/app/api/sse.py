@@ -0,0 +1,13 @@
+import json
+
+from fastapi.encoders import jsonable_encoder
+
+SSE_MEDIA_TYPE = "text/event-stream"
+
+# Stops nginx and similar proxies from buffering the stream
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+def sse_event(event: str, data) -> str:
+    """Formats one Server-Sent Event whose data is the JSON encoding of `data`."""
+    return f"event: {event}\ndata: {json.dumps(jsonable_encoder(data))}\n\n"
@@ -1,5 +1,7 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
 import os
+import tempfile
+from typing import Literal
 
 env_path = os.path.join(os.path.dirname(__file__), '..', '.env')
 
@@ -14,6 +16,157 @@ class Settings(BaseSettings):
     GEMINI_API_KEY: str 
     SECRET_KEY: str
     DATABASE_URL: str
+
+    # --- Execution pools (see app/core/executors.py) ---
+    CPU_POOL_WORKERS: int = os.cpu_count() or 2
+    BLOCKING_IO_POOL_WORKERS: int = 32
+
+    # --- OCR ---
+    # 'auto' uses the in-process tesserocr engine when installed, else pytesseract.
+    OCR_BACKEND: Literal["auto", "tesserocr", "pytesseract"] = "auto"
+    OCR_LANGUAGE: str = "eng"
+    # Worker processes used to OCR the pages of a PDF in parallel.
+    OCR_MAX_WORKERS: int = max(1, (os.cpu_count() or 2) - 1)
+    # Pages beyond this limit are ignored so one huge upload cannot hog the pool.
+    OCR_MAX_PDF_PAGES: int = 50
+    # A PDF page whose text layer has fewer characters than this is OCR'd instead.
+    PDF_TEXT_LAYER_MIN_CHARS: int = 20
+    # A page at least this much covered by images is treated as a scan, and is
+    # OCR'd unless its text layer covers at least PDF_TEXT_LAYER_MIN_IMAGE_COVERAGE
+    # of the image area (a stamp, footer or watermark covers far less).
+    PDF_SCANNED_PAGE_MIN_IMAGE_COVERAGE: float = 0.5
+    PDF_TEXT_LAYER_MIN_IMAGE_COVERAGE: float = 0.1
+
+    # --- Image preprocessing ahead of Tesseract ---
+    OCR_PREPROCESSING_ENABLED: bool = True
+    # Text lines are downscaled to about this height; Tesseract is most accurate around 20-40 px.
+    OCR_TARGET_TEXT_HEIGHT_PX: int = 32
+    # Upper bound on pixels handed to Tesseract when no text height can be measured.
+    OCR_MAX_IMAGE_PIXELS: int = 4_000_000
+    # Global Otsu thresholding of the whole image. Off until its accuracy has been
+    # checked on real receipt photos (bench_preprocessing compares both settings):
+    # one threshold can wipe out text in shadows or on coloured backgrounds.
+    OCR_BINARIZE: bool = False
+    # PDF pages are rendered so their long side is about this many pixels.
+    OCR_PDF_TARGET_LONG_SIDE_PX: int = 2400
+
+    # --- OCR / extraction result cache (keyed by SHA-256 of the upload) ---
+    EXTRACTION_CACHE_MAX_ENTRIES: int = 1024
+    EXTRACTION_CACHE_TTL_SECONDS: int = 7 * 24 * 3600
+    EXTRACTION_CACHE_PERSISTENT_MAX_ENTRIES: int = 100_000
+
+    # --- Vendor -> category memo (in-process tier; the table is unbounded) ---
+    VENDOR_CATEGORY_MEMO_MAX_ENTRIES: int = 4096
+    VENDOR_CATEGORY_MEMO_TTL_SECONDS: int = 3600
+
+    # --- Scam-template fingerprint index (near-duplicate fraud verdicts) ---
+    # Messages at least this similar (estimated Jaccard over words and word pairs,
+    # with links and numbers masked) to a known scam reuse its verdict.
+    FRAUD_FINGERPRINT_MIN_SIMILARITY: float = 0.6
+    FRAUD_FINGERPRINT_MAX_ENTRIES: int = 20_000
+    FRAUD_FINGERPRINT_TTL_SECONDS: int = 90 * 24 * 3600
+
+    # --- Local fraud classifier (after the fingerprint index, ahead of the AI model) ---
+    FRAUD_CLASSIFIER_ENABLED: bool = True
+    # Written by `python -m backend.scripts.train_fraud_classifier`.
+    FRAUD_CLASSIFIER_WEIGHTS_PATH: str = os.path.join(
+        os.path.dirname(__file__), "..", "services", "fraud_classifier_weights.json"
+    )
+    # Scores in between these probabilities are escalated to the AI model.
+    FRAUD_CLASSIFIER_SCAM_THRESHOLD: float = 0.95
+    FRAUD_CLASSIFIER_SAFE_THRESHOLD: float = 0.05
+
+    # --- Micro-batching of concurrent AI requests (see llm_batching_service.py) ---
+    LLM_BATCHING_ENABLED: bool = True
+    # How long the first request of a batch waits for others to join it.
+    LLM_BATCH_WINDOW_SECONDS: float = 0.025
+    LLM_BATCH_MAX_SIZE: int = 8
+
+    # --- Compaction of OCR text before it is sent to the AI model ---
+    PROMPT_COMPACTION_ENABLED: bool = True
+    # Estimated tokens of document text per prompt; the least relevant lines beyond this are dropped.
+    PROMPT_OCR_TOKEN_BUDGET: int = 2000
+    # Lines kept on either side of a line with an amount, date or ID when trimming.
+    PROMPT_CONTEXT_LINES: int = 1
+
+    # --- AI provider gateway (see llm_gateway_service.py) ---
+    # Limits on calls to Gemini across all users; excess calls queue, then fail with 503.
+    LLM_MAX_CONCURRENCY: int = 16
+    LLM_REQUESTS_PER_MINUTE: int = 600
+    # Per-user budget shared by Gemini and On-Demand limits; excess calls fail with 429.
+    LLM_USER_REQUESTS_PER_MINUTE: int = 60
+    # How long a call may wait for a rate-limit token or a free slot.
+    LLM_QUEUE_TIMEOUT_SECONDS: float = 20
+    LLM_REQUEST_TIMEOUT_SECONDS: float = 60
+    # Retries of rate-limited, timed-out and 5xx calls, with full-jitter exponential backoff.
+    LLM_MAX_RETRIES: int = 3
+    LLM_RETRY_BASE_SECONDS: float = 0.5
+    LLM_RETRY_MAX_SECONDS: float = 8
+    # Send a duplicate of an async call still unanswered after this long; unset disables hedging.
+    LLM_HEDGE_AFTER_SECONDS: float | None = None
+    # Consecutive failures that open the circuit, and how long it stays open.
+    LLM_CIRCUIT_FAILURE_THRESHOLD: int = 5
+    LLM_CIRCUIT_RESET_SECONDS: float = 30
+    ONDEMAND_MAX_CONCURRENCY: int = 4
+    ONDEMAND_REQUESTS_PER_MINUTE: int = 60
+
+    # --- Chat ---
+    # Sends chat messages with an obvious intent straight to the matching
+    # service instead of through the ReAct agent.
+    CHAT_INTENT_ROUTER_ENABLED: bool = True
+
+    # --- Agent conversation memory (see conversation_memory_service.py) ---
+    # The agent sees a running summary plus the most recent messages, within this budget.
+    CONVERSATION_CONTEXT_TOKEN_BUDGET: int = 1500
+    CONVERSATION_SUMMARY_MAX_TOKENS: int = 400
+    CONVERSATION_WINDOW_MAX_MESSAGES: int = 12
+    # Longer messages (e.g. pasted bills) are cut to this many tokens in the context.
+    CONVERSATION_MESSAGE_MAX_TOKENS: int = 250
+    # Messages that left the window are folded into the summary once this many are waiting...
+    CONVERSATION_SUMMARY_MIN_FOLD_MESSAGES: int = 4
+    # ...and at most this many at a time, so one summary call stays small.
+    CONVERSATION_SUMMARY_MAX_FOLD_MESSAGES: int = 20
+
+    # --- Background OCR jobs ---
+    OCR_JOB_WORKERS: int = 2
+    # Submissions beyond this many waiting jobs are rejected with 503.
+    OCR_JOB_QUEUE_SIZE: int = 100
+    # Larger uploads are rejected with 413 before they are spooled.
+    OCR_JOB_MAX_FILE_BYTES: int = 20 * 1024 * 1024
+    # Uploads of queued jobs are kept here until the job finishes.
+    OCR_JOB_SPOOL_DIR: str = os.path.join(tempfile.gettempdir(), "helios-ocr-jobs")
+    # A running job is leased to its worker process for this long and renewed
+    # every third of it; jobs whose lease lapsed are picked up by any process.
+    OCR_JOB_LEASE_SECONDS: int = 60
+    # Job callbacks must be https URLs whose host resolves to public addresses
+    # only; when this list is set, the host must also be one of these names.
+    OCR_JOB_CALLBACK_ALLOWED_HOSTS: list[str] = []
+
+    # --- Bulk receipt ingestion (/expense/process-bills) ---
+    # Limits apply after zip archives are unpacked.
+    BULK_RECEIPT_MAX_FILES: int = 100
+    BULK_RECEIPT_MAX_FILE_BYTES: int = 20 * 1024 * 1024
+    # Cap on the uploaded bytes of one request (413), and on the bytes of all
+    # its receipts once zip archives are decompressed (400).
+    BULK_RECEIPT_MAX_TOTAL_BYTES: int = 200 * 1024 * 1024
+    # Receipts sent to the AI model in one extraction/categorization call.
+    BULK_RECEIPT_LLM_BATCH_SIZE: int = 10
+    # How long a partial batch waits for more receipts to finish OCR.
+    BULK_RECEIPT_BATCH_WAIT_SECONDS: float = 0.5
+
+    # --- Bank statement import (/expense/import-statement) ---
+    STATEMENT_IMPORT_MAX_FILE_BYTES: int = 20 * 1024 * 1024
+    STATEMENT_IMPORT_MAX_ROWS: int = 100_000
+    STATEMENT_IMPORT_MAX_PDF_PAGES: int = 200
+    # Payees the vendor category memo does not know are categorized by the AI
+    # model, most frequent first, up to this many per import; the rest are
+    # imported as 'Uncategorized' and listed in the result.
+    STATEMENT_IMPORT_MAX_AI_VENDORS: int = 300
+
+    # --- Performance metrics (/health/metrics) ---
+    # Scrapers send it as "Authorization: Bearer <token>"; unset, the endpoint is disabled (404).
+    METRICS_TOKEN: str | None = None
+
     model_config = SettingsConfigDict(env_file="C:\\ML_Projects\\Helios\\backend\\.env", extra="ignore")
 
 settings = Settings()  # type: ignore
\ No newline at end of file
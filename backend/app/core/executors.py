@@ -0,0 +1,99 @@
+import asyncio
+import contextvars
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Iterator, TypeVar
+
+from backend.app.core.config import settings
+
+T = TypeVar("T")
+
+# CPU-heavy work (Tesseract, PDF rasterization). Sized to the number of cores so
+# OCR requests queue here instead of oversubscribing the CPU.
+_cpu_pool = ThreadPoolExecutor(max_workers=settings.CPU_POOL_WORKERS, thread_name_prefix="helios-cpu")
+
+# Blocking network/database calls (Gemini SDK, SQLAlchemy). Mostly waiting, so
+# this pool is much larger than the CPU pool.
+_io_pool = ThreadPoolExecutor(max_workers=settings.BLOCKING_IO_POOL_WORKERS, thread_name_prefix="helios-io")
+
+
+async def run_cpu_bound(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    Runs a CPU-bound function on the CPU pool without blocking the event loop.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_cpu_pool, _bind_context(func, *args, **kwargs))
+
+
+async def run_blocking_io(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    Runs a blocking I/O function (LLM client, database) on the I/O pool
+    without blocking the event loop.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_io_pool, _bind_context(func, *args, **kwargs))
+
+
+async def iterate_cpu_bound(func: Callable[..., Iterator[T]], *args: Any, **kwargs: Any) -> AsyncIterator[T]:
+    """
+    Runs a blocking generator function on the CPU pool and yields its items to
+    the event loop as they are produced. Exceptions raised by the generator are
+    re-raised here.
+
+    When the consumer stops early (it is cancelled, e.g. because the client
+    disconnected, or closes this iterator), the generator is closed once the
+    item it is working on is done, so its own cleanup runs and no more items
+    are produced. Consumers that break out of the loop should iterate inside
+    contextlib.aclosing so that happens at once.
+    """
+    loop = asyncio.get_running_loop()
+    items: asyncio.Queue = asyncio.Queue()
+    finished = object()
+    stopped = threading.Event()
+
+    def put(item: Any, error: Exception | None) -> None:
+        if not stopped.is_set():
+            loop.call_soon_threadsafe(items.put_nowait, (item, error))
+
+    def produce() -> None:
+        iterator = func(*args, **kwargs)
+        try:
+            while not stopped.is_set():
+                item = next(iterator, finished)
+                put(item, None)
+                if item is finished:
+                    return
+        except Exception as e:
+            put(finished, e)
+        finally:
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                close()
+
+    producer = loop.run_in_executor(_cpu_pool, _bind_context(produce))
+    try:
+        while True:
+            item, error = await items.get()
+            if item is finished:
+                await producer
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        stopped.set()
+        # Not started yet (the pool is busy): it never will be
+        producer.cancel()
+
+
+def _bind_context(func: Callable[..., T], *args: Any, **kwargs: Any) -> Callable[[], T]:
+    # Unlike asyncio.to_thread, run_in_executor does not carry context
+    # variables (e.g. the current user for LLM rate limits) into the pool.
+    return functools.partial(contextvars.copy_context().run, func, *args, **kwargs)
+
+
+def shutdown_executors() -> None:
+    """Stops both pools. Called on application shutdown."""
+    _cpu_pool.shutdown(wait=False, cancel_futures=True)
+    _io_pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,26 @@
+from pydantic import BaseModel
+from typing import Literal
+from backend.app.schemas.transactions import Transaction
+
+class BulkReceiptResult(BaseModel):
+    """
+    The outcome for one receipt of a bulk upload. Files unpacked from a zip
+    archive are named "<archive>/<path inside the archive>".
+    """
+    filename: str
+    status: Literal["created", "failed"]
+    transaction: Transaction | None = None
+    error: str | None = None
+
+
+class BulkReceiptResponse(BaseModel):
+    """
+    Schema for the response of a bulk receipt upload, with per-file results
+    and the throughput of the whole batch.
+    """
+    results: list[BulkReceiptResult]
+    total: int
+    created: int
+    failed: int
+    elapsed_seconds: float
+    receipts_per_second: float
@@ -1,3 +1,4 @@
+import datetime
 from pydantic import BaseModel
 from decimal import Decimal
 from typing import Dict
@@ -9,6 +10,10 @@ class DashboardSummary(BaseModel):
     """
     total_spending: Decimal
     spending_by_category: Dict[str, Decimal]
+    period: str
+    # First and last day of the summarized period (both inclusive)
+    start_date: datetime.date
+    end_date: datetime.date
 
     class Config:
         from_attributes = True
@@ -1,5 +1,6 @@
 from pydantic import BaseModel
 from typing import Dict, Any
+from backend.app.schemas.ocr import PageExtraction
 
 class DocumentAnalysisResponse(BaseModel):
     """
@@ -7,3 +8,4 @@ class DocumentAnalysisResponse(BaseModel):
     """
     document_type: str
     extracted_data: Dict[str, Any]
+    pages: list[PageExtraction] = []
@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic import BaseModel, Field
 
 class FraudAnalysisRequest(BaseModel):
@@ -13,3 +15,6 @@ class FraudAnalysisResponse(BaseModel):
     """
     is_scam: bool
     reason: str
+    # Which tier produced the verdict: the local classifier, the scam-template
+    # fingerprint index, or the AI model.
+    decided_by: Literal["classifier", "fingerprint", "llm"]
@@ -0,0 +1,30 @@
+import datetime
+from pydantic import BaseModel, Json
+from typing import Any, Literal
+
+JobKind = Literal["ocr", "analyze", "process_bill"]
+JobStatus = Literal["queued", "running", "done", "failed"]
+
+
+class JobSubmitted(BaseModel):
+    """Schema returned as soon as a job has been accepted."""
+    job_id: str
+    status: JobStatus
+
+
+class Job(BaseModel):
+    """
+    Schema for polling a background job. `result` holds the same payload the
+    synchronous endpoint would have returned, once the job is done.
+    """
+    id: str
+    kind: JobKind
+    status: JobStatus
+    filename: str
+    result: Json[Any] | None = None
+    error: str | None = None
+    created_at: datetime.datetime
+    updated_at: datetime.datetime
+
+    class Config:
+        from_attributes = True
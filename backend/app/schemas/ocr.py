@@ -1,8 +1,19 @@
 from pydantic import BaseModel
+from typing import Literal
+
+class PageExtraction(BaseModel):
+    """
+    Reports how the text of a single page was obtained: read from the
+    document's embedded text layer, or rasterized and OCR'd.
+    """
+    page_number: int
+    method: Literal["text_layer", "ocr"]
+
 
 class OCRResponse(BaseModel):
     """
     Defines the response schema for an OCR request.
     """
     filename: str
-    extracted_text: str
\ No newline at end of file
+    extracted_text: str
+    pages: list[PageExtraction] = []
@@ -0,0 +1,36 @@
+import re
+from decimal import Decimal, InvalidOperation
+from pydantic import BaseModel, field_validator
+
+class ReceiptAnalysis(BaseModel):
+    """
+    Schema for the AI model's single-pass reading of a bill or receipt: the
+    document type, the key fields and the spending category.
+    """
+    document_type: str
+    vendor_name: str | None = None
+    total_amount: Decimal | None = None
+    due_date: str | None = None
+    category: str = "Other"
+
+    @field_validator("total_amount", mode="before")
+    @classmethod
+    def parse_amount(cls, value):
+        # Models often answer with formatted strings like "₹ 1,842.00" or "Rs. 500"
+        if isinstance(value, str):
+            cleaned = re.sub(r"[^\d.\-]", "", re.sub(r"(?i)\b(rs|inr)\b\.?", "", value))
+            try:
+                return Decimal(cleaned) if cleaned else None
+            except InvalidOperation:
+                return None
+        return value
+
+    @field_validator("vendor_name", mode="before")
+    @classmethod
+    def blank_vendor_to_none(cls, value):
+        return value.strip() or None if isinstance(value, str) else value
+
+    @field_validator("category", mode="before")
+    @classmethod
+    def default_category(cls, value):
+        return value if isinstance(value, str) and value.strip() else "Other"
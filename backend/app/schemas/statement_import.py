@@ -0,0 +1,20 @@
+from pydantic import BaseModel
+
+
+class StatementImportResponse(BaseModel):
+    """
+    Schema for the response of a bank statement import. Only debits become
+    transactions; credits (salary, refunds, ...) are counted and skipped.
+    """
+    total_rows: int
+    imported: int
+    duplicates: int
+    credits_skipped: int
+    # Rows without a readable date or amount, e.g. opening balance or page totals
+    invalid_rows: int
+    # Payees that could not be categorized (AI unavailable, rate limited, or
+    # beyond STATEMENT_IMPORT_MAX_AI_VENDORS), most frequent first; their rows
+    # were imported as 'Uncategorized'
+    uncategorized_vendors: list[str]
+    elapsed_seconds: float
+    rows_per_second: float
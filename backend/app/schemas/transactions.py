@@ -15,6 +15,11 @@ class TransactionCreate(TransactionBase):
     pass
 
 
+class TransactionCategoryUpdate(BaseModel):
+    """Schema for manually recategorizing a transaction."""
+    category: str
+
+
 class Transaction(TransactionBase):
     """Schema for returning a transaction from the API."""
     id: int
@@ -1,13 +1,69 @@
+from google.api_core import exceptions as google_api_exceptions
 from langchain_google_genai import ChatGoogleGenerativeAI
+from langchain_google_genai.chat_models import ChatGoogleGenerativeAIError
 from langchain.agents import tool, AgentExecutor, create_react_agent
 from langchain_core.prompts import PromptTemplate
 from backend.app.core.config import settings
 from backend.app.services import fraud_detection_service, ocr_service, expense_analysis_service
+from backend.app.services.llm_gateway_service import gemini_gateway
+from backend.app.schemas.receipt import ReceiptAnalysis
 from backend.db import crud, session
 import json
+from contextlib import contextmanager
+from typing import AsyncIterator
 
 # --- 1. Initialize the LLM ---
+
+@contextmanager
+def _no_langchain_retries():
+    # langchain-google-genai retries Google API errors up to ten times around
+    # each client call; errors leaving the gateway were already retried (or
+    # are not worth retrying), so they are raised as an error it passes through
+    try:
+        yield
+    except google_api_exceptions.GoogleAPIError as e:
+        raise ChatGoogleGenerativeAIError(f"The Gemini call failed: {e}") from e
+
+
+class _GatewayGenerativeServiceClient:
+    """
+    Wraps the Gemini client of ChatGoogleGenerativeAI so the agent's model
+    calls go through the Gemini gateway, sharing the concurrency cap, rate
+    limits, retries and circuit breaker of every other Gemini call. Streamed
+    chunks are passed on as they arrive.
+    """
+
+    def __init__(self, client):
+        self._client = client
+
+    def generate_content(self, **kwargs):
+        with _no_langchain_retries():
+            return gemini_gateway.call_sync(lambda: self._client.generate_content(**kwargs))
+
+    def stream_generate_content(self, **kwargs):
+        return gemini_gateway.stream_sync(lambda: self._client.stream_generate_content(**kwargs))
+
+    def __getattr__(self, name):
+        # Everything else (e.g. count_tokens) is not a model call
+        return getattr(self._client, name)
+
+
+class _GatewayGenerativeServiceAsyncClient(_GatewayGenerativeServiceClient):
+    """Async counterpart of _GatewayGenerativeServiceClient."""
+
+    async def generate_content(self, **kwargs):
+        with _no_langchain_retries():
+            return await gemini_gateway.call(lambda: self._client.generate_content(**kwargs))
+
+    async def stream_generate_content(self, **kwargs):
+        return gemini_gateway.stream(lambda: self._client.stream_generate_content(**kwargs))
+
+
 llm = ChatGoogleGenerativeAI(model="gemini-2.5-flash", google_api_key=settings.GEMINI_API_KEY)
+llm.client = _GatewayGenerativeServiceClient(llm.client)
+# Only created when the model is built inside a running event loop
+if llm.async_client is not None:
+    llm.async_client = _GatewayGenerativeServiceAsyncClient(llm.async_client)
 
 # --- 2. Define the Tools ---
 
@@ -19,7 +75,10 @@ def analyze_text_for_fraud(text_to_analyze: str | dict) -> str:
     """
     if isinstance(text_to_analyze, dict):
         text_to_analyze = text_to_analyze.get("text_to_analyze", "")
-    result = fraud_detection_service.analyze_text_for_fraud(text_to_analyze) #type: ignore
+    try:
+        result = fraud_detection_service.analyze_text_for_fraud(text_to_analyze) #type: ignore
+    except fraud_detection_service.FraudAnalysisError:
+        return json.dumps({"error": "Could not analyze the message; tell the user to be cautious with it."})
     return json.dumps(result)
 
 @tool
@@ -35,18 +94,38 @@ def extract_structured_data_from_text(text_to_analyze: str | dict) -> str:
     return json.dumps(result)
 
 @tool
-def save_expense_transaction(user_id: int, vendor_name: str, total_amount: str) -> str:
+def analyze_bill_text(text_to_analyze: str | dict) -> str:
+    """
+    Analyzes the raw text of a bill or receipt and returns its document type,
+    vendor_name, total_amount, due_date and spending category in one step. Prefer this
+    tool over extract_structured_data_from_text when the user shares a bill or receipt.
+    """
+    if isinstance(text_to_analyze, dict):
+        text_to_analyze = text_to_analyze.get("text_to_analyze", "")
+    analysis = expense_analysis_service.analyze_receipt(text_to_analyze) #type: ignore
+    if analysis is None:
+        return json.dumps({"error": "Could not analyze the bill's text."})
+    return analysis.model_dump_json()
+
+@tool
+def save_expense_transaction(user_id: int, vendor_name: str, total_amount: str, category: str | None = None) -> str:
     """
     Saves an expense to the user's transaction history. Use this tool after you have
     extracted the vendor_name and total_amount from a user's bill or receipt.
-    You must provide the user_id, vendor_name, and total_amount.
+    You must provide the user_id, vendor_name, and total_amount. Pass the category
+    too if analyze_bill_text returned one, so it does not have to be worked out again.
     """
     db = session.SessionLocal()
     try:
         extracted_data = {"vendor_name": vendor_name, "total_amount": total_amount}
-        transaction_to_create = expense_analysis_service.categorize_expense_and_create_transaction(
-            extracted_data=extracted_data
-        )
+        if category:
+            transaction_to_create = expense_analysis_service.build_receipt_transaction(
+                ReceiptAnalysis(document_type="Receipt", vendor_name=vendor_name, total_amount=total_amount, category=category)  # type: ignore
+            )
+        else:
+            transaction_to_create = expense_analysis_service.categorize_expense_and_create_transaction(
+                extracted_data=extracted_data, owner_id=user_id
+            )
         if transaction_to_create:
             crud.create_user_transaction(db=db, transaction=transaction_to_create, owner_id=user_id)
             return "Successfully saved the transaction to the user's history."
@@ -56,7 +135,7 @@ def save_expense_transaction(user_id: int, vendor_name: str, total_amount: str)
         db.close()
 
 # --- 3. Create the list of tools for the agent ---
-tools = [analyze_text_for_fraud, extract_structured_data_from_text, save_expense_transaction]
+tools = [analyze_text_for_fraud, extract_structured_data_from_text, analyze_bill_text, save_expense_transaction]
 
 # --- 4. Create the Agent Prompt Template ---
 # (Prompt template remains the same)
@@ -80,6 +159,9 @@ Final Answer: the final answer to the original input question. This should be a
 
 Begin!
 
+Conversation so far (use it to understand follow-up questions):
+{chat_history}
+
 Question: {input}
 {agent_scratchpad}
 """
@@ -96,11 +178,63 @@ agent_executor = AgentExecutor(
 )
 
 # --- 6. Define the function to run the agent ---
-def run_agent_conversation(user_input: str, user_id: int) -> str:
+def run_agent_conversation(user_input: str, user_id: int, chat_history: str = "") -> str:
     """
     Runs the conversational agent with the user's input and user_id.
+    `chat_history` is the bounded conversation context built by
+    conversation_memory_service.build_conversation_context.
     """
     # We pass the user_id into the agent's context so tools can use it.
-    response = agent_executor.invoke({"input": user_input, "user_id": user_id})
+    response = agent_executor.invoke({"input": user_input, "user_id": user_id, "chat_history": chat_history})
     return response.get("output", "I'm sorry, I had trouble processing that request.")
 
+
+
+_FINAL_ANSWER_MARKER = "Final Answer:"
+
+
+async def stream_agent_conversation(user_input: str, user_id: int, chat_history: str = "") -> AsyncIterator[tuple[str, dict]]:
+    """
+    Streaming version of run_agent_conversation, built on the executor's
+    async event stream. Yields (event, data) pairs as they happen:
+      - ("tool_start", {"tool", "input"}) and ("tool_end", {"tool"}) around each tool call,
+      - ("token", {"text"}) for each chunk of the final answer as the model writes it,
+      - ("final", {"response"}) with the complete answer, last.
+    The agent's Thought/Action lines are not streamed, only the text after
+    "Final Answer:".
+    """
+    output = None
+    generated = ""  # Text of the current model call
+    streamed = 0  # End of the part of `generated` already yielded
+
+    agent_input = {"input": user_input, "user_id": user_id, "chat_history": chat_history}
+    async for event in agent_executor.astream_events(agent_input, version="v2"):
+        kind = event["event"]
+        if kind == "on_chat_model_start":
+            generated, streamed = "", 0
+        elif kind == "on_chat_model_stream":
+            generated += _chunk_text(event["data"]["chunk"])
+            marker_at = generated.find(_FINAL_ANSWER_MARKER)
+            if marker_at != -1:
+                answer_start = marker_at + len(_FINAL_ANSWER_MARKER)
+                text = generated[max(answer_start, streamed):]
+                if streamed == 0:
+                    text = text.lstrip()
+                if text:
+                    streamed = len(generated)
+                    yield "token", {"text": text}
+        elif kind == "on_tool_start":
+            yield "tool_start", {"tool": event["name"], "input": event["data"].get("input")}
+        elif kind == "on_tool_end":
+            yield "tool_end", {"tool": event["name"]}
+        elif kind == "on_chain_end" and event["name"] == "AgentExecutor":
+            output = (event["data"].get("output") or {}).get("output")
+
+    yield "final", {"response": output or "I'm sorry, I had trouble processing that request."}
+
+
+def _chunk_text(chunk) -> str:
+    content = getattr(chunk, "content", "")
+    if isinstance(content, list):
+        return "".join(part.get("text", "") if isinstance(part, dict) else str(part) for part in content)
+    return content or ""
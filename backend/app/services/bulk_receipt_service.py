@@ -0,0 +1,257 @@
+import asyncio
+import io
+import logging
+import mimetypes
+import posixpath
+import time
+import zipfile
+from typing import AsyncIterator
+
+from sqlalchemy.orm import Session
+
+from backend.app.core.config import settings
+from backend.app.core.executors import run_blocking_io, run_cpu_bound
+from backend.app.schemas.transactions import TransactionCreate
+from backend.app.services import expense_analysis_service, ocr_service
+from backend.app.services.document_pipeline_service import BillProcessingError
+from backend.app.services.llm_gateway_service import LLMUnavailableError
+from backend.db import crud
+
+# Receipts flow through three overlapping stages:
+#   1. OCR: every file is submitted to the CPU pool at once; the pool bounds concurrency.
+#   2. Analysis: receipts are grouped into batches as their OCR finishes, and each
+#      batch is extracted and categorized with one AI call while OCR continues.
+#   3. Insert: all transactions are saved with one bulk INSERT and a single commit.
+
+_ZIP_CONTENT_TYPES = ("application/zip", "application/x-zip-compressed")
+
+_AI_UNAVAILABLE_ERROR = "The AI service is temporarily unavailable. Please try this receipt again later."
+
+
+def is_zip_upload(filename: str | None, content_type: str | None) -> bool:
+    """Returns True if an upload looks like a zip archive."""
+    return content_type in _ZIP_CONTENT_TYPES or (filename or "").lower().endswith(".zip")
+
+
+def unpack_uploads(uploads: list[tuple[str, str | None, bytes]]) -> list[dict]:
+    """
+    Expands the zip archives among the uploaded files into the receipts they contain.
+
+    Archive members are decompressed only up to the size limits, whatever
+    size the archive declares for them, so a zip bomb cannot exhaust memory.
+
+    Args:
+        uploads: (filename, content_type, file_bytes) for every uploaded file.
+
+    Returns:
+        A list of receipts with "filename", "content_type", "file_bytes" and an
+        "error" that is set when the file cannot be processed at all.
+
+    Raises:
+        BillProcessingError: If there are more than BULK_RECEIPT_MAX_FILES receipts,
+            or they hold more than BULK_RECEIPT_MAX_TOTAL_BYTES once decompressed.
+    """
+    receipts = []
+    total_bytes = 0
+
+    def add(filename: str, content_type: str | None, file_bytes: bytes, error: str | None = None) -> None:
+        nonlocal total_bytes
+        if len(receipts) >= settings.BULK_RECEIPT_MAX_FILES:
+            raise BillProcessingError(f"Too many receipts; at most {settings.BULK_RECEIPT_MAX_FILES} can be uploaded at once.")
+        total_bytes += len(file_bytes)
+        if total_bytes > settings.BULK_RECEIPT_MAX_TOTAL_BYTES:
+            raise BillProcessingError(
+                f"The receipts are too large; at most {settings.BULK_RECEIPT_MAX_TOTAL_BYTES // (1024 * 1024)} MB "
+                "can be processed at once."
+            )
+        receipts.append({"filename": filename, "content_type": content_type, "file_bytes": file_bytes, "error": error})
+
+    for filename, content_type, file_bytes in uploads:
+        if not is_zip_upload(filename, content_type):
+            if len(file_bytes) > settings.BULK_RECEIPT_MAX_FILE_BYTES:
+                add(filename, content_type, b"", "File is too large.")
+            else:
+                add(filename, content_type, file_bytes)
+            continue
+
+        try:
+            archive = zipfile.ZipFile(io.BytesIO(file_bytes))
+        except zipfile.BadZipFile:
+            add(filename, content_type, b"", "Not a valid zip archive.")
+            continue
+
+        for member in archive.infolist():
+            basename = posixpath.basename(member.filename)
+            # Skip folders and the metadata macOS adds to archives
+            if member.is_dir() or member.filename.startswith("__MACOSX/") or basename.startswith("."):
+                continue
+            member_name = f"{filename}/{member.filename}"
+            member_type = mimetypes.guess_type(basename)[0]
+            if member.file_size > settings.BULK_RECEIPT_MAX_FILE_BYTES:
+                add(member_name, member_type, b"", "File is too large.")
+                continue
+            # The declared size can lie, so never decompress more than either limit allows
+            read_limit = min(settings.BULK_RECEIPT_MAX_FILE_BYTES, settings.BULK_RECEIPT_MAX_TOTAL_BYTES - total_bytes)
+            try:
+                with archive.open(member) as member_file:
+                    member_bytes = member_file.read(read_limit + 1)
+            except (zipfile.BadZipFile, RuntimeError, NotImplementedError) as e:
+                logging.error(f"Error reading {member_name} from zip archive: {e}")
+                add(member_name, member_type, b"", "Could not read the file from the zip archive.")
+                continue
+            if len(member_bytes) > settings.BULK_RECEIPT_MAX_FILE_BYTES:
+                add(member_name, member_type, b"", "File is too large.")
+            else:
+                # Raises if it takes the receipts over the total limit
+                add(member_name, member_type, member_bytes)
+    return receipts
+
+
+async def _analyze_receipt_individually(extraction: dict, owner_id: int) -> TransactionCreate | None:
+    # Same call as /expense/process-bill, for receipts a batch call could not handle
+    analysis = await expense_analysis_service.analyze_receipt_async(
+        extraction["text"], content_hash=extraction["content_hash"], owner_id=owner_id,
+    )
+    return expense_analysis_service.build_receipt_transaction(analysis) if analysis is not None else None
+
+
+async def _batches(queue: asyncio.Queue, size: int, wait_seconds: float) -> AsyncIterator[list]:
+    """
+    Groups items from the queue into batches of up to `size`. A partial batch
+    is released after `wait_seconds`. A None item marks the end of the queue.
+    """
+    loop = asyncio.get_running_loop()
+    finished = False
+    while not finished:
+        item = await queue.get()
+        if item is None:
+            return
+        batch = [item]
+        deadline = loop.time() + wait_seconds
+        while len(batch) < size:
+            if queue.empty():
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+            else:
+                item = queue.get_nowait()
+            if item is None:
+                finished = True
+                break
+            batch.append(item)
+        yield batch
+
+
+async def run_bulk_bill_processing(db: Session, uploads: list[tuple[str, str | None, bytes]], owner_id: int) -> dict:
+    """
+    Turns many receipts (individual files and/or zip archives) into
+    transactions, with OCR, AI analysis and the database insert overlapped.
+
+    Returns:
+        A dictionary matching the BulkReceiptResponse schema.
+
+    Raises:
+        BillProcessingError: If too many receipts were uploaded.
+    """
+    start = time.perf_counter()
+    receipts = await run_cpu_bound(unpack_uploads, uploads)
+    results = [
+        {"filename": receipt["filename"], "status": "failed", "transaction": None, "error": receipt["error"]}
+        for receipt in receipts
+    ]
+    transactions: dict[int, TransactionCreate] = {}
+    read_receipts: asyncio.Queue = asyncio.Queue()
+
+    # Stage 1: OCR
+    async def read_receipt(index: int) -> None:
+        receipt = receipts[index]
+        try:
+            extraction = await run_cpu_bound(
+                ocr_service.extract_text_from_document,
+                receipt["file_bytes"], is_pdf=ocr_service.is_pdf_upload(receipt["filename"], receipt["content_type"]),
+            )
+        except Exception as e:
+            logging.error(f"Error reading text from {receipt['filename']}: {e}")
+            extraction = {"text": "Error: OCR failed."}
+        if "Error:" in extraction["text"]:
+            results[index]["error"] = "Could not read text from the uploaded file."
+            return
+        await read_receipts.put((index, extraction))
+
+    async def ocr_stage() -> None:
+        await asyncio.gather(*(read_receipt(i) for i, receipt in enumerate(receipts) if receipt["error"] is None))
+        await read_receipts.put(None)
+
+    # Stage 2: batched extraction and categorization
+    async def analyze_batch(batch: list[tuple[int, dict]]) -> None:
+        try:
+            analyses = await expense_analysis_service.categorize_receipts_batch_async(
+                [extraction["text"] for _, extraction in batch], owner_id=owner_id
+            )
+        except LLMUnavailableError:
+            for index, _ in batch:
+                results[index]["error"] = _AI_UNAVAILABLE_ERROR
+            return
+        except Exception as e:
+            logging.error(f"Error analyzing a batch of {len(batch)} receipts, retrying them one by one: {e}")
+            analyses = [None] * len(batch)
+        retried = [(index, extraction) for (index, extraction), analysis in zip(batch, analyses) if analysis is None]
+        retried_analyses = await asyncio.gather(
+            *(_analyze_receipt_individually(extraction, owner_id) for _, extraction in retried), return_exceptions=True
+        )
+        analyses_by_index = {index: analysis for (index, _), analysis in zip(batch, analyses) if analysis is not None}
+        analyses_by_index.update((index, analysis) for (index, _), analysis in zip(retried, retried_analyses))
+
+        for index, analysis in analyses_by_index.items():
+            if isinstance(analysis, LLMUnavailableError):
+                results[index]["error"] = _AI_UNAVAILABLE_ERROR
+            elif isinstance(analysis, BaseException):
+                logging.error(f"Error analyzing {receipts[index]['filename']}: {analysis}")
+                results[index]["error"] = "Could not analyze the expense from the document."
+            elif analysis is None:
+                results[index]["error"] = (
+                    "Could not analyze the expense from the document, likely missing a vendor name or total amount."
+                )
+            else:
+                transactions[index] = analysis
+
+    async def analysis_stage() -> None:
+        batch_tasks = []
+        async for batch in _batches(
+            read_receipts, settings.BULK_RECEIPT_LLM_BATCH_SIZE, settings.BULK_RECEIPT_BATCH_WAIT_SECONDS
+        ):
+            batch_tasks.append(asyncio.create_task(analyze_batch(batch)))
+        await asyncio.gather(*batch_tasks)
+
+    await asyncio.gather(ocr_stage(), analysis_stage())
+
+    # Stage 3: one bulk insert
+    indexes = sorted(transactions)
+    try:
+        created_transactions = await run_blocking_io(
+            crud.create_user_transactions_bulk,
+            db=db, transactions=[transactions[i] for i in indexes], owner_id=owner_id,
+        )
+    except Exception as e:
+        db.rollback()
+        logging.error(f"Error saving bulk receipt transactions: {e}")
+        for index in indexes:
+            results[index]["error"] = "Could not save the transaction."
+    else:
+        for index, created_transaction in zip(indexes, created_transactions):
+            results[index].update(status="created", transaction=created_transaction)
+
+    elapsed = time.perf_counter() - start
+    created_count = len([result for result in results if result["status"] == "created"])
+    return {
+        "results": results,
+        "total": len(results),
+        "created": created_count,
+        "failed": len(results) - created_count,
+        "elapsed_seconds": round(elapsed, 3),
+        "receipts_per_second": round(len(results) / elapsed, 2) if elapsed > 0 else 0.0,
+    }
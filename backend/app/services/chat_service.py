@@ -4,6 +4,9 @@ from xml.parsers.expat import model
 from google import genai
 from backend.app.core.config import settings
 import logging
+from typing import AsyncIterator
+
+from backend.app.services.llm_gateway_service import LLMUnavailableError, gemini_gateway
 
 # Configure the Gemini API with the key from settings
 try:
@@ -14,20 +17,77 @@ except Exception as e:
 def generate_gemini_response(user_message: str) -> str:
     """
     Generates a response from the Gemini API based on the user's message.
+    The call goes through the Gemini gateway (rate limits, retries, circuit breaker).
+
+    Args:
+        user_message: The message from the user.
+
+    Returns:
+        The text response from the Gemini model.
+
+    Raises:
+        LLMUnavailableError: If Gemini could not be reached.
+    """
+    try:
+        response = gemini_gateway.call_sync(
+            lambda: client.models.generate_content(model="gemini-2.5-flash", contents=user_message)
+        )
+    except LLMUnavailableError:
+        raise
+    except Exception as e:
+        logging.error(f"An error occurred while generating Gemini response: {e}")
+        raise LLMUnavailableError("The Gemini request failed.") from e
+    return response.text or "No response received from the Gemini model."
+
+
+async def generate_gemini_response_async(user_message: str) -> str:
+    """
+    Async counterpart of generate_gemini_response, built on the SDK's async
+    client. Awaiting it holds no thread while the model responds.
 
     Args:
         user_message: The message from the user.
 
     Returns:
         The text response from the Gemini model.
+
+    Raises:
+        LLMUnavailableError: If Gemini could not be reached.
     """
     try:
-        # For text-only input, use the gemini-pro model
-        # Generate the content
-        response = client.models.generate_content(
-            model="gemini-2.5-flash", contents=user_message
+        response = await gemini_gateway.call(
+            lambda: client.aio.models.generate_content(model="gemini-2.5-flash", contents=user_message)
         )
-        return response.text or "No response received from the Gemini model."
+    except LLMUnavailableError:
+        raise
     except Exception as e:
         logging.error(f"An error occurred while generating Gemini response: {e}")
-        return "Sorry, I'm having trouble connecting to the AI service right now."
+        raise LLMUnavailableError("The Gemini request failed.") from e
+    return response.text or "No response received from the Gemini model."
+
+
+async def stream_gemini_response_async(user_message: str) -> AsyncIterator[str]:
+    """
+    Streaming counterpart of generate_gemini_response_async. Yields the text
+    of the response chunk by chunk as the model writes it.
+
+    Args:
+        user_message: The message from the user.
+
+    Yields:
+        Successive pieces of the text response from the Gemini model.
+
+    Raises:
+        LLMUnavailableError: If Gemini could not be reached or the stream broke off.
+    """
+    try:
+        async for chunk in gemini_gateway.stream(
+            lambda: client.aio.models.generate_content_stream(model="gemini-2.5-flash", contents=user_message)
+        ):
+            if chunk.text:
+                yield chunk.text
+    except LLMUnavailableError:
+        raise
+    except Exception as e:
+        logging.error(f"An error occurred while streaming Gemini response: {e}")
+        raise LLMUnavailableError("The Gemini request failed.") from e
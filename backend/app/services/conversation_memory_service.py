@@ -0,0 +1,180 @@
+import logging
+import threading
+
+from sqlalchemy.orm import Session
+
+from backend.app.core.config import settings
+from backend.app.services.chat_service import generate_gemini_response
+from backend.app.services.llm_gateway_service import LLMUnavailableError
+from backend.app.services.prompt_compaction_service import estimate_tokens
+from backend.db import crud, session
+from backend.models.chat_message import ChatMessage
+
+# The agent sees a bounded view of the conversation:
+#   - a window of the most recent messages, within a fixed token budget, and
+#   - a stored running summary of the messages that fell out of the window.
+# After each turn the newly evicted messages are folded into the summary with
+# one small model call (old summary + those messages in, new summary out), so
+# the summary is never rebuilt from the full history. Reads are two indexed
+# queries with fixed limits, whatever the length of the history.
+
+_EMPTY_CONTEXT = "(This is the start of the conversation.)"
+
+
+def build_conversation_context(db: Session, user_id: int) -> str:
+    """
+    Builds the conversation context passed to the agent as {chat_history}.
+    Call it before saving the user's new message, which the agent gets
+    separately as its input.
+
+    Args:
+        db: The database session.
+        user_id: The ID of the user talking to the agent.
+
+    Returns:
+        The running summary followed by the recent messages, within
+        CONVERSATION_CONTEXT_TOKEN_BUDGET tokens.
+    """
+    summary = crud.get_conversation_summary(db, user_id)
+    summarized_through_id: int = summary.summarized_through_id if summary is not None else 0  # type: ignore
+    recent = crud.get_recent_chat_messages(
+        db, user_id, after_id=summarized_through_id, limit=settings.CONVERSATION_WINDOW_MAX_MESSAGES
+    )
+    window = _select_window(recent)
+
+    parts = []
+    if summary is not None:
+        parts.append(f"Summary of the earlier conversation: {summary.summary}")
+    if window:
+        parts.append("Most recent messages:\n" + "\n".join(_format_message(message) for message in reversed(window)))
+    context = "\n".join(parts) or _EMPTY_CONTEXT
+    memory_stats.record_context(estimate_tokens(context))
+    return context
+
+
+def update_running_summary(user_id: int) -> None:
+    """
+    Folds the messages that have fallen out of the recent-message window into
+    the user's running summary. Runs after a chat turn, off the request path,
+    in its own database session.
+
+    Messages are folded once at least CONVERSATION_SUMMARY_MIN_FOLD_MESSAGES
+    are waiting, and at most CONVERSATION_SUMMARY_MAX_FOLD_MESSAGES at a time,
+    so one call stays small even for a long history that was never
+    summarized; the oldest of those are left out.
+    """
+    db = session.SessionLocal()
+    try:
+        summary = crud.get_conversation_summary(db, user_id)
+        summarized_through_id: int = summary.summarized_through_id if summary is not None else 0  # type: ignore
+        recent = crud.get_recent_chat_messages(
+            db, user_id, after_id=summarized_through_id,
+            limit=settings.CONVERSATION_WINDOW_MAX_MESSAGES + settings.CONVERSATION_SUMMARY_MAX_FOLD_MESSAGES,
+        )
+        evicted = recent[len(_select_window(recent)):]
+        if len(evicted) < settings.CONVERSATION_SUMMARY_MIN_FOLD_MESSAGES:
+            return
+        evicted.reverse()
+
+        prompt = _build_summary_prompt(summary.summary if summary is not None else None, evicted)  # type: ignore
+        new_summary = _truncate(generate_gemini_response(prompt).strip(), settings.CONVERSATION_SUMMARY_MAX_TOKENS)
+        crud.upsert_conversation_summary(db, user_id, new_summary, summarized_through_id=evicted[-1].id)  # type: ignore
+        memory_stats.record_fold(len(evicted))
+    except LLMUnavailableError as e:
+        # The messages stay pending and are folded after a later turn
+        logging.error(f"Could not update the conversation summary for user {user_id}: {e}")
+        memory_stats.record_failure()
+    finally:
+        db.close()
+
+
+def _select_window(messages: list[ChatMessage]) -> list[ChatMessage]:
+    # `messages` is newest first; keeps the longest prefix that fits the budget
+    # left over by the summary
+    budget = settings.CONVERSATION_CONTEXT_TOKEN_BUDGET - settings.CONVERSATION_SUMMARY_MAX_TOKENS
+    window = []
+    used = 0
+    for message in messages[:settings.CONVERSATION_WINDOW_MAX_MESSAGES]:
+        cost = estimate_tokens(_format_message(message) + "\n")
+        if used + cost > budget:
+            break
+        window.append(message)
+        used += cost
+    return window
+
+
+def _format_message(message: ChatMessage) -> str:
+    speaker = "User" if message.is_from_user else "Helios"  # type: ignore
+    return f"{speaker}: {_truncate(message.message, settings.CONVERSATION_MESSAGE_MAX_TOKENS)}"  # type: ignore
+
+
+def _truncate(text: str, max_tokens: int) -> str:
+    # estimate_tokens counts about 4 characters per token
+    max_chars = max_tokens * 4
+    return text if len(text) <= max_chars else text[:max_chars - 3].rstrip() + "..."
+
+
+def _build_summary_prompt(summary: str | None, messages: list[ChatMessage]) -> str:
+    turns = "\n".join(_format_message(message) for message in messages)
+    max_words = settings.CONVERSATION_SUMMARY_MAX_TOKENS * 3 // 4
+    prompt = f"""
+    You keep a running summary of a conversation between a user and Helios, an AI financial companion for users in India.
+
+    Current summary:
+    ---
+    {summary or "(empty)"}
+    ---
+
+    Newer messages to add to it:
+    ---
+    {turns}
+    ---
+
+    Rewrite the summary so that it also covers the newer messages. Keep what matters for later turns:
+    the user's goals, preferences and language, amounts, vendors, dates and decisions, and anything
+    Helios checked, saved or promised. Leave out small talk.
+    Use at most {max_words} words. Respond with the summary text only.
+    """
+    return prompt
+
+
+class MemoryStats:
+    """Thread-safe counters for the size of agent contexts and summary updates."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._contexts = 0
+        self._context_tokens = 0
+        self._max_context_tokens = 0
+        self._folds = 0
+        self._folded_messages = 0
+        self._failures = 0
+
+    def record_context(self, tokens: int) -> None:
+        with self._lock:
+            self._contexts += 1
+            self._context_tokens += tokens
+            self._max_context_tokens = max(self._max_context_tokens, tokens)
+
+    def record_fold(self, messages: int) -> None:
+        with self._lock:
+            self._folds += 1
+            self._folded_messages += messages
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "contexts": self._contexts,
+                "avg_context_tokens": round(self._context_tokens / self._contexts, 1) if self._contexts else None,
+                "max_context_tokens": self._max_context_tokens,
+                "summary_updates": self._folds,
+                "messages_folded": self._folded_messages,
+                "summary_failures": self._failures,
+            }
+
+
+memory_stats = MemoryStats()
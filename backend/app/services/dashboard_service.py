@@ -0,0 +1,81 @@
+from datetime import date, datetime, timedelta
+from typing import Literal
+
+from sqlalchemy.orm import Session
+
+from backend.db import crud
+
+Period = Literal["week", "month", "quarter", "custom"]
+
+
+class InvalidPeriodError(ValueError):
+    """Raised when a custom dashboard period is missing or inverted."""
+
+
+def resolve_period(period: Period, start_date: date | None = None, end_date: date | None = None, today: date | None = None) -> tuple[date, date]:
+    """
+    Turns a dashboard period into a half-open [start, end) date range.
+
+    Args:
+        period: 'week' (Monday to Sunday), 'month' or 'quarter' containing
+            `today`, or 'custom'.
+        start_date: First day of a custom period.
+        end_date: Last day of a custom period (inclusive).
+        today: The reference day; defaults to today in UTC.
+
+    Returns:
+        The first day of the period and the day after its last day.
+
+    Raises:
+        InvalidPeriodError: If a custom period is missing a bound or ends before it starts.
+    """
+    today = today or datetime.utcnow().date()
+    if period == "week":
+        start = today - timedelta(days=today.weekday())
+        return start, start + timedelta(days=7)
+    if period == "month":
+        start = today.replace(day=1)
+        return start, _add_months(start, 1)
+    if period == "quarter":
+        start = date(today.year, (today.month - 1) // 3 * 3 + 1, 1)
+        return start, _add_months(start, 3)
+    if start_date is None or end_date is None:
+        raise InvalidPeriodError("A custom period needs both start_date and end_date.")
+    if end_date < start_date:
+        raise InvalidPeriodError("end_date must not be before start_date.")
+    return start_date, end_date + timedelta(days=1)
+
+
+def get_spending_summary(
+    db: Session, user_id: int, period: Period = "month",
+    start_date: date | None = None, end_date: date | None = None,
+) -> dict:
+    """
+    Summarizes a user's spending over a dashboard period. Periods made of
+    whole calendar months (month, quarter, or such a custom range) are read
+    from the monthly spending rollup; others (week, custom) are a range query
+    on the transactions table.
+
+    Returns:
+        A dictionary matching the DashboardSummary schema.
+
+    Raises:
+        InvalidPeriodError: See resolve_period.
+    """
+    start, end = resolve_period(period, start_date, end_date)
+    if start.day == 1 and end.day == 1:
+        summary = crud.get_spending_rollup(db, user_id, start, end)
+    else:
+        summary = crud.get_spending_summary(
+            db, user_id, datetime.combine(start, datetime.min.time()), datetime.combine(end, datetime.min.time())
+        )
+        # Same label as the rollup for transactions without a category
+        summary["spending_by_category"] = {
+            category or "Uncategorized": total for category, total in summary["spending_by_category"].items()
+        }
+    return {**summary, "period": period, "start_date": start, "end_date": end - timedelta(days=1)}
+
+
+def _add_months(day: date, months: int) -> date:
+    month_index = day.month - 1 + months
+    return date(day.year + month_index // 12, month_index % 12 + 1, 1)
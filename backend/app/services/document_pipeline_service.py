@@ -0,0 +1,164 @@
+from contextlib import aclosing
+from typing import AsyncIterator
+
+from sqlalchemy.orm import Session
+
+from backend.app.core.executors import iterate_cpu_bound, run_blocking_io, run_cpu_bound
+from backend.app.schemas.document import DocumentCreate
+from backend.app.services import ocr_service, expense_analysis_service
+from backend.app.services.extraction_cache_service import content_hash
+from backend.db import crud, session
+from backend.models.transaction import Transaction
+
+# All functions here are coroutines: OCR is dispatched to the CPU pool, database
+# calls to the blocking-I/O pool and Gemini calls are awaited on the SDK's async
+# client, so the event loop stays free.
+
+
+class BillProcessingError(ValueError):
+    """Raised when a bill cannot be turned into a transaction."""
+
+
+async def run_ocr_upload(db: Session, file_bytes: bytes, filename: str, content_type: str | None, owner_id: int) -> dict:
+    """
+    Extracts the text of an uploaded file and stores it as a user document.
+
+    Returns:
+        A dictionary matching the OCRResponse schema.
+    """
+    # 1. Extract the text; digital PDFs are read from their text layer
+    extraction = await run_cpu_bound(
+        ocr_service.extract_text_from_document,
+        file_bytes, is_pdf=ocr_service.is_pdf_upload(filename, content_type),
+    )
+
+    # 2. Save the document to the database
+    doc_in = DocumentCreate(filename=filename, extracted_text=extraction["text"])
+    created_document = await run_blocking_io(crud.create_user_document, db=db, doc=doc_in, owner_id=owner_id)
+
+    return {
+        "filename": created_document.filename,
+        "extracted_text": created_document.extracted_text,
+        "pages": extraction["pages"],
+    }
+
+
+async def run_document_analysis(file_bytes: bytes, filename: str, content_type: str | None) -> dict:
+    """
+    Performs OCR on an uploaded file and uses the AI model to extract
+    structured data from the text.
+
+    Returns:
+        A dictionary matching the DocumentAnalysisResponse schema.
+    """
+    # 1. Extract the raw text; digital PDFs are read from their text layer
+    extraction = await run_cpu_bound(
+        ocr_service.extract_text_from_document,
+        file_bytes, is_pdf=ocr_service.is_pdf_upload(filename, content_type),
+    )
+
+    # 2. Use the AI service to analyze the raw text and get structured data
+    structured_data = await ocr_service.extract_structured_data_from_text_async(
+        extraction["text"], content_hash=extraction["content_hash"],
+    )
+
+    return {**structured_data, "pages": extraction["pages"]}
+
+
+async def run_bill_processing(db: Session, file_bytes: bytes, filename: str, content_type: str | None, owner_id: int) -> Transaction:
+    """
+    Runs the full bill flow: OCR, a single AI call for extraction and
+    categorization, and saving the resulting transaction.
+
+    Raises:
+        BillProcessingError: If the bill cannot be read or analyzed.
+    """
+    # Step 1: OCR
+    extraction = await run_cpu_bound(
+        ocr_service.extract_text_from_document,
+        file_bytes, is_pdf=ocr_service.is_pdf_upload(filename, content_type),
+    )
+    raw_text = extraction["text"]
+    if "Error:" in raw_text:
+        raise BillProcessingError("Could not read text from the uploaded image.")
+
+    # Step 2: Extract Fields, Categorize Expense and Prepare Transaction
+    analysis = await expense_analysis_service.analyze_receipt_async(
+        raw_text, content_hash=extraction["content_hash"], owner_id=owner_id,
+    )
+    transaction_to_create = expense_analysis_service.build_receipt_transaction(analysis) if analysis else None
+    if not transaction_to_create:
+        raise BillProcessingError(
+            "Could not analyze the expense from the document, likely missing a vendor name or total amount."
+        )
+
+    # Step 3: Save the Transaction to the Database
+    return await run_blocking_io(
+        crud.create_user_transaction, db=db, transaction=transaction_to_create, owner_id=owner_id
+    )
+
+
+# --- Streaming variants ---
+# These yield (event, data) pairs as results become ready, so the first page
+# reaches the client before the rest of the document has been read.
+
+async def _iter_document_pages(file_bytes: bytes, is_pdf: bool, key: str) -> AsyncIterator[dict]:
+    cached_pages = await run_blocking_io(ocr_service.get_cached_document_pages, key)
+    if cached_pages is not None:
+        for page in cached_pages:
+            yield page
+        return
+
+    pages = []
+    # Closed as soon as our own consumer stops, so OCR of the remaining pages stops too
+    async with aclosing(iterate_cpu_bound(ocr_service.iter_document_pages, file_bytes, is_pdf)) as page_iterator:
+        async for page in page_iterator:
+            pages.append(page)
+            yield page
+    await run_blocking_io(ocr_service.cache_document_pages, key, pages)
+
+
+async def stream_ocr_upload(file_bytes: bytes, filename: str, content_type: str | None, owner_id: int) -> AsyncIterator[tuple[str, dict]]:
+    """
+    Streaming version of run_ocr_upload. Yields a ("page", {"page_number",
+    "method", "text"}) event per page, then ("document", OCRResponse dict)
+    once the document is saved.
+    """
+    key = await run_cpu_bound(content_hash, file_bytes)
+    pages = []
+    async with aclosing(_iter_document_pages(file_bytes, ocr_service.is_pdf_upload(filename, content_type), key)) as page_iterator:
+        async for page in page_iterator:
+            pages.append(page)
+            yield "page", page
+
+    summary = ocr_service.summarize_pages(pages)
+    doc_in = DocumentCreate(filename=filename, extracted_text=summary["text"])
+    # The request's session may already be closed while the response streams
+    db = session.SessionLocal()
+    try:
+        created_document = await run_blocking_io(crud.create_user_document, db=db, doc=doc_in, owner_id=owner_id)
+        yield "document", {
+            "filename": created_document.filename,
+            "extracted_text": created_document.extracted_text,
+            "pages": summary["pages"],
+        }
+    finally:
+        db.close()
+
+
+async def stream_document_analysis(file_bytes: bytes, filename: str, content_type: str | None) -> AsyncIterator[tuple[str, dict]]:
+    """
+    Streaming version of run_document_analysis. Yields a ("page", ...) event
+    per page, then ("analysis", DocumentAnalysisResponse dict).
+    """
+    key = await run_cpu_bound(content_hash, file_bytes)
+    pages = []
+    async with aclosing(_iter_document_pages(file_bytes, ocr_service.is_pdf_upload(filename, content_type), key)) as page_iterator:
+        async for page in page_iterator:
+            pages.append(page)
+            yield "page", page
+
+    summary = ocr_service.summarize_pages(pages)
+    structured_data = await ocr_service.extract_structured_data_from_text_async(summary["text"], content_hash=key)
+    yield "analysis", {**structured_data, "pages": summary["pages"]}
+
@@ -1,18 +1,28 @@
 import json
 import logging
-from decimal import Decimal
-from backend.app.services.chat_service import generate_gemini_response
+from decimal import Decimal, InvalidOperation
+from backend.app.core.executors import run_blocking_io
+from backend.app.services import extraction_cache_service
+from backend.app.services.chat_service import generate_gemini_response, generate_gemini_response_async
+from backend.app.services.llm_batching_service import LLMBatchCoalescer, parse_indexed_json_array
+from backend.app.services.prompt_compaction_service import compact_ocr_text
+from backend.app.services.vendor_category_service import vendor_category_memo
+from backend.app.schemas.receipt import ReceiptAnalysis
 from backend.app.schemas.transactions import TransactionCreate
 
 def categorize_expense_and_create_transaction(
     extracted_data: dict,
+    owner_id: int | None = None,
 ) -> TransactionCreate | None:
     """
     Analyzes extracted bill data, assigns a spending category using an AI model,
-    and prepares a transaction object for database insertion.
+    and prepares a transaction object for database insertion. Vendors already in
+    the vendor category memo are categorized without calling the model.
 
     Args:
         extracted_data: A dictionary containing data like 'vendor_name' and 'total_amount'.
+        owner_id: The user the expense belongs to; their own category
+            corrections take precedence over the shared memo.
 
     Returns:
         A TransactionCreate schema object ready to be saved, or None if data is invalid.
@@ -24,6 +34,51 @@ def categorize_expense_and_create_transaction(
         logging.warning("Missing vendor name or total amount for expense analysis.")
         return None
 
+    category = vendor_category_memo.lookup(vendor, owner_id=owner_id)
+    if category is not None:
+        return _build_transaction_or_none(vendor, amount_value, category)
+
+    category = _parse_category_response(generate_gemini_response(_build_category_prompt(vendor)))
+    if category is None:
+        return None
+    vendor_category_memo.remember(vendor, category)
+    return _build_transaction_or_none(vendor, amount_value, category)
+
+
+async def categorize_vendors_async(vendors: list[str]) -> list[str | None]:
+    """
+    Categorizes many vendors at once, e.g. the payees of an imported bank
+    statement. They go through the categorization batcher, so each AI call
+    covers several vendors, and count as one request against the user's AI
+    budget. The vendor category memo is not consulted.
+
+    Returns:
+        One category per vendor, in order, or None where the AI call failed
+        (including when the AI service is unavailable).
+
+    Raises:
+        LLMRateLimitedError: If the user has used up their AI budget.
+    """
+    results = await _categorization_batcher.submit_many(vendors)
+    failures = [result for result in results if isinstance(result, BaseException)]
+    if failures:
+        logging.error(f"Could not categorize {len(failures)} of {len(vendors)} vendors: {failures[0]}")
+    return [result if isinstance(result, str) else None for result in results]
+
+
+async def _categorize_vendor_async(vendor: str) -> str | None:
+    return _parse_category_response(await generate_gemini_response_async(_build_category_prompt(vendor)))
+
+
+def _build_transaction_or_none(vendor: str, amount_value, category: str) -> TransactionCreate | None:
+    try:
+        return _build_transaction(vendor, amount_value, category)
+    except (ValueError, InvalidOperation) as e:
+        logging.error(f"Error processing expense amount: {e}")
+        return None
+
+
+def _build_category_prompt(vendor: str) -> str:
     # This prompt asks the AI to act as a financial analyst and categorize the expense.
     prompt = f"""
     You are a financial analyst for DigiSaathi, an app for users in India.
@@ -41,27 +96,240 @@ def categorize_expense_and_create_transaction(
 
     Do not add any other text or explanations outside of the JSON object.
     """
+    return prompt
+
 
+def _parse_category_response(ai_response_str: str) -> str | None:
     try:
-        # Get and parse the AI's category suggestion
-        ai_response_str = generate_gemini_response(prompt)
+        # Parse the AI's category suggestion
         if ai_response_str.strip().startswith("```json"):
             ai_response_str = ai_response_str.strip()[7:-3]
-        
+
         category_result = json.loads(ai_response_str)
-        category = category_result.get("category", "Other")
-        amount_str = str(amount_value)
-        cleaned_amount = amount_str.replace(",", "")
-
-        transaction_data = TransactionCreate(
-            description=f"Payment to {vendor}",
-            amount=Decimal(cleaned_amount),
-            category=category,
-            vendor_name=vendor
-        )
-        return transaction_data
+        return category_result.get("category", "Other")
 
-    except (json.JSONDecodeError, ValueError) as e:
+    except (json.JSONDecodeError, ValueError, AttributeError) as e:
         logging.error(f"Error processing expense categorization response: {e}")
         return None
 
+
+def _build_vendors_batch_prompt(vendors: list[str]) -> str:
+    vendor_list = "\n".join(f'{i}. "{vendor}"' for i, vendor in enumerate(vendors))
+    prompt = f"""
+    You are a financial analyst for DigiSaathi, an app for users in India.
+    Your task is to categorize expenses based on the vendors' names.
+    Common categories are: 'Utilities', 'Groceries', 'Shopping', 'Food & Dining',
+    'Travel', 'Health', 'Entertainment', 'Other'.
+
+    Analyze the following {len(vendors)} vendor names, numbered from 0:
+    ---
+    {vendor_list}
+    ---
+
+    Respond with a JSON array ONLY, with one object per vendor. Each object must have two keys:
+    1. "index": the vendor number.
+    2. "category": a string representing the most likely expense category.
+
+    Do not add any other text or explanations outside of the JSON array.
+    """
+    return prompt
+
+
+def _parse_vendors_batch_item(item: dict) -> str | None:
+    category = item.get("category")
+    return category if isinstance(category, str) and category else None
+
+
+def _build_transaction(vendor: str, amount_value, category: str) -> TransactionCreate:
+    amount_str = str(amount_value)
+    cleaned_amount = amount_str.replace(",", "")
+
+    return TransactionCreate(
+        description=f"Payment to {vendor}",
+        amount=Decimal(cleaned_amount),
+        category=category,
+        vendor_name=vendor
+    )
+
+
+def analyze_receipt(
+    text_to_analyze: str, content_hash: str | None = None, owner_id: int | None = None
+) -> ReceiptAnalysis | None:
+    """
+    Reads the OCR text of a bill or receipt with a single AI call that returns
+    the document type, vendor, total amount, due date and spending category
+    together, instead of one call to extract fields and another to categorize.
+    Vendors in the vendor category memo keep their memoized category.
+
+    Args:
+        text_to_analyze: The raw text extracted from the document.
+        content_hash: SHA-256 of the uploaded file the text came from. When
+            given, the result is served from / stored in the extraction cache.
+        owner_id: The user the receipt belongs to; their own category
+            corrections take precedence over the shared memo.
+
+    Returns:
+        The validated ReceiptAnalysis, or None if the AI response was unusable.
+    """
+    if content_hash is None:
+        value = _analyze_receipt_text(text_to_analyze)
+    else:
+        value = extraction_cache_service.extraction_cache.get_or_compute(
+            content_hash,
+            extraction_cache_service.RECEIPT_ANALYSIS,
+            lambda: _analyze_receipt_text(text_to_analyze),
+            is_cacheable=_receipt_analysis_is_cacheable,
+        )
+    return _apply_vendor_category_memo([value], owner_id)[0]
+
+
+async def analyze_receipt_async(
+    text_to_analyze: str, content_hash: str | None = None, owner_id: int | None = None
+) -> ReceiptAnalysis | None:
+    """
+    Async counterpart of analyze_receipt; awaits the Gemini call instead of
+    blocking a thread on it. Concurrent requests are coalesced into one
+    multi-receipt prompt.
+    """
+    if content_hash is None:
+        value = await _receipt_analysis_batcher.submit(text_to_analyze)
+    else:
+        value = await extraction_cache_service.extraction_cache.get_or_compute_async(
+            content_hash,
+            extraction_cache_service.RECEIPT_ANALYSIS,
+            lambda: _receipt_analysis_batcher.submit(text_to_analyze),
+            is_cacheable=_receipt_analysis_is_cacheable,
+        )
+    return (await run_blocking_io(_apply_vendor_category_memo, [value], owner_id))[0]
+
+
+def build_receipt_transaction(analysis: ReceiptAnalysis) -> TransactionCreate | None:
+    """
+    Prepares a transaction from a receipt analysis.
+
+    Returns:
+        A TransactionCreate schema object ready to be saved, or None if the
+        vendor name or total amount is missing.
+    """
+    if not analysis.vendor_name or not analysis.total_amount:
+        logging.warning("Missing vendor name or total amount for expense analysis.")
+        return None
+    return TransactionCreate(
+        description=f"Payment to {analysis.vendor_name}",
+        amount=analysis.total_amount,
+        category=analysis.category,
+        vendor_name=analysis.vendor_name,
+    )
+
+
+def _analyze_receipt_text(text_to_analyze: str) -> dict:
+    return _parse_receipt_analysis_response(generate_gemini_response(_build_receipt_analysis_prompt([text_to_analyze])))
+
+
+async def _analyze_receipt_text_async(text_to_analyze: str) -> dict:
+    return _parse_receipt_analysis_response(
+        await generate_gemini_response_async(_build_receipt_analysis_prompt([text_to_analyze]))
+    )
+
+
+def _receipt_analysis_is_cacheable(value: dict) -> bool:
+    return "error" not in value
+
+
+def _apply_vendor_category_memo(values: list[dict | None], owner_id: int | None = None) -> list[ReceiptAnalysis | None]:
+    # Turns parsed analyses into ReceiptAnalysis, with None for unusable ones.
+    # The prompt has to find the vendor anyway, so the model is still called;
+    # the memo only wins for vendors it already knows (e.g. corrections).
+    analyses = []
+    for value in values:
+        if value is None or "error" in value:
+            analyses.append(None)
+            continue
+        analysis = ReceiptAnalysis.model_validate(value)
+        if analysis.vendor_name:
+            category = vendor_category_memo.lookup(analysis.vendor_name, owner_id=owner_id)
+            if category is None:
+                vendor_category_memo.remember(analysis.vendor_name, analysis.category)
+            elif category != analysis.category:
+                analysis = analysis.model_copy(update={"category": category})
+        analyses.append(analysis)
+    return analyses
+
+
+def _build_receipt_analysis_prompt(receipt_texts: list[str]) -> str:
+    # Used for single receipts too, as a list of one
+    receipts = "\n".join(
+        f'Receipt {i}:\n---\n"{compact_ocr_text(text)}"\n---' for i, text in enumerate(receipt_texts)
+    )
+    prompt = f"""
+    You are a financial analyst for DigiSaathi, an app for users in India.
+    Below is a list of {len(receipt_texts)} bill or receipt texts, extracted via OCR and numbered from 0.
+    For each one, identify the type of document, find its key fields, and categorize the expense.
+    Common categories are: 'Utilities', 'Groceries', 'Shopping', 'Food & Dining',
+    'Travel', 'Health', 'Entertainment', 'Other'.
+
+    {receipts}
+
+    Respond with a JSON array ONLY, with one object per receipt. Each object must have six keys:
+    1. "index": the receipt number.
+    2. "document_type": a string representing the type of document (e.g., 'Electricity Bill', 'Receipt', 'Invoice', 'Other').
+    3. "vendor_name": a string with the vendor's name, or null if you cannot find it.
+    4. "total_amount": the total amount paid or due as a number, or null if you cannot find it.
+    5. "due_date": the due date as a string, or null if there is none.
+    6. "category": a string representing the most likely expense category.
+
+    Do not add any other text or explanations outside of the JSON array.
+    """
+    return prompt
+
+
+def _parse_receipt_analysis_response(ai_response_str: str) -> dict:
+    analysis = parse_indexed_json_array(ai_response_str, 1, _parse_receipt_analysis_item)[0]
+    if analysis is None:
+        logging.error("Error processing receipt analysis response: no valid analysis in it.")
+        return {"error": "Could not analyze the receipt's text."}
+    return analysis
+
+
+def _parse_receipt_analysis_item(item) -> dict | None:
+    # Validates one analysis against the schema; raises ValidationError (a ValueError)
+    if not isinstance(item, dict):
+        return None
+    return ReceiptAnalysis.model_validate(item).model_dump(mode="json")
+
+
+async def categorize_receipts_batch_async(
+    receipt_texts: list[str], owner_id: int | None = None
+) -> list[TransactionCreate | None]:
+    """
+    Extracts the vendor and total amount of several receipts and categorizes
+    them with a single AI call, instead of two calls per receipt.
+
+    Args:
+        receipt_texts: The OCR text of each receipt.
+        owner_id: The user the receipts belong to, whose category corrections apply.
+
+    Returns:
+        One entry per receipt, in the same order: a TransactionCreate ready to
+        be saved, or None if that receipt could not be analyzed (including when
+        the whole response was unusable).
+    """
+    ai_response_str = await generate_gemini_response_async(_build_receipt_analysis_prompt(receipt_texts))
+    values = parse_indexed_json_array(ai_response_str, len(receipt_texts), _parse_receipt_analysis_item)
+    analyses = await run_blocking_io(_apply_vendor_category_memo, values, owner_id)
+    return [build_receipt_transaction(analysis) if analysis is not None else None for analysis in analyses]
+
+
+_categorization_batcher = LLMBatchCoalescer(
+    "categorization",
+    build_batch_prompt=_build_vendors_batch_prompt,
+    parse_batch_response=lambda response, count: parse_indexed_json_array(response, count, _parse_vendors_batch_item),
+    run_single=_categorize_vendor_async,
+)
+
+_receipt_analysis_batcher = LLMBatchCoalescer(
+    "receipt_analysis",
+    build_batch_prompt=_build_receipt_analysis_prompt,
+    parse_batch_response=lambda response, count: parse_indexed_json_array(response, count, _parse_receipt_analysis_item),
+    run_single=_analyze_receipt_text_async,
+)
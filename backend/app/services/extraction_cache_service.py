@@ -0,0 +1,160 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import Counter, OrderedDict
+from datetime import timedelta
+from typing import Awaitable, Callable
+
+from backend.app.core.config import settings
+from backend.app.core.executors import run_blocking_io
+from backend.db import crud, session
+
+# Result kinds stored in the cache
+OCR_PAGES = "ocr_pages"
+STRUCTURED_DATA = "structured"
+RECEIPT_ANALYSIS = "receipt"
+
+# Expired/oversized persistent rows are evicted after this many writes.
+_EVICT_EVERY_N_WRITES = 100
+
+
+def content_hash(file_bytes: bytes) -> str:
+    """Returns the SHA-256 hex digest used as the cache key for an upload."""
+    return hashlib.sha256(file_bytes).hexdigest()
+
+
+class ExtractionCache:
+    """
+    Two-tier cache for OCR text and structured extraction results.
+
+    The first tier is an in-process LRU with a TTL; the second is the
+    `extraction_cache` table, so results survive restarts and are shared
+    between workers. Failures in the persistent tier are logged and treated
+    as misses; the cache never fails a request.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: int, persistent_max_entries: int):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.persistent_max_entries = persistent_max_entries
+        self._entries: OrderedDict[tuple[str, str], tuple[float, dict]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters: Counter[str] = Counter()
+        self._writes = 0
+
+    def get(self, key: str, kind: str) -> dict | None:
+        """Looks a result up in memory, then in the database."""
+        now = time.monotonic()
+        with self._lock:
+            cached = self._entries.get((key, kind))
+            if cached is not None:
+                expires_at, value = cached
+                if expires_at > now:
+                    self._entries.move_to_end((key, kind))
+                    self._counters[f"{kind}.memory_hits"] += 1
+                    return value
+                del self._entries[(key, kind)]
+
+        value = self._get_persistent(key, kind)
+        with self._lock:
+            if value is None:
+                self._counters[f"{kind}.misses"] += 1
+                return None
+            self._counters[f"{kind}.persistent_hits"] += 1
+        self._set_memory(key, kind, value)
+        return value
+
+    def set(self, key: str, kind: str, value: dict) -> None:
+        """Stores a result in both tiers."""
+        self._set_memory(key, kind, value)
+        db = session.SessionLocal()
+        try:
+            crud.upsert_extraction_cache_entry(db, content_hash=key, kind=kind, value=json.dumps(value))
+            with self._lock:
+                self._writes += 1
+                should_evict = self._writes % _EVICT_EVERY_N_WRITES == 0
+            if should_evict:
+                evicted = crud.evict_extraction_cache_entries(
+                    db, max_age=timedelta(seconds=self.ttl_seconds), max_entries=self.persistent_max_entries
+                )
+                with self._lock:
+                    self._counters["persistent_evictions"] += evicted
+        except Exception as e:
+            db.rollback()
+            logging.error(f"Error writing to the extraction cache: {e}")
+        finally:
+            db.close()
+
+    def get_or_compute(
+        self,
+        key: str,
+        kind: str,
+        compute: Callable[[], dict],
+        is_cacheable: Callable[[dict], bool] = lambda value: True,
+    ) -> dict:
+        """
+        Returns the cached result for (key, kind), computing and storing it on a miss.
+        Results rejected by is_cacheable (e.g. error placeholders) are not stored.
+        """
+        value = self.get(key, kind)
+        if value is not None:
+            return value
+        value = compute()
+        if is_cacheable(value):
+            self.set(key, kind, value)
+        return value
+
+    async def get_or_compute_async(
+        self,
+        key: str,
+        kind: str,
+        compute: Callable[[], Awaitable[dict]],
+        is_cacheable: Callable[[dict], bool] = lambda value: True,
+    ) -> dict:
+        """
+        Async counterpart of get_or_compute for coroutine computations. The
+        cache's database reads and writes run on the blocking-I/O pool.
+        """
+        value = await run_blocking_io(self.get, key, kind)
+        if value is not None:
+            return value
+        value = await compute()
+        if is_cacheable(value):
+            await run_blocking_io(self.set, key, kind, value)
+        return value
+
+    def stats(self) -> dict:
+        """Returns hit/miss/eviction counters and the in-memory size."""
+        with self._lock:
+            return {"memory_entries": len(self._entries), **self._counters}
+
+    def _set_memory(self, key: str, kind: str, value: dict) -> None:
+        with self._lock:
+            self._entries[(key, kind)] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end((key, kind))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._counters["memory_evictions"] += 1
+
+    def _get_persistent(self, key: str, kind: str) -> dict | None:
+        db = session.SessionLocal()
+        try:
+            entry = crud.get_extraction_cache_entry(
+                db, content_hash=key, kind=kind, max_age=timedelta(seconds=self.ttl_seconds)
+            )
+            return json.loads(entry.value) if entry is not None else None  # type: ignore
+        except Exception as e:
+            logging.error(f"Error reading from the extraction cache: {e}")
+            return None
+        finally:
+            db.close()
+
+
+# Shared by /ocr/upload, /document-analysis/analyze and /expense/process-bill
+extraction_cache = ExtractionCache(
+    max_entries=settings.EXTRACTION_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.EXTRACTION_CACHE_TTL_SECONDS,
+    persistent_max_entries=settings.EXTRACTION_CACHE_PERSISTENT_MAX_ENTRIES,
+)
@@ -0,0 +1,190 @@
+import json
+import logging
+import math
+import re
+import threading
+from collections import Counter
+
+from backend.app.core.config import settings
+
+# Binary features of a message: (name, pattern, red flag shown to the user).
+# Features without a red flag are signs of a genuine message or too weak to
+# explain a verdict on their own; the trained weights decide how much each counts.
+_FEATURES: list[tuple[str, str, str | None]] = [
+    ("otp_request",
+     r"\b(share|send|tell|give|forward|enter|provide)\b[^.]{0,40}\b(otp|one time password|verification code|cvv|pin)\b",
+     "It asks for an OTP, PIN or CVV, which no bank or company will ever ask you to share."),
+    ("kyc_threat",
+     r"\b(kyc|pan|aadhaar)\b[^.]{0,60}\b(expire|expired|suspend|suspended|suspension|block|blocked|deactivat\w*|not linked)\b",
+     "It threatens action on your account over KYC, PAN or Aadhaar details, a common scam tactic."),
+    ("account_threat",
+     r"\b(account|card|sim|connection|number|power|whatsapp)\b[^.]{0,40}\b(will be|has been|is)\b[^.]{0,25}\b(block|blocked|suspend\w*|deactivat\w*|disconnect\w*|terminat\w*|cut|locked|on hold)\b",
+     "It threatens to block or cut off a service to rush you into acting."),
+    ("short_link",
+     r"\b(bit\.ly|tinyurl\.com|goo\.gl|t\.co|cutt\.ly|rb\.gy|is\.gd|shorturl\.at)/",
+     "It contains a shortened link that hides where it really goes."),
+    ("suspicious_link",
+     r"\b[a-z0-9]+(?:-[a-z0-9]+)+\.[a-z]{2,}\b|\.(?:xyz|top|tk|ml|ga|cf|gq|buzz|click|link|info|site|online)\b",
+     "It links to a website that is not an official one."),
+    ("any_link", r"https?://|www\.|\b[a-z0-9-]+\.(?:com|in|net|org|co)/", None),
+    ("prize",
+     r"\b(won|winner|lottery|lucky draw|prize|jackpot|free gift|gift hamper|reward points)\b",
+     "It promises a prize or reward you never signed up for."),
+    ("fee_to_claim",
+     r"\b(pay|deposit|transfer|send)\b[^.]{0,40}\b(fee|charges|tax|security deposit|clearance)\b",
+     "It asks you to pay a fee before you can receive something."),
+    ("urgency",
+     r"\b(urgent\w*|immediately|within \d+ (?:hours|hrs|minutes)|today itself|last chance|act now|tonight)\b",
+     "It creates false urgency so you act without thinking."),
+    ("easy_money",
+     r"\b(part[- ]time|work from home|daily income|earn (?:rs\.? ?)?\d[\d,]*|guaranteed|liking (?:youtube )?videos|simple task)\b",
+     "It offers easy money for little work, a common job or investment scam."),
+    ("unknown_contact",
+     r"\b(call|whatsapp|contact|telegram|press \d)\b[^.]{0,40}(\+?\d[\d -]{8,}\d|@\w+|officer|agent|executive)",
+     "It asks you to call or message an unknown number or agent."),
+    ("upi_pin",
+     r"\b(scan (?:this|the) qr|qr code|upi pin|collect request)\b",
+     "It asks you to scan a QR code or enter your UPI PIN, which sends money instead of receiving it."),
+    ("refund_claim",
+     r"\b(refund)\b[^.]{0,40}\b(approved|pending|claim|failed)\b",
+     "It dangles a refund you have to claim through them."),
+    ("remote_access",
+     r"\b(anydesk|teamviewer|quick ?support|rustdesk|screen shar\w*)\b",
+     "It asks you to install a remote-access app, which lets a stranger control your phone."),
+    ("authority_threat",
+     r"\b(arrest\w*|police|customs|cbi|court case|money laundering|illegal)\b",
+     "It uses threats involving the police or other authorities."),
+    ("card_details",
+     r"\b(verify|update|share|send)\b[^.]{0,30}\b(card details|bank details|payment details|account details)\b",
+     "It asks you to send or update your bank or card details."),
+    ("phone_number", r"(?:\+91[ -]?)?\b[6-9]\d{4}[ -]?\d{5}\b", None),
+    ("transaction_alert", r"\b(debited|credited)\b[^.]{0,40}\b(a/c|account|acct)\b", None),
+    ("otp_delivery", r"\b(otp|code)\b[^.]{0,25}\b(is|:)\s*\d{4,8}\b|\b\d{4,8} is your (?:otp|code)\b", None),
+    ("do_not_share", r"\b(do not|don't|never)\b[^.]{0,20}\b(share|ask)", None),
+    ("confirmation",
+     r"\b(confirmed|successful|successfully|has been received|processed|has been shipped|delivered|out for delivery)\b",
+     None),
+    ("official_channel", r"\b(official|via the \w+ app|in the app|netbanking|myjio)\b", None),
+]
+
+FEATURE_NAMES = [name for name, _, _ in _FEATURES]
+_PATTERNS = [re.compile(pattern, re.IGNORECASE) for _, pattern, _ in _FEATURES]
+_RED_FLAGS = {name: red_flag for name, _, red_flag in _FEATURES if red_flag}
+
+_SAFE_REASON = (
+    "It reads like a routine notification or personal message and shows none of the usual scam signs, "
+    "such as requests for OTPs or payments, threats, prizes or suspicious links."
+)
+
+
+def extract_features(text: str) -> list[int]:
+    """Returns the binary feature vector of a message, in FEATURE_NAMES order."""
+    return [1 if pattern.search(text) else 0 for pattern in _PATTERNS]
+
+
+class FraudClassifier:
+    """
+    Fast local tier of fraud detection: a logistic regression over the
+    keyword/regex features above, trained offline by
+    `backend.scripts.train_fraud_classifier`. Scoring a message takes
+    microseconds, so confident verdicts are returned without calling the AI
+    model; messages in the uncertain band are left to it.
+    """
+
+    def __init__(self, weights_path: str, scam_threshold: float, safe_threshold: float, enabled: bool = True):
+        self.weights_path = weights_path
+        self.scam_threshold = scam_threshold
+        self.safe_threshold = safe_threshold
+        self.enabled = enabled
+        self._bias = 0.0
+        self._weights: list[float] | None = None
+        self._load_attempted = False
+        self._lock = threading.Lock()
+        self._counters: Counter[str] = Counter()
+
+    def load(self) -> bool:
+        """
+        Loads the trained weights. Without them (missing or invalid file) the
+        classifier never decides and every message goes to the AI model.
+
+        Returns:
+            True if the weights were loaded.
+        """
+        self._load_attempted = True
+        try:
+            with open(self.weights_path, encoding="utf-8") as f:
+                model = json.load(f)
+            weights = model["weights"]
+            self._weights = [float(weights.get(name, 0.0)) for name in FEATURE_NAMES]
+            self._bias = float(model["bias"])
+        except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+            logging.error(f"Error loading fraud classifier weights from {self.weights_path}: {e}")
+            self._weights = None
+            return False
+        return True
+
+    def ensure_loaded(self) -> None:
+        """Loads the weights if no load has been attempted yet."""
+        if not self._load_attempted:
+            self.load()
+
+    def score(self, text: str) -> float | None:
+        """Returns the probability that a message is a scam, or None without weights."""
+        self.ensure_loaded()
+        if self._weights is None:
+            return None
+        return self._probability(extract_features(text))
+
+    def classify(self, text: str) -> dict | None:
+        """
+        Returns a verdict like analyze_text_for_fraud's when the model is
+        confident, or None if the message should go to the AI model.
+        """
+        if not self.enabled:
+            return None
+        self.ensure_loaded()
+        if self._weights is None:
+            return None
+
+        features = extract_features(text)
+        probability = self._probability(features)
+        if probability >= self.scam_threshold:
+            outcome = "scam"
+            verdict = {"is_scam": True, "reason": self._scam_reason(features)}
+        elif probability <= self.safe_threshold:
+            outcome = "safe"
+            verdict = {"is_scam": False, "reason": _SAFE_REASON}
+        else:
+            outcome = "uncertain"
+            verdict = None
+        with self._lock:
+            self._counters[outcome] += 1
+        return verdict
+
+    def stats(self) -> dict:
+        """Returns how many messages were decided as scam/safe or left uncertain."""
+        with self._lock:
+            return {"loaded": self._weights is not None, **self._counters}
+
+    def _probability(self, features: list[int]) -> float:
+        assert self._weights is not None
+        z = self._bias + sum(w for w, x in zip(self._weights, features) if x)
+        return 1.0 / (1.0 + math.exp(-z))
+
+    def _scam_reason(self, features: list[int]) -> str:
+        # Explain the verdict with the (at most two) strongest red flags present
+        assert self._weights is not None
+        present = sorted(
+            (weight, name) for name, weight, x in zip(FEATURE_NAMES, self._weights, features)
+            if x and name in _RED_FLAGS and weight > 0
+        )
+        red_flags = [_RED_FLAGS[name] for _, name in reversed(present[-2:])]
+        return " ".join(red_flags) or "It shows several common signs of a scam."
+
+
+fraud_classifier = FraudClassifier(
+    weights_path=settings.FRAUD_CLASSIFIER_WEIGHTS_PATH,
+    scam_threshold=settings.FRAUD_CLASSIFIER_SCAM_THRESHOLD,
+    safe_threshold=settings.FRAUD_CLASSIFIER_SAFE_THRESHOLD,
+    enabled=settings.FRAUD_CLASSIFIER_ENABLED,
+)
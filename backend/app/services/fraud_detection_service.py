@@ -1,19 +1,82 @@
 import json
 import logging
-from backend.app.services.chat_service import generate_gemini_response
+from backend.app.core.executors import run_blocking_io
+from backend.app.services.chat_service import generate_gemini_response, generate_gemini_response_async
+from backend.app.services.fraud_classifier_service import fraud_classifier
+from backend.app.services.fraud_fingerprint_service import fraud_fingerprint_index
+from backend.app.services.llm_batching_service import LLMBatchCoalescer, parse_indexed_json_array
+
+
+class FraudAnalysisError(Exception):
+    """
+    Raised when the AI model's answer cannot be read as a verdict, so the
+    caller can say the message could not be checked instead of calling it safe.
+    """
+
 
 def analyze_text_for_fraud(text_to_analyze: str) -> dict:
     """
-    Analyzes a piece of text for signs of financial fraud using a specialized
-    prompt with the Gemini AI model.
+    Analyzes a piece of text for signs of financial fraud. Cheap tiers run
+    first: messages of an already-known scam campaign get the cached verdict
+    from the fingerprint index, and the local classifier answers obvious
+    scams and obviously genuine messages. Everything else is analyzed with a
+    specialized prompt by the Gemini AI model.
 
     Args:
         text_to_analyze: The text from an SMS, WhatsApp message, etc.
 
     Returns:
-        A dictionary with the analysis result, e.g.,
-        {"is_scam": True, "reason": "This message creates false urgency..."}
+        A dictionary with the analysis result and the tier that decided it, e.g.,
+        {"is_scam": True, "reason": "This message creates false urgency...", "decided_by": "llm"}
+
+    Raises:
+        FraudAnalysisError: If the AI model's answer could not be understood.
+    """
+    local_verdict = _local_verdict(text_to_analyze)
+    if local_verdict is not None:
+        return local_verdict
+
+    result = _parse_fraud_response(generate_gemini_response(_build_fraud_prompt(text_to_analyze)))
+    fraud_fingerprint_index.add(text_to_analyze, result)
+    return {**result, "decided_by": "llm"}
+
+
+async def analyze_text_for_fraud_async(text_to_analyze: str) -> dict:
+    """
+    Async counterpart of analyze_text_for_fraud; awaits the Gemini call
+    instead of blocking a thread on it. Concurrent checks are coalesced into
+    one multi-message prompt.
+
+    Raises:
+        FraudAnalysisError: If the AI model's answer could not be understood.
     """
+    local_verdict = _local_verdict(text_to_analyze)
+    if local_verdict is not None:
+        return local_verdict
+
+    result = await _fraud_check_batcher.submit(text_to_analyze)
+    await run_blocking_io(fraud_fingerprint_index.add, text_to_analyze, result)
+    return {**result, "decided_by": "llm"}
+
+
+def _local_verdict(text_to_analyze: str) -> dict | None:
+    # Both tiers are in-memory and take microseconds, so this is safe on the event loop.
+    # A known scam campaign wins over the classifier, which can score a new
+    # variant of it as safe.
+    verdict = fraud_fingerprint_index.lookup(text_to_analyze)
+    if verdict is not None:
+        return {**verdict, "decided_by": "fingerprint"}
+    verdict = fraud_classifier.classify(text_to_analyze)
+    if verdict is not None:
+        return {**verdict, "decided_by": "classifier"}
+    return None
+
+
+async def _analyze_with_llm_async(text_to_analyze: str) -> dict:
+    return _parse_fraud_response(await generate_gemini_response_async(_build_fraud_prompt(text_to_analyze)))
+
+
+def _build_fraud_prompt(text_to_analyze: str) -> str:
     # This detailed prompt is engineered to make the AI act as a fraud detection expert
     # for the Indian context and to return a structured JSON response.
     prompt = f"""
@@ -35,11 +98,11 @@ def analyze_text_for_fraud(text_to_analyze: str) -> dict:
     
     Do not add any other text or explanations outside of the JSON object.
     """
+    return prompt
+
 
+def _parse_fraud_response(ai_response_str: str) -> dict:
     try:
-        # Get the raw response from the AI
-        ai_response_str = generate_gemini_response(prompt)
-        
         # Clean the response to ensure it's a valid JSON string
         # LLMs sometimes add markdown formatting like ```json ... ```
         if ai_response_str.strip().startswith("```json"):
@@ -47,17 +110,50 @@ def analyze_text_for_fraud(text_to_analyze: str) -> dict:
 
         # Parse the JSON string into a Python dictionary
         analysis_result = json.loads(ai_response_str)
-        
+
         # Validate the structure of the response
-        if "is_scam" in analysis_result and "reason" in analysis_result:
-            return analysis_result
-        else:
+        verdict = _parse_fraud_batch_item(analysis_result) if isinstance(analysis_result, dict) else None
+        if verdict is None:
             raise ValueError("AI response is missing required keys.")
+        return verdict
 
     except (json.JSONDecodeError, ValueError) as e:
         logging.error(f"Error processing fraud detection response: {e}")
-        # Provide a safe, default response in case of any errors
-        return {
-            "is_scam": False,
-            "reason": "Could not analyze the message. Please be cautious."
-        }
+        # Never guess a verdict: "not a scam" would tell the user a scam is safe
+        raise FraudAnalysisError("Could not analyze the message.") from e
+
+
+def _build_fraud_batch_prompt(texts: list[str]) -> str:
+    messages = "\n".join(f'Message {i}:\n---\n"{text}"\n---' for i, text in enumerate(texts))
+    prompt = f"""
+    You are a fraud detection expert for DigiSaathi, an app that helps users in India.
+    Below are {len(texts)} unrelated text messages, numbered from 0. Determine for each one if it is a scam.
+    Consider common scam tactics in India: fake KYC updates, lottery wins, fake job offers,
+    requests for OTPs, unofficial payment links, threats of account suspension, etc.
+
+    {messages}
+
+    Respond with a JSON array ONLY, with one object per message. Each object must have three keys:
+    1. "index": the message number.
+    2. "is_scam": a boolean value (true if it is a scam, false otherwise).
+    3. "reason": a string, written in simple language, explaining exactly why the message is or is not a scam.
+       If it is a scam, point out the specific red flags (e.g., "It asks for an OTP which you should never share.").
+       If it is not a scam, explain why it looks legitimate.
+
+    Do not add any other text or explanations outside of the JSON array.
+    """
+    return prompt
+
+
+def _parse_fraud_batch_item(item: dict) -> dict | None:
+    if not isinstance(item.get("is_scam"), bool) or not isinstance(item.get("reason"), str):
+        return None
+    return {"is_scam": item["is_scam"], "reason": item["reason"]}
+
+
+_fraud_check_batcher = LLMBatchCoalescer(
+    "fraud_check",
+    build_batch_prompt=_build_fraud_batch_prompt,
+    parse_batch_response=lambda response, count: parse_indexed_json_array(response, count, _parse_fraud_batch_item),
+    run_single=_analyze_with_llm_async,
+)
@@ -0,0 +1,340 @@
+import hashlib
+import logging
+import re
+import struct
+import threading
+import time
+from collections import Counter
+from datetime import timedelta, timezone
+
+from backend.app.core.config import settings
+from backend.db import crud, session
+
+# MinHash signatures have NUM_PERMUTATIONS 32-bit values, all derived from one
+# SHAKE-128 digest per feature. With 128 values a similarity estimate near the
+# 0.6 threshold is off by about 0.04 (one standard error). For LSH they are
+# split into bands of _ROWS_PER_BAND values; messages at a Jaccard similarity
+# of 0.6 collide in at least one band with a probability of about 99%.
+NUM_PERMUTATIONS = 128
+_ROWS_PER_BAND = 4
+_SIGNATURE = struct.Struct(f"<{NUM_PERMUTATIONS}I")
+_BAND_BYTES = _ROWS_PER_BAND * 4
+
+# Variable parts of a campaign's messages, replaced by placeholders
+_URL_RE = re.compile(r"(?:https?://|www\.)\S+|\b[a-z0-9-]+(?:\.[a-z0-9-]+)*\.(?:com|in|net|org|co|ly|me|io|xyz|info|link|top|site)\b(?:/\S*)?")
+_EMAIL_RE = re.compile(r"\b[\w.+-]+@[\w-]+(?:\.[\w-]+)+\b")
+_NUMBER_RE = re.compile(r"(?:\+?\d[\d\s\-,./:]*\d|\d)")
+_NON_WORD_RE = re.compile(r"[^a-z<>]+")
+
+# Minimum number of words for a message to be fingerprinted; shorter texts
+# ("call me", "ok") would match far too much.
+_MIN_TOKENS = 5
+
+# Persisted rows are evicted after this many inserts
+_EVICT_EVERY_N_WRITES = 100
+
+
+def normalize_message(text: str) -> str:
+    """
+    Lowercases a message and masks URLs, e-mail addresses and numbers (phone
+    numbers, amounts, OTPs, dates), so messages of one campaign that differ
+    only in those parts normalize to the same template.
+    """
+    text = text.lower()
+    text = _EMAIL_RE.sub(" <email> ", text)
+    text = _URL_RE.sub(" <url> ", text)
+    text = _NUMBER_RE.sub(" <num> ", text)
+    return " ".join(_NON_WORD_RE.sub(" ", text).split())
+
+
+def minhash(template: str) -> bytes | None:
+    """
+    Computes the MinHash signature of a normalized message over its set of
+    word unigrams and bigrams.
+
+    Returns:
+        The packed signature, or None if the message is too short to fingerprint.
+    """
+    tokens = template.split()
+    if len(tokens) < _MIN_TOKENS:
+        return None
+    features = set(tokens)
+    features.update(f"{a} {b}" for a, b in zip(tokens, tokens[1:]))
+    rows = [_SIGNATURE.unpack(hashlib.shake_128(feature.encode()).digest(_SIGNATURE.size)) for feature in features]
+    return _SIGNATURE.pack(*map(min, zip(*rows)))
+
+
+def similarity(signature_a: bytes, signature_b: bytes) -> float:
+    """Estimates the Jaccard similarity of two messages from their signatures."""
+    matches = sum(a == b for a, b in zip(_SIGNATURE.unpack(signature_a), _SIGNATURE.unpack(signature_b)))
+    return matches / NUM_PERMUTATIONS
+
+
+def _current_signature(row) -> bytes | None:
+    # Rows stored before a change of NUM_PERMUTATIONS are recomputed from their
+    # template until rebuild() (scripts/rebuild_fraud_index.py) persists them
+    if len(row.signature) == _SIGNATURE.size:
+        return row.signature
+    return minhash(row.template)
+
+
+class FraudFingerprintIndex:
+    """
+    Near-duplicate index of past scam verdicts, so repeat messages of a scam
+    campaign are answered without an AI call.
+
+    Signatures are bucketed by band (locality-sensitive hashing), so a lookup
+    only compares the few templates sharing a bucket with the message.
+
+    Only scam verdicts are stored. Masking links is what lets a campaign's
+    messages match, but it would also let a phishing copy of a genuine bank
+    message inherit that message's "not a scam" verdict.
+
+    The `fraud_fingerprints` table is the persistent tier. Lookups never
+    touch it: each worker loads the table on first use and picks up rows
+    added by other workers whenever it records a new verdict.
+    """
+
+    def __init__(self, min_similarity: float, max_entries: int, ttl_seconds: int):
+        self.min_similarity = min_similarity
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._band_count = NUM_PERMUTATIONS // _ROWS_PER_BAND
+        self._lock = threading.Lock()
+        self._entries: dict[int, tuple[bytes, dict, float]] = {}  # id -> (signature, verdict, created_at)
+        self._bands: list[dict[bytes, list[int]]] = [{} for _ in range(self._band_count)]
+        self._loaded = False
+        self._last_id = 0
+        self._writes = 0
+        self._counters: Counter[str] = Counter()
+
+    def lookup(self, text: str) -> dict | None:
+        """
+        Returns the cached verdict of the most similar known scam template
+        with at least min_similarity, or None. In-memory only; safe to call on
+        the event loop.
+        """
+        signature = minhash(normalize_message(text))
+        if signature is None:
+            return None
+        with self._lock:
+            match = self._closest(signature)
+            if match is None:
+                self._counters["misses"] += 1
+                return None
+            self._counters["hits"] += 1
+            return dict(self._entries[match][1])
+
+    def add(self, text: str, verdict: dict) -> None:
+        """Records the AI model's verdict for a message. Non-scam verdicts are ignored."""
+        if not verdict.get("is_scam"):
+            return
+        template = normalize_message(text)
+        signature = minhash(template)
+        if signature is None:
+            return
+
+        self.refresh()
+        with self._lock:
+            if self._closest(signature) is not None:
+                return
+
+        db = session.SessionLocal()
+        try:
+            entry = crud.create_fraud_fingerprint(
+                db, signature=signature, template=template,
+                is_scam=True, reason=str(verdict.get("reason", "")),
+            )
+            self.load([(entry.id, signature, {"is_scam": True, "reason": entry.reason}, time.time())])
+            with self._lock:
+                self._writes += 1
+                should_evict = self._writes % _EVICT_EVERY_N_WRITES == 0
+            if should_evict:
+                self.evict(db)
+        except Exception as e:
+            db.rollback()
+            logging.error(f"Error writing to the fraud fingerprint index: {e}")
+        finally:
+            db.close()
+
+    def add_many(self, verdicts: list[tuple[str, dict]]) -> int:
+        """
+        Records many (message, verdict) pairs, e.g. a labelled corpus of known
+        scams, with a single bulk insert. Near-duplicates are stored once.
+
+        Returns:
+            The number of new templates.
+        """
+        self.refresh()
+        new_rows = []
+        with self._lock:
+            temp_ids = []
+            for text, verdict in verdicts:
+                if not verdict.get("is_scam"):
+                    continue
+                template = normalize_message(text)
+                signature = minhash(template)
+                if signature is None or self._closest(signature) is not None:
+                    continue
+                # Index it right away (under a temporary negative id) so later
+                # near-duplicates in the same batch are skipped
+                temp_id = -len(new_rows) - 1
+                self._insert(temp_id, signature, verdict, time.time())
+                temp_ids.append(temp_id)
+                new_rows.append({
+                    "signature": signature, "template": template,
+                    "is_scam": True, "reason": str(verdict.get("reason", "")),
+                })
+            for temp_id in temp_ids:
+                self._remove(temp_id)
+
+        if not new_rows:
+            return 0
+        db = session.SessionLocal()
+        try:
+            crud.create_fraud_fingerprints_bulk(db, new_rows)
+        except Exception as e:
+            db.rollback()
+            logging.error(f"Error writing to the fraud fingerprint index: {e}")
+            return 0
+        finally:
+            db.close()
+        self.refresh()
+        return len(new_rows)
+
+    def refresh(self) -> None:
+        """Loads rows added since the last refresh (all rows on first use)."""
+        db = session.SessionLocal()
+        try:
+            rows = crud.get_fraud_fingerprints(
+                db, since_id=self._last_id, max_age=timedelta(seconds=self.ttl_seconds)
+            )
+        except Exception as e:
+            logging.error(f"Error loading the fraud fingerprint index: {e}")
+            return
+        finally:
+            db.close()
+
+        self.load(
+            (row.id, signature, {"is_scam": row.is_scam, "reason": row.reason},  # type: ignore
+             row.created_at.replace(tzinfo=timezone.utc).timestamp())  # type: ignore
+            for row, signature in ((row, _current_signature(row)) for row in rows)
+            if signature is not None
+        )
+        self._loaded = True
+
+    def load(self, entries) -> None:
+        """
+        Adds persisted templates to the in-memory index.
+
+        Args:
+            entries: Iterable of (id, signature, verdict, created_at epoch seconds).
+        """
+        with self._lock:
+            for entry_id, signature, verdict, created_at in entries:
+                self._insert(entry_id, signature, verdict, created_at)
+                self._last_id = max(self._last_id, entry_id)
+
+    def evict(self, db=None) -> int:
+        """
+        Drops expired templates and, beyond max_entries, the oldest ones,
+        both from the table and from memory.
+
+        Returns:
+            The number of rows deleted from the table.
+        """
+        own_session = db is None
+        db = db or session.SessionLocal()
+        try:
+            deleted = crud.evict_fraud_fingerprints(
+                db, max_age=timedelta(seconds=self.ttl_seconds), max_entries=self.max_entries
+            )
+        finally:
+            if own_session:
+                db.close()
+
+        with self._lock:
+            expired_before = time.time() - self.ttl_seconds
+            by_age = sorted(self._entries, key=lambda entry_id: self._entries[entry_id][2])
+            excess = max(0, len(by_age) - self.max_entries)
+            for i, entry_id in enumerate(by_age):
+                if i < excess or self._entries[entry_id][2] < expired_before:
+                    self._remove(entry_id)
+            self._counters["evictions"] += deleted
+        return deleted
+
+    def rebuild(self) -> int:
+        """
+        Recomputes every stored signature from its template (e.g. after
+        changing the normalization) with one bulk update, then reloads the
+        in-memory index.
+
+        Returns:
+            The number of templates in the rebuilt index.
+        """
+        db = session.SessionLocal()
+        try:
+            rows = crud.get_fraud_fingerprints(db, since_id=0, max_age=timedelta(seconds=self.ttl_seconds))
+            signatures = {row.id: minhash(normalize_message(row.template)) for row in rows}  # type: ignore
+            crud.delete_fraud_fingerprints(db, [row_id for row_id, sig in signatures.items() if sig is None])
+            crud.update_fraud_fingerprint_signatures(
+                db, {row_id: sig for row_id, sig in signatures.items() if sig is not None}
+            )
+        finally:
+            db.close()
+
+        with self._lock:
+            self._entries.clear()
+            self._bands = [{} for _ in range(self._band_count)]
+            self._last_id = 0
+        self.refresh()
+        return len(self._entries)
+
+    def ensure_loaded(self) -> None:
+        """Loads the persisted index if this worker has not done so yet."""
+        if not self._loaded:
+            self.refresh()
+
+    def stats(self) -> dict:
+        """Returns hit/miss/eviction counters and the number of templates."""
+        with self._lock:
+            return {"templates": len(self._entries), **self._counters}
+
+    def _band_keys(self, signature: bytes) -> list[bytes]:
+        return [signature[band * _BAND_BYTES:(band + 1) * _BAND_BYTES] for band in range(self._band_count)]
+
+    def _closest(self, signature: bytes) -> int | None:
+        best_id, best_similarity = None, self.min_similarity
+        seen = set()
+        for band, key in enumerate(self._band_keys(signature)):
+            for entry_id in self._bands[band].get(key, ()):
+                if entry_id in seen:
+                    continue
+                seen.add(entry_id)
+                score = similarity(self._entries[entry_id][0], signature)
+                if score >= best_similarity:
+                    best_id, best_similarity = entry_id, score
+        return best_id
+
+    def _insert(self, entry_id: int, signature: bytes, verdict: dict, created_at: float) -> None:
+        if entry_id in self._entries:
+            return
+        self._entries[entry_id] = (signature, verdict, created_at)
+        for band, key in enumerate(self._band_keys(signature)):
+            self._bands[band].setdefault(key, []).append(entry_id)
+
+    def _remove(self, entry_id: int) -> None:
+        signature = self._entries.pop(entry_id)[0]
+        for band, key in enumerate(self._band_keys(signature)):
+            bucket = self._bands[band].get(key)
+            if bucket is not None and entry_id in bucket:
+                bucket.remove(entry_id)
+                if not bucket:
+                    del self._bands[band][key]
+
+
+fraud_fingerprint_index = FraudFingerprintIndex(
+    min_similarity=settings.FRAUD_FINGERPRINT_MIN_SIMILARITY,
+    max_entries=settings.FRAUD_FINGERPRINT_MAX_ENTRIES,
+    ttl_seconds=settings.FRAUD_FINGERPRINT_TTL_SECONDS,
+)
@@ -0,0 +1,188 @@
+import statistics
+import threading
+import time
+from collections import defaultdict
+
+from PIL import Image, ImageChops, ImageOps
+
+from backend.app.core.config import settings
+
+# Pipeline stages, in the order they run
+STAGES = ("exif_transpose", "grayscale", "rescale", "binarize")
+
+EXIF_ORIENTATION = 0x0112
+
+# Rescaling never shrinks the long side of an image below this
+_MIN_LONG_SIDE_PX = 1000
+
+
+class PreprocessingStats:
+    """Thread-safe per-stage timing totals, exposed through /health/metrics."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._count: defaultdict[str, int] = defaultdict(int)
+        self._total_ms: defaultdict[str, float] = defaultdict(float)
+
+    def record(self, timings: dict[str, float]) -> None:
+        with self._lock:
+            for stage, ms in timings.items():
+                self._count[stage] += 1
+                self._total_ms[stage] += ms
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                stage: {
+                    "count": self._count[stage],
+                    "total_ms": round(self._total_ms[stage], 2),
+                    "avg_ms": round(self._total_ms[stage] / self._count[stage], 2),
+                }
+                for stage in self._count
+            }
+
+
+preprocessing_stats = PreprocessingStats()
+
+
+def estimate_text_line_height(gray: Image.Image) -> float | None:
+    """
+    Estimates the median height in pixels of the text lines in a grayscale image.
+
+    Horizontal edge energy is averaged per row (Pillow does the work in C): rows
+    crossing glyphs have strong left-right contrast, while background, including
+    the lighting gradients of phone photos, has almost none. The lengths of
+    consecutive high-energy runs are the line heights.
+
+    Returns:
+        The median line height, or None if no text lines were found.
+    """
+    narrow = gray.resize((max(2, gray.width // 4), gray.height), Image.Resampling.BOX)
+    edges = ImageChops.difference(narrow, ImageChops.offset(narrow, 1, 0))
+    profile = list(edges.resize((1, gray.height), Image.Resampling.BOX).getdata())
+
+    ordered = sorted(profile)
+    baseline = ordered[len(ordered) // 5]
+    peak = ordered[-1]
+    if peak - baseline < 2:
+        return None
+    cutoff = baseline + (peak - baseline) * 0.2
+
+    runs = []
+    run = 0
+    for value in profile:
+        if value > cutoff:
+            run += 1
+        elif run:
+            runs.append(run)
+            run = 0
+    if run:
+        runs.append(run)
+
+    runs = [r for r in runs if r >= 3]
+    return float(statistics.median(runs)) if runs else None
+
+
+def _rescale(gray: Image.Image) -> Image.Image:
+    """
+    Downscales so text lines are about OCR_TARGET_TEXT_HEIGHT_PX tall. Images
+    where no text height can be measured are only capped at OCR_MAX_IMAGE_PIXELS.
+    Images are never upscaled.
+    """
+    scale = 1.0
+    line_height = estimate_text_line_height(gray)
+    if line_height is not None:
+        scale = min(1.0, settings.OCR_TARGET_TEXT_HEIGHT_PX / line_height)
+
+    pixels = gray.width * gray.height * scale * scale
+    if pixels > settings.OCR_MAX_IMAGE_PIXELS:
+        scale *= (settings.OCR_MAX_IMAGE_PIXELS / pixels) ** 0.5
+
+    # Guard against a bad estimate shrinking the page to an unreadable size
+    scale = max(scale, min(1.0, _MIN_LONG_SIDE_PX / max(gray.width, gray.height)))
+
+    if scale >= 0.95:
+        return gray
+    size = (max(1, round(gray.width * scale)), max(1, round(gray.height * scale)))
+    # Area averaging: anti-aliased like LANCZOS for downscales, but several times faster
+    return gray.resize(size, Image.Resampling.BOX)
+
+
+def otsu_threshold(gray: Image.Image) -> int:
+    """Computes Otsu's global threshold from the image histogram."""
+    histogram = gray.histogram()[:256]
+    total = sum(histogram)
+    weighted_total = sum(i * count for i, count in enumerate(histogram))
+
+    best_threshold, best_variance = 127, -1.0
+    background_count = 0
+    background_sum = 0
+    for threshold, count in enumerate(histogram):
+        background_count += count
+        if background_count == 0:
+            continue
+        foreground_count = total - background_count
+        if foreground_count == 0:
+            break
+        background_sum += threshold * count
+        background_mean = background_sum / background_count
+        foreground_mean = (weighted_total - background_sum) / foreground_count
+        variance = background_count * foreground_count * (background_mean - foreground_mean) ** 2
+        if variance > best_variance:
+            best_threshold, best_variance = threshold, variance
+    return best_threshold
+
+
+def _binarize(gray: Image.Image) -> Image.Image:
+    threshold = otsu_threshold(gray)
+    return gray.point([0 if i <= threshold else 255 for i in range(256)])
+
+
+def preprocess_image(image: Image.Image) -> tuple[Image.Image, dict[str, float]]:
+    """
+    Prepares an image for Tesseract: EXIF-aware rotation, grayscale, downscaling
+    to a target text height and, when OCR_BINARIZE is set, Otsu binarization.
+
+    Returns:
+        The processed image and the time spent in each stage, in milliseconds.
+        Record the timings with preprocessing_stats.record().
+    """
+    timings: dict[str, float] = {}
+    if not settings.OCR_PREPROCESSING_ENABLED:
+        return image, timings
+
+    # Ask JPEG decoders for grayscale output directly (no-op for other formats)
+    image.draft("L", image.size)
+
+    # Both stages are skipped when they would be no-ops, since Pillow would
+    # still copy the whole image (e.g. for PDF pages rendered in grayscale).
+    start = time.perf_counter()
+    if image.getexif().get(EXIF_ORIENTATION, 1) != 1:
+        image = ImageOps.exif_transpose(image)
+    timings["exif_transpose"] = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    if image.mode != "L":
+        image = image.convert("L")
+    timings["grayscale"] = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    image = _rescale(image)
+    timings["rescale"] = (time.perf_counter() - start) * 1000
+
+    if settings.OCR_BINARIZE:
+        start = time.perf_counter()
+        image = _binarize(image)
+        timings["binarize"] = (time.perf_counter() - start) * 1000
+
+    return image, timings
+
+
+def choose_pdf_zoom(page_width_pt: float, page_height_pt: float) -> float:
+    """
+    Picks the rasterization zoom for a PDF page from its size, so the long side
+    renders at about OCR_PDF_TARGET_LONG_SIDE_PX. Small pages such as
+    thermal-printer receipts get a higher zoom than A4 statements.
+    """
+    long_side = max(page_width_pt, page_height_pt, 1.0)
+    return min(4.0, max(1.0, settings.OCR_PDF_TARGET_LONG_SIDE_PX / long_side))
@@ -0,0 +1,186 @@
+import json
+import re
+import threading
+from collections import Counter
+from typing import AsyncIterator, Literal
+
+from backend.app.core.config import settings
+from backend.app.services import fraud_detection_service, ocr_service
+from backend.app.services.chat_service import generate_gemini_response_async, stream_gemini_response_async
+from backend.app.services.fraud_classifier_service import fraud_classifier
+
+Intent = Literal["fraud_check", "document_extraction", "agent"]
+
+# Chat messages whose intent is obvious are answered by calling the right
+# service directly and phrasing its result with one model call, instead of
+# a ReAct loop that needs at least two. Anything open-ended goes to the agent.
+
+_FRAUD_QUESTION_RE = re.compile(
+    r"\b(scam|scammer|fraud|fraudulent|fake|phishing|spam|genuine|legit|legitimate|safe to (?:click|open|reply|call))\b",
+    re.IGNORECASE,
+)
+# Double quotes only; apostrophes in ordinary sentences would pair up as quotes
+_QUOTED_RE = re.compile(r"[\"“]([^\"“”]+)[\"”]")
+# What makes pasted text look like an SMS, email or chat message rather than
+# the user's own notes: a link, a phone number, an OTP or a sender line
+_MESSAGE_FEATURE_RES = [
+    re.compile(r"https?://|\bwww\.|\b[\w-]+\.(?:com|in|co|net|org|info|xyz|top|ly|me|link|app)(?:/\S*)?\b", re.IGNORECASE),
+    re.compile(r"(?<!\d)(?:\+?91[\s-]?|0)?[6-9]\d{4}[\s-]?\d{5}(?!\d)|(?<!\d)1800[\s-]?\d{3}[\s-]?\d{4}(?!\d)"),
+    re.compile(r"\b(otp|one[\s-]time password|verification code)\b", re.IGNORECASE),
+    # A "From:" line, or an SMS sender id such as VM-HDFCBK
+    re.compile(r"^\s*(?i:from|sender|sent by)\s*:|\b[A-Z]{2}-[A-Z0-9]{6}\b", re.MULTILINE),
+]
+_AMOUNT_RE = re.compile(r"(?:₹|\brs\.?|\binr)\s*\d|\b\d+\.\d{2}\b", re.IGNORECASE)
+_BILL_WORDS_RE = re.compile(
+    r"\b(total|grand total|net amount|amount due|bill no|invoice|receipt|gstin|gst|qty|due date|subtotal)\b",
+    re.IGNORECASE,
+)
+# Requests that need the agent's save tool or other follow-up work
+_ACTION_RE = re.compile(r"\b(save|add|record|log|store|track)\b", re.IGNORECASE)
+
+# Pasted messages or questions about them need some text to analyze
+_MIN_PAYLOAD_CHARS = 20
+_MIN_BILL_LINES = 3
+
+
+def classify_intent(message: str) -> tuple[Intent, str]:
+    """
+    Decides with cheap rules whether a chat message can skip the agent.
+
+    Returns:
+        The intent and the text to hand to the matching service (the whole
+        message for 'agent').
+    """
+    if not settings.CHAT_INTENT_ROUTER_ENABLED:
+        return "agent", message
+
+    # A question about a pasted message; only the user's own words decide
+    payload = _extract_payload(message)
+    if payload is not None:
+        question = message.replace(payload, " ")
+        if _FRAUD_QUESTION_RE.search(question) and not _ACTION_RE.search(question):
+            return "fraud_check", payload
+
+    if _ACTION_RE.search(message):
+        return "agent", message
+
+    lines = [line for line in message.splitlines() if line.strip()]
+    if len(lines) >= _MIN_BILL_LINES and _AMOUNT_RE.search(message) and _BILL_WORDS_RE.search(message):
+        return "document_extraction", message
+
+    # A pasted message with no question, that the local classifier is sure is a scam
+    if len(message) >= 2 * _MIN_PAYLOAD_CHARS:
+        verdict = fraud_classifier.classify(message)
+        if verdict is not None and verdict["is_scam"]:
+            return "fraud_check", message
+
+    return "agent", message
+
+
+async def answer_directly(intent: Intent, payload: str, message: str, language: str) -> str:
+    """Runs the service for a routed message and phrases its result with one model call."""
+    result = await _run_tool(intent, payload)
+    return await generate_gemini_response_async(_build_answer_prompt(intent, result, message, language))
+
+
+async def stream_direct_answer(intent: Intent, payload: str, message: str, language: str) -> AsyncIterator[tuple[str, dict]]:
+    """
+    Streaming version of answer_directly, with the same events as
+    agent_service.stream_agent_conversation.
+    """
+    tool = _TOOL_NAMES[intent]
+    yield "tool_start", {"tool": tool, "input": payload}
+    result = await _run_tool(intent, payload)
+    yield "tool_end", {"tool": tool}
+
+    response = ""
+    async for text in stream_gemini_response_async(_build_answer_prompt(intent, result, message, language)):
+        response += text
+        yield "token", {"text": text}
+    yield "final", {"response": response}
+
+
+_TOOL_NAMES = {"fraud_check": "analyze_text_for_fraud", "document_extraction": "extract_structured_data_from_text"}
+
+
+async def _run_tool(intent: Intent, payload: str) -> dict:
+    if intent == "fraud_check":
+        try:
+            return await fraud_detection_service.analyze_text_for_fraud_async(payload)
+        except fraud_detection_service.FraudAnalysisError:
+            return {"error": "Could not analyze the message; tell the user to be cautious with it."}
+    return await ocr_service.extract_structured_data_from_text_async(payload)
+
+
+def _extract_payload(message: str) -> str | None:
+    """
+    Returns the message the user pasted, if any: quoted text, or the lines
+    below the user's own first line, long enough and with a link, phone
+    number, OTP or sender in it. A list after a colon on the same line is
+    the user's own text, not a pasted message.
+    """
+    candidates = _QUOTED_RE.findall(message)
+    first_line, _, rest = message.strip().partition("\n")
+    if rest.strip():
+        candidates.append(rest.strip())
+    candidates = [
+        candidate.strip() for candidate in candidates
+        if len(candidate.strip()) >= _MIN_PAYLOAD_CHARS and any(feature.search(candidate) for feature in _MESSAGE_FEATURE_RES)
+    ]
+    return max(candidates, key=len) if candidates else None
+
+
+def _build_answer_prompt(intent: Intent, result: dict, message: str, language: str) -> str:
+    if intent == "fraud_check":
+        task = "You checked the message the user shared for signs of fraud. The analysis result is:"
+    else:
+        task = "You extracted structured information from the document text the user shared. The extraction result is:"
+    prompt = f"""
+    You are Helios, a helpful and friendly AI financial companion for users in India.
+    The user wrote:
+    ---
+    "{message}"
+    ---
+    {task}
+    {json.dumps(result, ensure_ascii=False)}
+
+    Reply to the user in {language}, in a short, helpful, conversational way, based only on this result.
+    Do not mention tools, JSON or the analysis process.
+    """
+    return prompt
+
+
+class RouterStats:
+    """Counts routing decisions and measures the latency of each route."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._requests: Counter[str] = Counter()
+        self._seconds: Counter[str] = Counter()
+
+    def record(self, intent: Intent, seconds: float) -> None:
+        with self._lock:
+            self._requests[intent] += 1
+            self._seconds[intent] += seconds
+
+    def snapshot(self) -> dict:
+        """
+        Returns per-route request counts and mean latency, plus the time saved
+        by direct routes, estimated against the mean latency of the agent.
+        """
+        with self._lock:
+            routes = {
+                intent: {"requests": count, "avg_ms": round(self._seconds[intent] / count * 1000, 1)}
+                for intent, count in self._requests.items()
+            }
+            seconds_saved = None
+            if self._requests["agent"]:
+                agent_avg = self._seconds["agent"] / self._requests["agent"]
+                seconds_saved = round(sum(
+                    agent_avg * count - self._seconds[intent]
+                    for intent, count in self._requests.items() if intent != "agent"
+                ), 3)
+        return {"routes": routes, "estimated_seconds_saved": seconds_saved}
+
+
+router_stats = RouterStats()
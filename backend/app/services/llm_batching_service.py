@@ -0,0 +1,212 @@
+import asyncio
+import contextvars
+import json
+import logging
+from collections import Counter
+from typing import Any, Awaitable, Callable
+
+from backend.app.core.config import settings
+from backend.app.services.chat_service import generate_gemini_response_async
+from backend.app.services.llm_gateway_service import current_user_id, gemini_gateway
+
+_coalescers: list["LLMBatchCoalescer"] = []
+
+
+class LLMBatchCoalescer:
+    """
+    Coalesces concurrent AI requests of one kind (fraud checks, vendor
+    categorization, ...) into a single multi-item prompt.
+
+    The first request opens a batch; requests arriving within `window_seconds`
+    join it, and it is sent early once it holds `max_batch_size` items. The
+    JSON answer is split back out to each waiting caller. Items whose part of
+    the answer is missing or malformed are retried on their own with
+    `run_single`, which is also used for batches of one.
+
+    Must be used from a single event loop (the application's).
+    """
+
+    def __init__(
+        self,
+        kind: str,
+        build_batch_prompt: Callable[[list], str],
+        parse_batch_response: Callable[[str, int], list],
+        run_single: Callable[[Any], Awaitable[Any]],
+        window_seconds: float = settings.LLM_BATCH_WINDOW_SECONDS,
+        max_batch_size: int = settings.LLM_BATCH_MAX_SIZE,
+        enabled: bool = settings.LLM_BATCHING_ENABLED,
+    ):
+        """
+        Args:
+            kind: Name of the request kind, used in metrics.
+            build_batch_prompt: Builds one prompt for a list of items.
+            parse_batch_response: Splits the model's answer into one result per
+                item, in order, with None for items it could not parse.
+            run_single: Handles one item with its own AI call.
+        """
+        self.kind = kind
+        self.build_batch_prompt = build_batch_prompt
+        self.parse_batch_response = parse_batch_response
+        self.run_single = run_single
+        self.window_seconds = window_seconds
+        self.max_batch_size = max_batch_size
+        self.enabled = enabled
+        self._pending: list[tuple[Any, asyncio.Future]] = []
+        self._pending_loop: asyncio.AbstractEventLoop | None = None
+        self._timer: asyncio.TimerHandle | None = None
+        self._tasks: set[asyncio.Task] = set()
+        self._counters: Counter[str] = Counter()
+        self._batch_sizes: Counter[int] = Counter()
+        _coalescers.append(self)
+
+    async def submit(self, item: Any) -> Any:
+        """Queues an item for the next batch and returns its result."""
+        if not self.enabled or self.max_batch_size <= 1:
+            self._counters["requests"] += 1
+            self._counters["llm_calls"] += 1
+            return await self.run_single(item)
+
+        # A batch mixes users, so each caller is charged here, against their
+        # own budget, and the batch itself is sent with no current user
+        await self._charge_current_user()
+        return await self._enqueue(item)
+
+    async def submit_many(self, items: list) -> list:
+        """
+        Queues many items of one caller (e.g. the payees of an imported
+        statement) and returns their results in order, with the exception in
+        place of an item that failed. The caller's budget is charged once for
+        the whole call rather than once per item, which would exhaust it long
+        before the items are sent.
+
+        Raises:
+            LLMRateLimitedError: If the caller has used up their budget.
+        """
+        if not items:
+            return []
+        await self._charge_current_user()
+        context = contextvars.copy_context()
+        context.run(current_user_id.set, None)
+        if not self.enabled or self.max_batch_size <= 1:
+            self._counters["requests"] += len(items)
+            self._counters["llm_calls"] += len(items)
+            run = self.run_single
+        else:
+            run = self._enqueue
+        loop = asyncio.get_running_loop()
+        return await asyncio.gather(*(loop.create_task(run(item), context=context) for item in items), return_exceptions=True)
+
+    async def _charge_current_user(self) -> None:
+        wait = gemini_gateway.reserve_user_request()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    async def _enqueue(self, item: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        if self._pending_loop is not loop:
+            # First use, or a new event loop (the old one's batch can never run)
+            self._pending, self._timer, self._pending_loop = [], None, loop
+
+        future = loop.create_future()
+        self._pending.append((item, future))
+        self._counters["requests"] += 1
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window_seconds, self._flush)
+        return await future
+
+    def stats(self) -> dict:
+        """Returns request/call counters and the batch-size distribution."""
+        return {**self._counters, "batch_sizes": dict(sorted(self._batch_sizes.items()))}
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        context = contextvars.copy_context()
+        context.run(current_user_id.set, None)
+        task = asyncio.get_running_loop().create_task(self._run_batch(batch), context=context)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run_batch(self, batch: list[tuple[Any, asyncio.Future]]) -> None:
+        items = [item for item, _ in batch]
+        self._batch_sizes[len(batch)] += 1
+        self._counters["batches"] += 1
+        try:
+            if len(batch) == 1:
+                results = [None]
+            else:
+                self._counters["llm_calls"] += 1
+                results = self.parse_batch_response(
+                    await generate_gemini_response_async(self.build_batch_prompt(items)), len(items)
+                )
+
+            retried = [i for i, result in enumerate(results) if result is None]
+            self._counters["llm_calls"] += len(retried)
+            if len(batch) > 1:
+                self._counters["fallbacks"] += len(retried)
+            retried_results = await asyncio.gather(
+                *(self.run_single(items[i]) for i in retried), return_exceptions=True
+            )
+            for i, result in zip(retried, retried_results):
+                results[i] = result
+
+            for (_, future), result in zip(batch, results):
+                if future.done():
+                    continue
+                if isinstance(result, BaseException):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+        except Exception as e:
+            logging.error(f"Error processing a batch of {len(batch)} '{self.kind}' requests: {e}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+
+
+def parse_indexed_json_array(ai_response_str: str, item_count: int, parse_item: Callable[[dict], Any]) -> list:
+    """
+    Parses a batch answer of the form [{"index": 0, ...}, ...].
+
+    Args:
+        ai_response_str: The model's answer.
+        item_count: Number of items in the batch.
+        parse_item: Turns one object into a result, returning None (or
+            raising ValueError/KeyError/TypeError) if it is malformed.
+
+    Returns:
+        One result per item, in order, with None where no valid object was found.
+    """
+    results: list = [None] * item_count
+    try:
+        if ai_response_str.strip().startswith("```json"):
+            ai_response_str = ai_response_str.strip()[7:-3]
+        objects = json.loads(ai_response_str)
+        if not isinstance(objects, list):
+            raise ValueError("AI response is not a JSON array.")
+    except (json.JSONDecodeError, ValueError) as e:
+        logging.error(f"Error processing batched AI response: {e}")
+        return results
+
+    for obj in objects:
+        if not isinstance(obj, dict):
+            continue
+        index = obj.get("index")
+        if not isinstance(index, int) or not 0 <= index < item_count:
+            continue
+        try:
+            results[index] = parse_item(obj)
+        except (ValueError, KeyError, TypeError):
+            continue
+    return results
+
+
+def coalescer_stats() -> dict:
+    """Returns the stats of every coalescer, by kind."""
+    return {coalescer.kind: coalescer.stats() for coalescer in _coalescers}
@@ -0,0 +1,622 @@
+import asyncio
+import concurrent.futures
+import contextvars
+import logging
+import random
+import statistics
+import threading
+import time
+from collections import Counter, OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Awaitable, Callable, Iterable, Iterator, TypeVar
+
+import httpx
+from google.genai import errors as genai_errors
+
+from backend.app.core.config import settings
+
+try:
+    # Errors of the older Google SDK used by langchain-google-genai (the agent's model)
+    from google.api_core import exceptions as google_api_exceptions
+except ImportError:
+    google_api_exceptions = None
+
+T = TypeVar("T")
+
+# Set per request by deps.get_current_user, so per-user limits apply without
+# threading the user through every service call.
+current_user_id: contextvars.ContextVar[int | None] = contextvars.ContextVar("llm_current_user_id", default=None)
+
+# Provider responses worth retrying: timeouts, rate limits and server errors
+_RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+# Per-user buckets kept in memory; the least recently used are dropped beyond this
+_MAX_USER_BUCKETS = 10_000
+
+# Latency samples kept for the p50/p99 metrics
+_LATENCY_SAMPLES = 1000
+
+
+class LLMUnavailableError(Exception):
+    """
+    Raised when an AI provider cannot serve a request right now: it kept
+    failing after retries, its circuit breaker is open, or a rate limit would
+    make the caller wait too long. Endpoints answer 503 instead of returning a
+    made-up result.
+    """
+
+    def __init__(self, message: str, retry_after: float | None = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class LLMRateLimitedError(LLMUnavailableError):
+    """Raised when the current user has used up their own AI request budget (answered with 429)."""
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Returns True for transient provider errors: timeouts, rate limits, 5xx and connection failures."""
+    if isinstance(error, genai_errors.APIError):
+        return error.code in _RETRYABLE_STATUS_CODES
+    if google_api_exceptions is not None and isinstance(error, google_api_exceptions.GoogleAPICallError):
+        return error.code in _RETRYABLE_STATUS_CODES
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code in _RETRYABLE_STATUS_CODES
+    return isinstance(error, (httpx.TransportError, asyncio.TimeoutError, TimeoutError, ConnectionError))
+
+
+class TokenBucket:
+    """Token-bucket rate limiter. Reservations may overdraw it; the caller then waits."""
+
+    def __init__(self, requests_per_minute: float):
+        self.rate = requests_per_minute / 60
+        # Bursts of up to ten seconds' worth of requests
+        self.capacity = max(1.0, self.rate * 10)
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Takes a token and returns how many seconds to wait before using it."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+            self._updated_at = now
+            self._tokens -= 1
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def refund(self) -> None:
+        """Returns a token taken by a reservation that was given up."""
+        with self._lock:
+            self._tokens = min(self.capacity, self._tokens + 1)
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failed calls, so callers fail fast
+    instead of queueing behind a provider that is down. After `reset_seconds`
+    one probe request is let through; its outcome closes or reopens the circuit.
+    """
+
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def check_open(self) -> None:
+        """Raises LLMUnavailableError while the circuit is open, without claiming the probe."""
+        with self._lock:
+            remaining = self._opened_at + self.reset_seconds - time.monotonic()
+            if self.state == "open" and remaining > 0:
+                raise LLMUnavailableError("The AI service circuit breaker is open.", retry_after=remaining)
+
+    def before_call(self) -> None:
+        """Raises LLMUnavailableError if the circuit does not allow a call now."""
+        with self._lock:
+            if self.state == "open":
+                remaining = self._opened_at + self.reset_seconds - time.monotonic()
+                if remaining > 0:
+                    raise LLMUnavailableError("The AI service circuit breaker is open.", retry_after=remaining)
+                self.state = "half_open"
+            if self.state == "half_open":
+                if self._probe_in_flight:
+                    raise LLMUnavailableError("The AI service is recovering.", retry_after=self.reset_seconds)
+                self._probe_in_flight = True
+
+    def release_probe(self) -> None:
+        """
+        Gives up the half-open probe of a call that ended without an outcome
+        (e.g. it was cancelled), so the next call can probe instead.
+        """
+        with self._lock:
+            if self.state == "half_open":
+                self._probe_in_flight = False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = "closed"
+            self._failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._probe_in_flight = False
+            if self.state == "half_open" or self._failures >= self.failure_threshold:
+                self.state = "open"
+                self._opened_at = time.monotonic()
+
+
+class _Waiter:
+    def __init__(self, wake: Callable[[], None]):
+        self.wake = wake
+        self.granted = False
+        self.abandoned = False
+
+
+class _ConcurrencyLimiter:
+    """
+    Counting semaphore usable from both threads and coroutines, so the sync
+    and async call paths share one concurrency limit. Slots are handed to
+    waiters in arrival order.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.active = 0
+        self._waiters: deque[_Waiter] = deque()
+        self._lock = threading.Lock()
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    def acquire_now(self) -> None:
+        """Takes a slot even if none is free, e.g. for a call that is still running after being given up."""
+        with self._lock:
+            self.active += 1
+
+    def try_acquire(self) -> bool:
+        with self._lock:
+            if self.active < self.limit and not self._waiters:
+                self.active += 1
+                return True
+            return False
+
+    def acquire_sync(self, timeout: float) -> bool:
+        event = threading.Event()
+        with self._lock:
+            if self.active < self.limit and not self._waiters:
+                self.active += 1
+                return True
+            waiter = _Waiter(event.set)
+            self._waiters.append(waiter)
+        event.wait(timeout)
+        return self._settle(waiter)
+
+    async def acquire_async(self, timeout: float) -> bool:
+        loop = asyncio.get_running_loop()
+        event = asyncio.Event()
+        with self._lock:
+            if self.active < self.limit and not self._waiters:
+                self.active += 1
+                return True
+            waiter = _Waiter(lambda: loop.call_soon_threadsafe(event.set))
+            self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        except asyncio.CancelledError:
+            if self._settle(waiter):
+                self.release()
+            raise
+        return self._settle(waiter)
+
+    def release(self) -> None:
+        with self._lock:
+            while self._waiters:
+                waiter = self._waiters.popleft()
+                if not waiter.abandoned:
+                    # The slot passes straight to the waiter; `active` is unchanged
+                    waiter.granted = True
+                    waiter.wake()
+                    return
+            self.active -= 1
+
+    def _settle(self, waiter: _Waiter) -> bool:
+        # A slot may have been granted right as the wait timed out
+        with self._lock:
+            if waiter.granted:
+                return True
+            waiter.abandoned = True
+            try:
+                self._waiters.remove(waiter)
+            except ValueError:
+                pass
+            return False
+
+
+class LLMGateway:
+    """
+    Single entry point for calls to one AI provider. Every call goes through:
+      1. the circuit breaker (fast-fail while the provider is down),
+      2. token buckets for the provider and for the current user,
+      3. a concurrency limit shared by sync and async callers,
+      4. retries with full-jitter exponential backoff on transient errors,
+      5. optionally, a hedged duplicate request when the first is slow (async only).
+    Errors that retrying cannot fix (e.g. a malformed request) are re-raised
+    unchanged; everything else surfaces as LLMUnavailableError.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_concurrency: int,
+        requests_per_minute: float,
+        user_requests_per_minute: float,
+        queue_timeout_seconds: float = settings.LLM_QUEUE_TIMEOUT_SECONDS,
+        request_timeout_seconds: float = settings.LLM_REQUEST_TIMEOUT_SECONDS,
+        max_retries: int = settings.LLM_MAX_RETRIES,
+        retry_base_seconds: float = settings.LLM_RETRY_BASE_SECONDS,
+        retry_max_seconds: float = settings.LLM_RETRY_MAX_SECONDS,
+        hedge_after_seconds: float | None = settings.LLM_HEDGE_AFTER_SECONDS,
+        failure_threshold: int = settings.LLM_CIRCUIT_FAILURE_THRESHOLD,
+        reset_seconds: float = settings.LLM_CIRCUIT_RESET_SECONDS,
+    ):
+        self.name = name
+        self.user_requests_per_minute = user_requests_per_minute
+        self.queue_timeout_seconds = queue_timeout_seconds
+        self.request_timeout_seconds = request_timeout_seconds
+        self.max_retries = max_retries
+        self.retry_base_seconds = retry_base_seconds
+        self.retry_max_seconds = retry_max_seconds
+        self.hedge_after_seconds = hedge_after_seconds
+        self.breaker = CircuitBreaker(failure_threshold, reset_seconds)
+        self._slots = _ConcurrencyLimiter(max_concurrency)
+        # Runs the attempts of call_sync; every running attempt holds a slot,
+        # and a caller can leave one timed-out attempt behind per retry
+        self._sync_pool = ThreadPoolExecutor(
+            max_workers=max_concurrency * (max_retries + 1), thread_name_prefix=f"helios-llm-{name.lower()}"
+        )
+        self._bucket = TokenBucket(requests_per_minute)
+        self._user_buckets: OrderedDict[int, TokenBucket] = OrderedDict()
+        self._lock = threading.Lock()
+        self._rate_waiting = 0
+        self._counters: Counter[str] = Counter()
+        self._latencies: deque[float] = deque(maxlen=_LATENCY_SAMPLES)
+
+    async def call(self, func: Callable[[], Awaitable[T]]) -> T:
+        """Runs an async provider call, e.g. `lambda: client.aio.models.generate_content(...)`."""
+        wait = self._admit()
+        if wait > 0:
+            self._track_rate_wait(1)
+            try:
+                await asyncio.sleep(wait)
+            finally:
+                self._track_rate_wait(-1)
+        if not await self._slots.acquire_async(self.queue_timeout_seconds):
+            self._reject("concurrency queue timeout")
+
+        start = time.perf_counter()
+        try:
+            self.breaker.before_call()
+            try:
+                for attempt in range(self.max_retries + 1):
+                    try:
+                        result = await self._attempt(func)
+                    except Exception as e:
+                        await asyncio.sleep(self._handle_failure(e, attempt))
+                    else:
+                        self.breaker.record_success()
+                        return result
+                raise AssertionError("unreachable")
+            except BaseException:
+                # Cancelled (client gone, outer timeout) or failed without an
+                # outcome; a claimed half-open probe must not stay claimed
+                self.breaker.release_probe()
+                raise
+        finally:
+            self._slots.release()
+            self._record_latency(time.perf_counter() - start)
+
+    def call_sync(self, func: Callable[[], T]) -> T:
+        """Runs a blocking provider call, e.g. `lambda: client.models.generate_content(...)`."""
+        wait = self._admit()
+        if wait > 0:
+            self._track_rate_wait(1)
+            try:
+                time.sleep(wait)
+            finally:
+                self._track_rate_wait(-1)
+        if not self._slots.acquire_sync(self.queue_timeout_seconds):
+            self._reject("concurrency queue timeout")
+
+        start = time.perf_counter()
+        try:
+            self.breaker.before_call()
+            try:
+                for attempt in range(self.max_retries + 1):
+                    try:
+                        result = self._attempt_sync(func)
+                    except Exception as e:
+                        time.sleep(self._handle_failure(e, attempt))
+                    else:
+                        self.breaker.record_success()
+                        return result
+                raise AssertionError("unreachable")
+            except BaseException:
+                self.breaker.release_probe()
+                raise
+        finally:
+            self._slots.release()
+            self._record_latency(time.perf_counter() - start)
+
+    async def stream(self, func: Callable[[], Awaitable[AsyncIterator[T]]]) -> AsyncIterator[T]:
+        """
+        Streams items from a provider call, e.g. `lambda:
+        client.aio.models.generate_content_stream(...)`. Failures are retried
+        only until the first item has been yielded.
+        """
+        wait = self._admit()
+        if wait > 0:
+            self._track_rate_wait(1)
+            try:
+                await asyncio.sleep(wait)
+            finally:
+                self._track_rate_wait(-1)
+        if not await self._slots.acquire_async(self.queue_timeout_seconds):
+            self._reject("concurrency queue timeout")
+
+        start = time.perf_counter()
+        try:
+            self.breaker.before_call()
+            for attempt in range(self.max_retries + 1):
+                started = False
+                try:
+                    async for item in await func():
+                        started = True
+                        yield item
+                except Exception as e:
+                    if not started:
+                        await asyncio.sleep(self._handle_failure(e, attempt))
+                        continue
+                    if is_retryable(e):
+                        self.breaker.record_failure()
+                        raise LLMUnavailableError(f"The {self.name} stream was interrupted.") from e
+                    self.breaker.record_success()
+                    raise
+                except BaseException:
+                    # The consumer stopped reading; the provider was answering
+                    self.breaker.record_success()
+                    raise
+                else:
+                    self.breaker.record_success()
+                    return
+        finally:
+            self._slots.release()
+            self._record_latency(time.perf_counter() - start)
+
+    def stream_sync(self, func: Callable[[], Iterable[T]]) -> Iterator[T]:
+        """
+        Blocking counterpart of `stream`, for SDKs whose streams are plain
+        iterators. Items are yielded as they arrive; failures are retried only
+        until the first item has been yielded.
+        """
+        wait = self._admit()
+        if wait > 0:
+            self._track_rate_wait(1)
+            try:
+                time.sleep(wait)
+            finally:
+                self._track_rate_wait(-1)
+        if not self._slots.acquire_sync(self.queue_timeout_seconds):
+            self._reject("concurrency queue timeout")
+
+        start = time.perf_counter()
+        try:
+            self.breaker.before_call()
+            for attempt in range(self.max_retries + 1):
+                started = False
+                try:
+                    for item in func():
+                        started = True
+                        yield item
+                except Exception as e:
+                    if not started:
+                        time.sleep(self._handle_failure(e, attempt))
+                        continue
+                    if is_retryable(e):
+                        self.breaker.record_failure()
+                        raise LLMUnavailableError(f"The {self.name} stream was interrupted.") from e
+                    self.breaker.record_success()
+                    raise
+                except BaseException:
+                    # The consumer stopped reading; the provider was answering
+                    self.breaker.record_success()
+                    raise
+                else:
+                    self.breaker.record_success()
+                    return
+        finally:
+            self._slots.release()
+            self._record_latency(time.perf_counter() - start)
+
+    def stats(self) -> dict:
+        """Returns queue depth, in-flight calls, counters, circuit state and latency percentiles."""
+        with self._lock:
+            latencies = sorted(self._latencies)
+            counters = dict(self._counters)
+            rate_waiting = self._rate_waiting
+        latency = {}
+        if latencies:
+            latency = {
+                "p50_ms": round(statistics.median(latencies) * 1000, 1),
+                "p99_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000, 1),
+            }
+        return {
+            "in_flight": self._slots.active,
+            "queue_depth": self._slots.waiting + rate_waiting,
+            "circuit": self.breaker.state,
+            **counters,
+            "latency": latency,
+        }
+
+    def reserve_user_request(self) -> float:
+        """
+        Charges one request to the current user's budget, for work sent on
+        their behalf outside a gateway call in their own context (e.g. as part
+        of a batched prompt shared with other users, which then runs with no
+        current user). Does nothing when there is no current user.
+
+        Returns:
+            How many seconds to wait before the request may be sent.
+
+        Raises:
+            LLMRateLimitedError: If the user has used up their budget.
+        """
+        user_id = current_user_id.get()
+        if user_id is None:
+            return 0.0
+        user_bucket = self._user_bucket(user_id)
+        wait = user_bucket.reserve()
+        if wait > self.queue_timeout_seconds:
+            user_bucket.refund()
+            with self._lock:
+                self._counters["user_rate_limited"] += 1
+            raise LLMRateLimitedError("Too many AI requests for this user.", retry_after=wait)
+        return wait
+
+    def _admit(self) -> float:
+        # Fails fast when the circuit is open, and reserves rate-limit tokens.
+        # Returns how long to wait for them.
+        with self._lock:
+            self._counters["requests"] += 1
+        try:
+            self.breaker.check_open()
+        except LLMUnavailableError:
+            with self._lock:
+                self._counters["fast_failed"] += 1
+            raise
+
+        user_id = current_user_id.get()
+        user_wait = self.reserve_user_request()
+
+        wait = self._bucket.reserve()
+        if wait > self.queue_timeout_seconds:
+            self._bucket.refund()
+            if user_id is not None:
+                self._user_bucket(user_id).refund()
+            self._reject("provider rate limit", retry_after=wait)
+        return max(wait, user_wait)
+
+    async def _attempt(self, func: Callable[[], Awaitable[T]]) -> T:
+        first = asyncio.ensure_future(asyncio.wait_for(func(), self.request_timeout_seconds))
+        if self.hedge_after_seconds is None:
+            return await first
+        done, _ = await asyncio.wait({first}, timeout=self.hedge_after_seconds)
+        if done or not self._slots.try_acquire():
+            return await first
+
+        with self._lock:
+            self._counters["hedges"] += 1
+        second = asyncio.ensure_future(asyncio.wait_for(func(), self.request_timeout_seconds))
+        try:
+            pending = {first, second}
+            error: BaseException | None = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is second:
+                            with self._lock:
+                                self._counters["hedge_wins"] += 1
+                        return task.result()
+                    error = task.exception()
+            assert error is not None
+            raise error
+        finally:
+            first.cancel()
+            second.cancel()
+            self._slots.release()
+
+    def _attempt_sync(self, func: Callable[[], T]) -> T:
+        # A blocking call cannot be interrupted, so it runs on a worker thread
+        # that the caller stops waiting for after request_timeout_seconds.
+        # A call given up on keeps a concurrency slot until it really ends.
+        future = self._sync_pool.submit(contextvars.copy_context().run, func)
+        try:
+            return future.result(timeout=self.request_timeout_seconds)
+        except concurrent.futures.TimeoutError:
+            self._slots.acquire_now()
+            future.add_done_callback(lambda _: self._slots.release())
+            raise TimeoutError(f"The {self.name} call timed out after {self.request_timeout_seconds}s.")
+
+    def _handle_failure(self, error: Exception, attempt: int) -> float:
+        # Re-raises unless the error is transient and attempts remain;
+        # otherwise returns the backoff delay before the next attempt.
+        if isinstance(error, LLMUnavailableError):
+            raise error
+        if not is_retryable(error):
+            # The provider answered; the request itself is at fault
+            self.breaker.record_success()
+            raise error
+        with self._lock:
+            self._counters["failures"] += 1
+        if attempt >= self.max_retries:
+            # The breaker counts calls that failed for good, not attempts
+            self.breaker.record_failure()
+            logging.error(f"{self.name} call failed after {attempt + 1} attempts: {error}")
+            raise LLMUnavailableError(f"The {self.name} service is unavailable.") from error
+        with self._lock:
+            self._counters["retries"] += 1
+        return random.uniform(0, min(self.retry_max_seconds, self.retry_base_seconds * 2 ** attempt))
+
+    def _reject(self, reason: str, retry_after: float | None = None) -> None:
+        with self._lock:
+            self._counters["rejected"] += 1
+        raise LLMUnavailableError(f"The {self.name} service is overloaded ({reason}).", retry_after=retry_after)
+
+    def _user_bucket(self, user_id: int) -> TokenBucket:
+        with self._lock:
+            bucket = self._user_buckets.get(user_id)
+            if bucket is None:
+                bucket = self._user_buckets[user_id] = TokenBucket(self.user_requests_per_minute)
+                while len(self._user_buckets) > _MAX_USER_BUCKETS:
+                    self._user_buckets.popitem(last=False)
+            self._user_buckets.move_to_end(user_id)
+            return bucket
+
+    def _track_rate_wait(self, delta: int) -> None:
+        with self._lock:
+            self._rate_waiting += delta
+
+    def _record_latency(self, seconds: float) -> None:
+        with self._lock:
+            self._latencies.append(seconds)
+
+
+gemini_gateway = LLMGateway(
+    "Gemini",
+    max_concurrency=settings.LLM_MAX_CONCURRENCY,
+    requests_per_minute=settings.LLM_REQUESTS_PER_MINUTE,
+    user_requests_per_minute=settings.LLM_USER_REQUESTS_PER_MINUTE,
+)
+
+ondemand_gateway = LLMGateway(
+    "On-Demand",
+    max_concurrency=settings.ONDEMAND_MAX_CONCURRENCY,
+    requests_per_minute=settings.ONDEMAND_REQUESTS_PER_MINUTE,
+    user_requests_per_minute=settings.LLM_USER_REQUESTS_PER_MINUTE,
+    # The insights endpoint's HTTP client allows On-Demand queries 90 seconds
+    request_timeout_seconds=90,
+)
+
+
+def gateway_stats() -> dict:
+    """Returns the stats of every gateway, by provider."""
+    return {gateway.name: gateway.stats() for gateway in (gemini_gateway, ondemand_gateway)}
@@ -0,0 +1,358 @@
+import asyncio
+import ipaddress
+import json
+import logging
+import os
+import queue
+import socket
+import threading
+import uuid
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from backend.app.core.config import settings
+from backend.app.schemas.transactions import Transaction as TransactionSchema
+from backend.app.services import document_pipeline_service
+from backend.app.services.llm_gateway_service import LLMUnavailableError, current_user_id
+from backend.db import crud, session
+from backend.models.ocr_job import OcrJob
+
+_queue: queue.Queue = queue.Queue(maxsize=settings.OCR_JOB_QUEUE_SIZE)
+_workers: list[threading.Thread] = []
+_STOP = object()
+# Identifies this process in the lease of the jobs it runs
+WORKER_ID = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+_leased_jobs: set[str] = set()
+_leased_jobs_lock = threading.Lock()
+# Set on shutdown: workers stop taking jobs and the lease thread exits
+_stopping = threading.Event()
+# The application's event loop; job pipelines are run on it (see _run_job)
+_loop: asyncio.AbstractEventLoop | None = None
+
+
+class JobQueueFullError(Exception):
+    """Raised when a job is submitted while the queue is at capacity."""
+
+
+class InvalidCallbackUrlError(ValueError):
+    """Raised when a callback URL is not https or points at a non-public address."""
+
+
+def validate_callback_url(callback_url: str) -> list[str]:
+    """
+    Checks that a job callback URL is safe for the server to POST to: https,
+    a host from OCR_JOB_CALLBACK_ALLOWED_HOSTS when that is set, and a host
+    that resolves to public addresses only (no private, loopback, link-local
+    or reserved ranges), so callbacks cannot reach internal services.
+    Resolves the host, so it blocks; call it off the event loop.
+
+    Returns:
+        The addresses the host resolved to, all of them public.
+
+    Raises:
+        InvalidCallbackUrlError: If the URL fails any of these checks.
+    """
+    try:
+        parts = urlsplit(callback_url)
+        port = parts.port
+    except ValueError:
+        raise InvalidCallbackUrlError("The callback URL is malformed.")
+    if parts.scheme != "https" or not parts.hostname:
+        raise InvalidCallbackUrlError("The callback URL must be an https URL.")
+    if parts.username or parts.password:
+        raise InvalidCallbackUrlError("The callback URL must not contain credentials.")
+
+    host = parts.hostname.rstrip(".").lower()
+    allowed_hosts = [allowed.lower() for allowed in settings.OCR_JOB_CALLBACK_ALLOWED_HOSTS]
+    if allowed_hosts and host not in allowed_hosts:
+        raise InvalidCallbackUrlError("The callback URL's host is not allowed.")
+
+    try:
+        addresses = {info[4][0] for info in socket.getaddrinfo(host, port or 443, proto=socket.IPPROTO_TCP)}
+    except (socket.gaierror, UnicodeError):
+        raise InvalidCallbackUrlError("The callback URL's host could not be resolved.")
+    for address in addresses:
+        ip = ipaddress.ip_address(address.split("%", 1)[0])
+        if isinstance(ip, ipaddress.IPv6Address) and ip.ipv4_mapped:
+            ip = ip.ipv4_mapped
+        if not ip.is_global or ip.is_multicast:
+            raise InvalidCallbackUrlError("The callback URL must point at a public address.")
+    return sorted(addresses)
+
+
+def submit_job(
+    *,
+    owner_id: int,
+    kind: str,
+    file_bytes: bytes,
+    filename: str,
+    content_type: str | None,
+    callback_url: str | None = None,
+) -> OcrJob:
+    """
+    Spools the upload to disk, records a queued job and hands it to the workers.
+    The callback URL, if any, must already have passed validate_callback_url.
+
+    Raises:
+        JobQueueFullError: If the queue is full; the caller should retry later.
+    """
+    if _queue.full():
+        raise JobQueueFullError()
+
+    job_id = uuid.uuid4().hex
+    os.makedirs(settings.OCR_JOB_SPOOL_DIR, exist_ok=True)
+    input_path = os.path.join(settings.OCR_JOB_SPOOL_DIR, job_id)
+    with open(input_path, "wb") as f:
+        f.write(file_bytes)
+
+    db = session.SessionLocal()
+    try:
+        job = crud.create_ocr_job(db, OcrJob(
+            id=job_id,
+            kind=kind,
+            status="queued",
+            filename=filename,
+            content_type=content_type,
+            input_path=input_path,
+            callback_url=callback_url,
+            owner_id=owner_id,
+        ))
+        try:
+            _queue.put_nowait(job_id)
+        except queue.Full:
+            # Lost the race for the last slot; undo the submission.
+            crud.delete_ocr_job(db, job)
+            os.remove(input_path)
+            raise JobQueueFullError()
+        return job
+    finally:
+        db.close()
+
+
+def get_job(job_id: str, owner_id: int) -> OcrJob | None:
+    """Returns a job if it exists and belongs to the given user."""
+    db = session.SessionLocal()
+    try:
+        job = crud.get_ocr_job(db, job_id)
+        if job is None or job.owner_id != owner_id:  # type: ignore
+            return None
+        return job
+    finally:
+        db.close()
+
+
+def start_workers() -> None:
+    """
+    Starts the worker threads and the lease thread, and re-enqueues queued
+    jobs and running jobs whose worker process is gone (their lease expired).
+    Jobs running in other live processes keep their lease and are not touched.
+    Called on application startup, from the application's event loop.
+    """
+    global _loop
+    _loop = asyncio.get_running_loop()
+
+    for i in range(settings.OCR_JOB_WORKERS):
+        worker = threading.Thread(target=_worker_loop, name=f"ocr-job-worker-{i}", daemon=True)
+        worker.start()
+        _workers.append(worker)
+
+    db = session.SessionLocal()
+    try:
+        crud.requeue_expired_ocr_jobs(db)
+        pending = crud.get_queued_ocr_job_ids(db)
+    finally:
+        db.close()
+    _stopping.clear()
+    threading.Thread(target=_lease_loop, name="ocr-job-lease", daemon=True).start()
+    if pending:
+        logging.info(f"Re-enqueueing {len(pending)} unfinished OCR jobs.")
+        _enqueue_in_background(pending)
+
+
+def stop_workers() -> None:
+    """
+    Asks the worker threads to exit once their current job is finished,
+    without blocking: called from the application's event loop, which the
+    workers' running jobs need. Jobs waiting in the queue stay queued in the
+    database and are picked up again on the next start.
+    """
+    _stopping.set()
+    while True:
+        try:
+            _queue.get_nowait()
+        except queue.Empty:
+            break
+    for _ in _workers:
+        try:
+            _queue.put_nowait(_STOP)
+        except queue.Full:
+            # Refilled by a re-enqueueing thread; workers see _stopping on their next get
+            break
+    _workers.clear()
+
+
+def queue_depth() -> int:
+    """Returns the number of jobs waiting for a worker."""
+    return _queue.qsize()
+
+
+def _enqueue_in_background(job_ids: list[str]) -> None:
+    # put() blocks while the queue is full, so feed it from a side thread
+    def feed() -> None:
+        for job_id in job_ids:
+            if _stopping.is_set():
+                return
+            _queue.put(job_id)
+
+    threading.Thread(target=feed, daemon=True).start()
+
+
+def _lease_loop() -> None:
+    """
+    Renews the leases of the jobs this process is running and requeues jobs
+    whose lease expired in a process that died, every third of the lease.
+    """
+    while not _stopping.wait(settings.OCR_JOB_LEASE_SECONDS / 3):
+        db = session.SessionLocal()
+        try:
+            with _leased_jobs_lock:
+                job_ids = list(_leased_jobs)
+            if job_ids:
+                crud.renew_ocr_job_leases(db, WORKER_ID, job_ids, settings.OCR_JOB_LEASE_SECONDS)
+            expired = crud.requeue_expired_ocr_jobs(db)
+            if expired:
+                logging.info(f"Re-enqueueing {len(expired)} OCR jobs whose worker stopped.")
+                _enqueue_in_background(expired)
+        except Exception as e:
+            db.rollback()
+            logging.error(f"Error renewing OCR job leases: {e}")
+        finally:
+            db.close()
+
+
+def _worker_loop() -> None:
+    while True:
+        job_id = _queue.get()
+        if job_id is _STOP or _stopping.is_set():
+            return
+        try:
+            _run_job(job_id)
+        except Exception as e:
+            logging.error(f"Unexpected error in OCR job worker for job {job_id}: {e}")
+
+
+def _run_job(job_id: str) -> None:
+    db = session.SessionLocal()
+    try:
+        job = crud.claim_ocr_job(db, job_id, WORKER_ID, settings.OCR_JOB_LEASE_SECONDS)
+        if job is None:
+            return
+        with _leased_jobs_lock:
+            _leased_jobs.add(job_id)
+
+        try:
+            with open(job.input_path, "rb") as f:  # type: ignore
+                file_bytes = f.read()
+            # Jobs go through the same async pipeline, and so the same pools, as
+            # the synchronous endpoints. They run on the application's loop
+            # because the async Gemini client is bound to the loop it was first
+            # used on.
+            result = asyncio.run_coroutine_threadsafe(_run_pipeline(db, job, file_bytes), _loop).result()  # type: ignore
+            job = crud.update_ocr_job(db, job, status="done", result=json.dumps(result), error=None)
+        except document_pipeline_service.BillProcessingError as e:
+            job = crud.update_ocr_job(db, job, status="failed", error=str(e))
+        except LLMUnavailableError:
+            db.rollback()
+            job = crud.update_ocr_job(
+                db, job, status="failed", error="The AI service is temporarily unavailable. Please resubmit the document later."
+            )
+        except Exception as e:
+            db.rollback()
+            if _stopping.is_set():
+                # The application's loop stopped under the job (cancelled, or
+                # "Event loop is closed"); leave it for the next start
+                crud.release_ocr_job(db, job_id, WORKER_ID)
+                logging.info(f"OCR job {job_id} interrupted by shutdown; queued again.")
+                return
+            logging.error(f"OCR job {job_id} failed: {e}")
+            job = crud.update_ocr_job(db, job, status="failed", error="Could not process the document.")
+
+        if os.path.exists(job.input_path):  # type: ignore
+            os.remove(job.input_path)  # type: ignore
+        if job.callback_url:
+            _send_callback(job)
+    finally:
+        with _leased_jobs_lock:
+            _leased_jobs.discard(job_id)
+        db.close()
+
+
+async def _run_pipeline(db, job: OcrJob, file_bytes: bytes) -> dict:
+    """Runs the same pipeline the synchronous endpoint for this job kind uses."""
+    # Runs as its own task, so this only applies the owner's AI rate limits to this job
+    current_user_id.set(job.owner_id)  # type: ignore
+    if job.kind == "ocr":
+        return await document_pipeline_service.run_ocr_upload(
+            db, file_bytes, filename=job.filename, content_type=job.content_type, owner_id=job.owner_id  # type: ignore
+        )
+    if job.kind == "analyze":
+        return await document_pipeline_service.run_document_analysis(
+            file_bytes, filename=job.filename, content_type=job.content_type  # type: ignore
+        )
+    if job.kind == "process_bill":
+        transaction = await document_pipeline_service.run_bill_processing(
+            db, file_bytes, filename=job.filename, content_type=job.content_type, owner_id=job.owner_id  # type: ignore
+        )
+        return TransactionSchema.model_validate(transaction).model_dump(mode="json")
+    raise ValueError(f"Unknown job kind: {job.kind}")
+
+
+def _send_callback(job: OcrJob) -> None:
+    """
+    POSTs the final job state to the callback URL given at submission. The URL
+    is checked again first, as its host may resolve elsewhere by now, and the
+    request goes to the address just checked (not a fresh DNS answer, which
+    could point inside the network). Redirects are not followed.
+    """
+    try:
+        addresses = validate_callback_url(job.callback_url)  # type: ignore
+    except InvalidCallbackUrlError as e:
+        logging.error(f"Not delivering callback for OCR job {job.id}: {e}")
+        return
+    payload = {
+        "job_id": job.id,
+        "kind": job.kind,
+        "status": job.status,
+        "result": json.loads(job.result) if job.result else None,  # type: ignore
+        "error": job.error,
+    }
+    try:
+        _post_to_address(job.callback_url, addresses[0], json=payload, timeout=10)  # type: ignore
+    except requests.RequestException as e:
+        logging.error(f"Error delivering callback for OCR job {job.id}: {e}")
+
+
+class _PinnedHostAdapter(HTTPAdapter):
+    """Checks the TLS certificate (and sends SNI) for a host name while connecting to an IP address."""
+
+    def __init__(self, hostname: str):
+        self._hostname = hostname
+        super().__init__()
+
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs["server_hostname"] = self._hostname
+        kwargs["assert_hostname"] = self._hostname
+        super().init_poolmanager(*args, **kwargs)
+
+
+def _post_to_address(url: str, address: str, **kwargs) -> requests.Response:
+    """POSTs to an https URL, connecting to the given address of its host instead of resolving it again."""
+    parts = urlsplit(url)
+    ip_host = f"[{address}]" if ":" in address else address
+    pinned_url = parts._replace(netloc=f"{ip_host}:{parts.port or 443}").geturl()
+    host_header = parts.hostname if parts.port in (None, 443) else f"{parts.hostname}:{parts.port}"
+    with requests.Session() as http:
+        http.mount("https://", _PinnedHostAdapter(parts.hostname))  # type: ignore
+        return http.post(pinned_url, headers={"Host": host_header}, allow_redirects=False, **kwargs)  # type: ignore
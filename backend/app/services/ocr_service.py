@@ -1,10 +1,111 @@
+import abc
 import pytesseract
 import fitz # PyMuPDF
 from PIL import Image
 import io
 import json
 import logging
-from backend.app.services.chat_service import generate_gemini_response
+import multiprocessing
+import os
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, Iterator
+from backend.app.core.config import settings
+from backend.app.services import extraction_cache_service
+from backend.app.services.image_preprocessing_service import (
+    choose_pdf_zoom,
+    preprocess_image,
+    preprocessing_stats,
+)
+from backend.app.services.chat_service import generate_gemini_response, generate_gemini_response_async
+from backend.app.services.llm_batching_service import LLMBatchCoalescer, parse_indexed_json_array
+from backend.app.services.prompt_compaction_service import compact_ocr_text
+
+try:
+    import tesserocr  # Optional: in-process bindings to the Tesseract C API
+except ImportError:
+    tesserocr = None
+
+
+# --- OCR backends ---
+
+class OcrBackend(abc.ABC):
+    """Interface of an OCR engine: turns an image into text."""
+    name: str
+
+    @abc.abstractmethod
+    def image_to_string(self, image: Image.Image) -> str:
+        """Recognizes the text of an image."""
+
+
+class PytesseractBackend(OcrBackend):
+    """
+    Runs the `tesseract` CLI through pytesseract. Every call forks a process,
+    writes the image to a temp file and reloads the language model.
+    """
+    name = "pytesseract"
+
+    def image_to_string(self, image: Image.Image) -> str:
+        return pytesseract.image_to_string(image, lang=settings.OCR_LANGUAGE)
+
+
+class TesserocrBackend(OcrBackend):
+    """
+    Keeps a Tesseract engine loaded in-process (tesserocr bindings to the C API)
+    and reuses it across calls. The API object is not thread-safe, so each
+    thread (and therefore each pool worker) lazily gets its own.
+    """
+    name = "tesserocr"
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def _api(self):
+        api = getattr(self._local, "api", None)
+        if api is None:
+            api = tesserocr.PyTessBaseAPI(lang=settings.OCR_LANGUAGE)  # type: ignore
+            self._local.api = api
+        return api
+
+    def image_to_string(self, image: Image.Image) -> str:
+        if image.mode not in ("L", "RGB"):
+            image = image.convert("L")
+        bytes_per_pixel = 1 if image.mode == "L" else 3
+        api = self._api()
+        api.SetImageBytes(image.tobytes(), image.width, image.height, bytes_per_pixel, bytes_per_pixel * image.width)
+        return api.GetUTF8Text()
+
+
+_ocr_backend: OcrBackend | None = None
+_ocr_backend_lock = threading.Lock()
+
+
+def _create_ocr_backend(name: str) -> OcrBackend:
+    if name in ("auto", "tesserocr") and tesserocr is not None:
+        backend = TesserocrBackend()
+        try:
+            backend._api()  # Fail fast if the language data cannot be loaded
+            return backend
+        except Exception as e:
+            logging.error(f"Could not start the in-process Tesseract engine, using pytesseract: {e}")
+    elif name == "tesserocr":
+        logging.warning("OCR_BACKEND is 'tesserocr' but tesserocr is not installed; using pytesseract.")
+    return PytesseractBackend()
+
+
+def get_ocr_backend() -> OcrBackend:
+    """
+    Returns the process-wide OCR backend selected by settings.OCR_BACKEND
+    ('auto', 'tesserocr' or 'pytesseract'). 'auto' prefers the in-process engine
+    and falls back to pytesseract when tesserocr is unavailable.
+    """
+    global _ocr_backend
+    with _ocr_backend_lock:
+        if _ocr_backend is None:
+            _ocr_backend = _create_ocr_backend(settings.OCR_BACKEND)
+        return _ocr_backend
+
 
 def extract_text_from_image(image_bytes: bytes) -> str:
     """
@@ -12,57 +113,379 @@ def extract_text_from_image(image_bytes: bytes) -> str:
     """
     try:
         image = Image.open(io.BytesIO(image_bytes))
-        text = pytesseract.image_to_string(image)
+        image, timings = preprocess_image(image)
+        preprocessing_stats.record(timings)
+        text = get_ocr_backend().image_to_string(image)
         return text
     except Exception as e:
         logging.error(f"Error during OCR processing: {e}")
         return "Error: Could not extract text from the image."
 
-def extract_text_from_pdf(pdf_bytes: bytes) -> str:
+_pdf_ocr_pool: ProcessPoolExecutor | None = None
+_pdf_ocr_pool_lock = threading.Lock()
+
+
+def _get_pdf_ocr_pool() -> ProcessPoolExecutor:
     """
-    Extracts text from a PDF file by converting pages to images and using OCR.
-    Useful for both digital and scanned PDFs.
+    Lazily creates the process pool shared by all PDF OCR requests.
+    The 'spawn' context is used because forking a multi-threaded server
+    process is not safe.
+    """
+    global _pdf_ocr_pool
+    with _pdf_ocr_pool_lock:
+        if _pdf_ocr_pool is None:
+            _pdf_ocr_pool = ProcessPoolExecutor(
+                max_workers=settings.OCR_MAX_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pdf_ocr_pool
+
+
+def shutdown_pdf_ocr_pool() -> None:
+    """Stops the PDF OCR worker processes. Called on application shutdown."""
+    global _pdf_ocr_pool
+    with _pdf_ocr_pool_lock:
+        if _pdf_ocr_pool is not None:
+            _pdf_ocr_pool.shutdown(wait=False, cancel_futures=True)
+            _pdf_ocr_pool = None
+
+
+def _ocr_page(page: fitz.Page) -> tuple[str, dict[str, float]]:
+    """
+    Rasterizes a PDF page straight to 8-bit grayscale and hands the pixmap's
+    sample buffer to the preprocessing/OCR stages without a PNG encode/decode
+    round trip or an extra copy. The pixmap is released on return, so only
+    one page's pixels are alive at a time.
+
+    Returns:
+        The page text and the preprocessing timings.
+    """
+    zoom = choose_pdf_zoom(page.rect.width, page.rect.height)
+    pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), colorspace=fitz.csGRAY, alpha=False)
+    image = Image.frombuffer("L", (pix.width, pix.height), pix.samples_mv, "raw", "L", pix.stride, 1)
+    image, timings = preprocess_image(image)
+    return get_ocr_backend().image_to_string(image), timings
+
+
+def _ocr_pdf_page(pdf_path: str, page_number: int) -> tuple[str, dict[str, float]]:
+    """
+    OCRs a single PDF page. Runs inside a pool worker process, so it must stay
+    a top-level function; the preprocessing timings are returned so the parent
+    can record them. The PDF is read from a file shared by all pages of the
+    request, so the document is not pickled into every page's task.
+    """
+    with fitz.open(pdf_path, filetype="pdf") as doc:
+        return _ocr_page(doc[page_number])
+
+
+def _iter_ocr_pages(pdf_bytes: bytes, page_numbers: list[int], max_workers: int | None = None) -> Iterator[tuple[int, str, dict[str, float]]]:
+    """
+    Returns an iterator of (page_number, text, timings) for the given 0-based
+    pages, in page order, as each one finishes. Multiple pages are submitted to
+    the process pool right away; otherwise the document is opened once and
+    pages are rendered one by one as the iterator is consumed. Call its
+    close() when stopping early, so the pages not reached are not OCR'd.
     """
+    workers = settings.OCR_MAX_WORKERS if max_workers is None else max_workers
+    if len(page_numbers) <= 1 or workers <= 1:
+        return _iter_ocr_pages_serially(pdf_bytes, page_numbers)
+
+    # Written once here and opened by each page's worker, instead of sending
+    # the whole PDF to the pool once per page
+    fd, pdf_path = tempfile.mkstemp(prefix="helios-ocr-", suffix=".pdf")
+    with os.fdopen(fd, "wb") as f:
+        f.write(pdf_bytes)
+    pool = _get_pdf_ocr_pool()
+    futures = []
     try:
-        doc = fitz.open(stream=pdf_bytes, filetype="pdf")
-        text = ""
-        for page in doc:
-            # Set zoom factor for better OCR (e.g., 2.0 = 144 DPI, 3.0 = 216 DPI)
-            zoom = 2.0
-            mat = fitz.Matrix(zoom, zoom)
-            
-            # Convert page to image (pixmap)
-            pix = page.get_pixmap(matrix=mat)
-            
-            # Convert pixmap details to bytes for PIL
-            img_bytes = pix.tobytes("png")
-            
-            # Create PIL Image
-            image = Image.open(io.BytesIO(img_bytes))
-            
-            # Extract text using Tesseract
-            page_text = pytesseract.image_to_string(image)
-            text += page_text + "\n"
-            
-        return text
+        futures = [pool.submit(_ocr_pdf_page, pdf_path, n) for n in page_numbers]
+    finally:
+        _remove_when_done(pdf_path, futures)
+    return _OcrPageResults(page_numbers, futures)
+
+
+class _OcrPageResults:
+    """Results of pages submitted to the process pool, in page order."""
+
+    def __init__(self, page_numbers: list[int], futures: list):
+        self._futures = futures
+        self._pending = zip(page_numbers, futures)
+
+    def __iter__(self) -> "_OcrPageResults":
+        return self
+
+    def __next__(self) -> tuple[int, str, dict[str, float]]:
+        n, future = next(self._pending)
+        return (n, *future.result())
+
+    def close(self) -> None:
+        """Cancels the pages that have not started; a worker cannot be stopped mid-page."""
+        for future in self._futures:
+            future.cancel()
+
+
+def _remove_when_done(path: str, futures: list) -> None:
+    """Deletes a file once all of the futures reading it have finished (or at once if there are none)."""
+    # One extra count, dropped below, so callbacks of futures that are already
+    # done cannot remove the file before every callback is attached
+    remaining = len(futures) + 1
+    lock = threading.Lock()
+
+    def on_done(_) -> None:
+        nonlocal remaining
+        with lock:
+            remaining -= 1
+            if remaining:
+                return
+        try:
+            os.remove(path)
+        except OSError as e:
+            logging.error(f"Error removing temporary PDF {path}: {e}")
+
+    for future in futures:
+        future.add_done_callback(on_done)
+    on_done(None)
+
+
+def _iter_ocr_pages_serially(pdf_bytes: bytes, page_numbers: list[int]) -> Iterator[tuple[int, str, dict[str, float]]]:
+    with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
+        for n in page_numbers:
+            text, timings = _ocr_page(doc[n])
+            yield n, text, timings
+
+
+def _page_text_is_usable(page: fitz.Page, text: str) -> bool:
+    """
+    Decides whether a page's embedded text layer can be trusted instead of OCR.
+    Image-only pages have (almost) no text; pages with broken font encodings
+    come back as replacement/private-use characters or symbol soup. On a
+    scanned page (mostly covered by images) the text must also cover a fair
+    part of the images, so a stamp, footer or watermark does not stand in for
+    the text of the scan.
+    """
+    stripped = "".join(text.split())
+    if len(stripped) < settings.PDF_TEXT_LAYER_MIN_CHARS:
+        return False
+    garbled = sum(
+        1 for ch in stripped
+        if ch == "\ufffd" or not ch.isprintable() or "\ue000" <= ch <= "\uf8ff"
+    )
+    alnum = sum(1 for ch in stripped if ch.isalnum())
+    if garbled / len(stripped) >= 0.05 or alnum / len(stripped) < 0.5:
+        return False
+
+    page_area = page.rect.get_area()
+    # Overlapping images are counted twice, which only makes a page look more scanned
+    image_area = min(page_area, sum((fitz.Rect(image["bbox"]) & page.rect).get_area() for image in page.get_image_info()))
+    if page_area <= 0 or image_area < settings.PDF_SCANNED_PAGE_MIN_IMAGE_COVERAGE * page_area:
+        return True
+    text_area = sum(
+        (fitz.Rect(block[:4]) & page.rect).get_area() for block in page.get_text("blocks") if block[6] == 0
+    )
+    return text_area >= settings.PDF_TEXT_LAYER_MIN_IMAGE_COVERAGE * image_area
+
+
+def iter_pdf_pages(pdf_bytes: bytes, max_workers: int | None = None) -> Iterator[dict]:
+    """
+    Extracts text from each page of a PDF using the cheapest reliable path,
+    yielding every page as soon as it (and all pages before it) are ready.
+
+    The embedded text layer is read first (digital e-bills and statements);
+    only pages without usable text are rasterized and OCR'd, in parallel on
+    the process pool. At most `settings.OCR_MAX_PDF_PAGES` pages are processed.
+
+    Args:
+        pdf_bytes: The raw PDF file.
+        max_workers: Set to 1 to force the serial OCR path (used by benchmarks).
+
+    Yields:
+        {"page_number", "method", "text"} dictionaries in page order, where
+        method is "text_layer" or "ocr".
+
+    Raises:
+        Any PyMuPDF error if the PDF cannot be read.
+    """
+    with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
+        page_count = doc.page_count
+        if page_count > settings.OCR_MAX_PDF_PAGES:
+            logging.warning(
+                f"PDF has {page_count} pages; only the first {settings.OCR_MAX_PDF_PAGES} will be processed."
+            )
+            page_count = settings.OCR_MAX_PDF_PAGES
+        layer_texts = [doc[n].get_text("text", sort=True) for n in range(page_count)]
+        ocr_page_numbers = [n for n, text in enumerate(layer_texts) if not _page_text_is_usable(doc[n], text)]
+    ocr_results = _iter_ocr_pages(pdf_bytes, ocr_page_numbers, max_workers)
+    try:
+        for n, text in enumerate(layer_texts):
+            if n in ocr_page_numbers:
+                _, text, timings = next(ocr_results)
+                preprocessing_stats.record(timings)
+                yield {"page_number": n + 1, "method": "ocr", "text": text}
+            else:
+                yield {"page_number": n + 1, "method": "text_layer", "text": text}
+    finally:
+        # The caller stopped early, or a page failed
+        ocr_results.close()
+
+
+def extract_pages_from_pdf(pdf_bytes: bytes, max_workers: int | None = None) -> list[dict] | None:
+    """
+    Extracts the text of every page of a PDF (see iter_pdf_pages).
+
+    Returns:
+        A list of {"page_number", "method", "text"} dictionaries in page order,
+        or None if the PDF could not be read.
+    """
+    try:
+        return list(iter_pdf_pages(pdf_bytes, max_workers=max_workers))
     except Exception as e:
         logging.error(f"Error during PDF text extraction: {e}")
+        return None
+
+
+def extract_text_from_pdf(pdf_bytes: bytes, max_workers: int | None = None) -> str:
+    """
+    Extracts text from a PDF file, reading the embedded text layer where it is
+    usable and falling back to OCR for scanned pages.
+    Useful for both digital and scanned PDFs.
+    """
+    pages = extract_pages_from_pdf(pdf_bytes, max_workers=max_workers)
+    if pages is None:
         return "Error: Could not extract text from the PDF file."
+    return join_page_texts(page["text"] for page in pages)
+
+
+def join_page_texts(texts: Iterable[str]) -> str:
+    """
+    Joins the texts of a document's pages, ending each page with a form feed
+    as Tesseract itself does, so page boundaries survive in the full text
+    (prompt compaction uses them to find page headers and footers).
+    """
+    return "".join(text.rstrip("\f\n") + "\n\f" for text in texts)
+
+
+def is_pdf_upload(filename: str | None, content_type: str | None) -> bool:
+    """Returns True if an uploaded file should be treated as a PDF."""
+    return content_type == "application/pdf" or (filename or "").lower().endswith(".pdf")
+
+
+def iter_document_pages(file_bytes: bytes, is_pdf: bool) -> Iterator[dict]:
+    """
+    Yields the {"page_number", "method", "text"} of each page of an uploaded
+    image (a single OCR'd page) or PDF, as soon as each page is ready.
+    Used by the streaming endpoints; see iter_pdf_pages for the error behavior.
+    """
+    if is_pdf:
+        yield from iter_pdf_pages(file_bytes)
+    else:
+        yield {"page_number": 1, "method": "ocr", "text": extract_text_from_image(file_bytes)}
+
+
+def summarize_pages(pages: list[dict]) -> dict:
+    """
+    Joins per-page results into the full "text" and a "pages" list that
+    reports only how each page was read.
+    """
+    return {
+        "text": join_page_texts(page["text"] for page in pages),
+        "pages": [{"page_number": page["page_number"], "method": page["method"]} for page in pages],
+    }
+
+
+def get_cached_document_pages(content_hash: str) -> list[dict] | None:
+    """Returns the cached per-page results for an upload, if any."""
+    cached = extraction_cache_service.extraction_cache.get(content_hash, extraction_cache_service.OCR_PAGES)
+    return cached["pages"] if cached is not None else None
+
+
+def cache_document_pages(content_hash: str, pages: list[dict]) -> None:
+    """Caches per-page results for an upload, unless OCR failed on a page."""
+    if pages and not any(page["text"].startswith("Error:") for page in pages):
+        extraction_cache_service.extraction_cache.set(
+            content_hash, extraction_cache_service.OCR_PAGES, {"pages": pages}
+        )
+
+
+def extract_text_from_document(file_bytes: bytes, is_pdf: bool) -> dict:
+    """
+    Extracts the text of an uploaded image or PDF. Results are cached by the
+    SHA-256 of the file, so re-uploads of the same receipt skip OCR.
+
+    Returns:
+        A dictionary with the full "text", a "pages" list reporting, for
+        every page, whether it was read from the text layer or OCR'd, and the
+        file's "content_hash" (pass it on to extract_structured_data_from_text).
+    """
+    key = extraction_cache_service.content_hash(file_bytes)
+    pages = get_cached_document_pages(key)
+    if pages is None:
+        if is_pdf:
+            pages = extract_pages_from_pdf(file_bytes)
+            if pages is None:
+                return {"text": "Error: Could not extract text from the PDF file.", "pages": [], "content_hash": key}
+        else:
+            pages = [{"page_number": 1, "method": "ocr", "text": extract_text_from_image(file_bytes)}]
+        cache_document_pages(key, pages)
+    return {**summarize_pages(pages), "content_hash": key}
 
 
-def extract_structured_data_from_text(text_to_analyze: str) -> dict:
+def extract_structured_data_from_text(text_to_analyze: str, content_hash: str | None = None) -> dict:
     """
     Analyzes a block of text (from OCR) and extracts structured data (e.g.,
     KYC details, bill amounts) using a specialized prompt with the Gemini AI model.
 
     Args:
         text_to_analyze: The raw text extracted from a document.
+        content_hash: SHA-256 of the uploaded file the text came from. When
+            given, the result is served from / stored in the extraction cache.
 
     Returns:
         A dictionary with the extracted structured data.
     """
+    if content_hash is None:
+        return _extract_structured_data_from_text(text_to_analyze)
+    return extraction_cache_service.extraction_cache.get_or_compute(
+        content_hash,
+        extraction_cache_service.STRUCTURED_DATA,
+        lambda: _extract_structured_data_from_text(text_to_analyze),
+        is_cacheable=_structured_data_is_cacheable,
+    )
+
+
+async def extract_structured_data_from_text_async(text_to_analyze: str, content_hash: str | None = None) -> dict:
+    """
+    Async counterpart of extract_structured_data_from_text; awaits the Gemini
+    call instead of blocking a thread on it. Concurrent extractions are
+    coalesced into one multi-document prompt.
+    """
+    if content_hash is None:
+        return await _structured_data_batcher.submit(text_to_analyze)
+    return await extraction_cache_service.extraction_cache.get_or_compute_async(
+        content_hash,
+        extraction_cache_service.STRUCTURED_DATA,
+        lambda: _structured_data_batcher.submit(text_to_analyze),
+        is_cacheable=_structured_data_is_cacheable,
+    )
+
+
+def _structured_data_is_cacheable(value: dict) -> bool:
+    return "error" not in value["extracted_data"]
+
+
+def _extract_structured_data_from_text(text_to_analyze: str) -> dict:
+    prompt = _build_structured_data_prompt(text_to_analyze)
+    return _parse_structured_data_response(generate_gemini_response(prompt))
+
+
+async def _extract_structured_data_from_text_async(text_to_analyze: str) -> dict:
+    prompt = _build_structured_data_prompt(text_to_analyze)
+    return _parse_structured_data_response(await generate_gemini_response_async(prompt))
+
+
+def _build_structured_data_prompt(text_to_analyze: str) -> str:
     # This prompt instructs the AI to act as a data extraction expert and
     # identify the type of document before extracting relevant fields into a JSON.
+    text_to_analyze = compact_ocr_text(text_to_analyze)
     prompt = f"""
     You are a data extraction expert for DigiSaathi, an app that helps users in India.
     Your task is to analyze the following text, which was extracted from a user's document via OCR.
@@ -85,9 +508,11 @@ def extract_structured_data_from_text(text_to_analyze: str) -> dict:
 
     Do not add any other text or explanations outside of the JSON object.
     """
+    return prompt
+
+
+def _parse_structured_data_response(ai_response_str: str) -> dict:
     try:
-        ai_response_str = generate_gemini_response(prompt)
-        
         # Clean the response to ensure it's a valid JSON string
         if ai_response_str.strip().startswith("```json"):
             ai_response_str = ai_response_str.strip()[7:-3]
@@ -107,3 +532,42 @@ def extract_structured_data_from_text(text_to_analyze: str) -> dict:
             "document_type": "Other",
             "extracted_data": {"error": "Could not analyze the document's text."}
         }
+
+
+def _build_structured_data_batch_prompt(texts: list[str]) -> str:
+    documents = "\n".join(f'Document {i}:\n---\n"{compact_ocr_text(text)}"\n---' for i, text in enumerate(texts))
+    prompt = f"""
+    You are a data extraction expert for DigiSaathi, an app that helps users in India.
+    Below are {len(texts)} unrelated texts, numbered from 0, each extracted from a user's document via OCR.
+    For each one, first identify the type of document (e.g., 'Aadhaar Card', 'PAN Card', 'Electricity Bill', 'Receipt', 'Other').
+    Then, extract the key information from the text into a structured JSON object.
+
+    {documents}
+
+    Respond with a JSON array ONLY, with one object per document. Each object must have three keys:
+    1. "index": the document number.
+    2. "document_type": a string representing the type of document you identified.
+    3. "extracted_data": an object containing the key-value pairs of the data you extracted.
+       - For an Aadhaar Card, extract "name", "dob", "gender", and "aadhaar_number".
+       - For a PAN Card, extract "name", "father_name", "dob", and "pan_number".
+       - For a bill or receipt, extract "vendor_name", "total_amount", and "due_date".
+       - If you cannot find a value for a field, set it to null.
+       - If the document type is 'Other', make a best guess at relevant key-value pairs.
+
+    Do not add any other text or explanations outside of the JSON array.
+    """
+    return prompt
+
+
+def _parse_structured_data_batch_item(item: dict) -> dict | None:
+    if not isinstance(item.get("document_type"), str) or not isinstance(item.get("extracted_data"), dict):
+        return None
+    return {"document_type": item["document_type"], "extracted_data": item["extracted_data"]}
+
+
+_structured_data_batcher = LLMBatchCoalescer(
+    "structured_data",
+    build_batch_prompt=_build_structured_data_batch_prompt,
+    parse_batch_response=lambda response, count: parse_indexed_json_array(response, count, _parse_structured_data_batch_item),
+    run_single=_extract_structured_data_from_text_async,
+)
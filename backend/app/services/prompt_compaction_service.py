@@ -0,0 +1,216 @@
+import math
+import re
+import threading
+import unicodedata
+from collections import Counter
+
+from backend.app.core.config import settings
+
+# OCR text is compacted before it is inlined into a prompt:
+#   1. Normalization: whitespace runs, dot leaders and line-art garbage are removed.
+#   2. Page headers and footers ("Page 2 of 5", letterheads) repeated across
+#      pages are kept once. Pages are separated by form feeds (see
+#      ocr_service.join_page_texts); text without them is a single page.
+#   3. If the text is still over the token budget, lines with amounts, dates and
+#      IDs (and their neighbours, and the top of the document) are kept first.
+# Only the prompt is compacted; the text saved and cached for the user is untouched.
+
+_AMOUNT_RE = re.compile(r"(?:₹|\brs\.?|\binr)\s*\d|\b\d+(?:,\d{2,3})*\.\d{2}\b", re.IGNORECASE)
+_DATE_RE = re.compile(
+    r"\b\d{1,2}[/.-]\d{1,2}[/.-]\d{2,4}\b|\b\d{4}-\d{2}-\d{2}\b"
+    r"|\b\d{1,2}\s*(?:jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*\.?,?\s*\d{2,4}\b",
+    re.IGNORECASE,
+)
+_ID_RE = re.compile(
+    r"\b\d{6,}\b|\b[A-Z]{5}\d{4}[A-Z]\b|\b\d{2}[A-Z]{5}\d{4}[A-Z]\d[A-Z\d]{2}\b"
+    r"|\b(?:invoice|bill|receipt|account|a/c|acct|order|txn|transaction|ref|consumer|customer|gstin|pan|aadhaar)\s*(?:no|number|id|#)?\b",
+    re.IGNORECASE,
+)
+_KEY_WORDS_RE = re.compile(r"\b(total|amount|due|payable|balance|paid|tax|gst|net)\b", re.IGNORECASE)
+_PAGE_NUMBER_RE = re.compile(r"\bpage\s*\d+(?:\s*(?:of|/)\s*\d+)?\b", re.IGNORECASE)
+
+_SPACES_RE = re.compile(r"[ \t]+")
+_LEADER_RE = re.compile(r"([.\-_=*~·•])\1{2,}")
+
+# Lines with fewer letters and digits than this share of their characters are
+# line art, table borders or speckle read as text
+_MIN_ALNUM_RATIO = 0.4
+
+# Lines (with page numbers masked) at the top or bottom of this many pages are
+# treated as page headers/footers; documents with fewer pages need them on all
+_MIN_REPEATS = 3
+# How many lines at the top and bottom of a page can be a header or footer
+_PAGE_MARGIN_LINES = 3
+_PAGE_BREAK = "\f"
+_DIGIT_RE = re.compile(r"\d")
+
+# The first lines usually hold the vendor or issuer and the document title,
+# the last ones the totals
+_HEAD_LINES = 5
+_TAIL_LINES = 5
+
+_GAP_MARKER = "[...]"
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimates the model tokens of a text (about 4 characters per token for
+    Gemini on English and Latin-script text). Counting exactly would cost an
+    API call per prompt.
+    """
+    return math.ceil(len(text) / 4)
+
+
+def normalize_ocr_text(text: str) -> list[str]:
+    """
+    Cleans OCR output into non-empty lines: Unicode compatibility forms are
+    folded, whitespace runs and dot/dash leaders are collapsed, and lines that
+    are mostly symbols are dropped.
+    """
+    lines = []
+    for raw_line in unicodedata.normalize("NFKC", text).splitlines():
+        line = _LEADER_RE.sub(r"\1\1\1", _SPACES_RE.sub(" ", raw_line)).strip()
+        if not line:
+            continue
+        alnum = sum(ch.isalnum() for ch in line)
+        if (alnum == 0 or alnum / len(line) < _MIN_ALNUM_RATIO) and not _AMOUNT_RE.search(line):
+            continue
+        lines.append(line)
+    return lines
+
+
+def remove_repeated_lines(pages: list[list[str]]) -> list[str]:
+    """
+    Joins the normalized lines of each page, keeping only the first
+    occurrence of page headers and footers: lines within the first or last
+    few lines of a page that recur there on other pages, such as letterheads
+    and "Page 2 of 5". Lines with any other digit (a date, an amount, a
+    reference number) are always kept: repeated rows are real transactions.
+    """
+    margins = []
+    pages_with_key: Counter[str] = Counter()
+    for lines in pages:
+        margin = {
+            i: _repeat_key(line) for i, line in enumerate(lines)
+            if i < _PAGE_MARGIN_LINES or i >= len(lines) - _PAGE_MARGIN_LINES
+        }
+        margin = {i: key for i, key in margin.items() if not _DIGIT_RE.search(key)}
+        margins.append(margin)
+        pages_with_key.update(set(margin.values()))
+
+    min_pages = max(2, min(_MIN_REPEATS, len(pages)))
+    seen: set[str] = set()
+    kept = []
+    for lines, margin in zip(pages, margins):
+        for i, line in enumerate(lines):
+            key = margin.get(i)
+            if key is not None and pages_with_key[key] >= min_pages:
+                if key in seen:
+                    continue
+                seen.add(key)
+            kept.append(line)
+    return kept
+
+
+def trim_to_budget(lines: list[str], token_budget: int, context_lines: int) -> list[str]:
+    """
+    Drops the least relevant lines until the text fits the token budget.
+
+    Lines are kept in priority order:
+      0. the top and bottom of the document (issuer, title, totals summary),
+      1. lines with an ID or a billing keyword ("total", "due", ...),
+      2. other lines with an amount or a date (e.g. statement rows),
+      3. `context_lines` lines on either side of those,
+      4. everything else.
+    Ties are broken top to bottom. Dropped runs are marked with "[...]" so
+    the model knows text is missing.
+    """
+    priorities = [4] * len(lines)
+    for i, line in enumerate(lines):
+        if i < _HEAD_LINES or i >= len(lines) - _TAIL_LINES:
+            priority = 0
+        elif _KEY_WORDS_RE.search(line) or _ID_RE.search(line):
+            priority = 1
+        elif _AMOUNT_RE.search(line) or _DATE_RE.search(line):
+            priority = 2
+        else:
+            continue
+        priorities[i] = min(priorities[i], priority)
+        for j in range(max(0, i - context_lines), min(len(lines), i + context_lines + 1)):
+            priorities[j] = min(priorities[j], 3)
+
+    kept: set[int] = set()
+    # Every line costs its newline too; each gap marker is budgeted with the line after it
+    used = 0
+    for i in sorted(range(len(lines)), key=lambda i: (priorities[i], i)):
+        cost = estimate_tokens(lines[i] + "\n") + estimate_tokens(_GAP_MARKER + "\n")
+        if used + cost > token_budget:
+            continue
+        kept.add(i)
+        used += cost
+
+    trimmed = []
+    for i, line in enumerate(lines):
+        if i in kept:
+            trimmed.append(line)
+        elif not trimmed or trimmed[-1] != _GAP_MARKER:
+            trimmed.append(_GAP_MARKER)
+    return trimmed
+
+
+def compact_ocr_text(text: str, token_budget: int | None = None) -> str:
+    """
+    Compacts OCR text before it is inlined into a prompt (see the steps at the
+    top of this module) and records the token counts before and after.
+
+    Args:
+        text: Raw text from Tesseract or a PDF text layer.
+        token_budget: Estimated tokens the result may use. Defaults to
+            PROMPT_OCR_TOKEN_BUDGET.
+
+    Returns:
+        The compacted text, or the text unchanged if compaction is disabled.
+    """
+    if not settings.PROMPT_COMPACTION_ENABLED:
+        return text
+    lines = remove_repeated_lines([normalize_ocr_text(page) for page in text.split(_PAGE_BREAK)])
+    budget = token_budget if token_budget is not None else settings.PROMPT_OCR_TOKEN_BUDGET
+    if estimate_tokens("\n".join(lines)) > budget:
+        lines = trim_to_budget(lines, budget, settings.PROMPT_CONTEXT_LINES)
+    compacted = "\n".join(lines)
+    compaction_stats.record(estimate_tokens(text), estimate_tokens(compacted))
+    return compacted
+
+
+def _repeat_key(line: str) -> str:
+    # Only page numbers are masked; any other digit makes the line unique content
+    return _PAGE_NUMBER_RE.sub("page", line.lower())
+
+
+class CompactionStats:
+    """Thread-safe totals of estimated prompt tokens before and after compaction."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._documents = 0
+        self._tokens_before = 0
+        self._tokens_after = 0
+
+    def record(self, tokens_before: int, tokens_after: int) -> None:
+        with self._lock:
+            self._documents += 1
+            self._tokens_before += tokens_before
+            self._tokens_after += tokens_after
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            saved = self._tokens_before - self._tokens_after
+            return {
+                "documents": self._documents,
+                "tokens_before": self._tokens_before,
+                "tokens_after": self._tokens_after,
+                "saved_ratio": round(saved / self._tokens_before, 3) if self._tokens_before else None,
+            }
+
+
+compaction_stats = CompactionStats()
@@ -0,0 +1,345 @@
+import csv
+import io
+import logging
+import re
+import time
+from collections import Counter
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from typing import Callable
+
+import fitz  # PyMuPDF
+from sqlalchemy.orm import Session
+
+from backend.app.core.config import settings
+from backend.app.core.executors import run_blocking_io, run_cpu_bound
+from backend.app.services import expense_analysis_service
+from backend.app.services.llm_gateway_service import LLMRateLimitedError
+from backend.app.services.vendor_category_service import vendor_category_memo
+from backend.db import crud
+
+# A statement is parsed column by column rather than cell by cell: the header
+# row is mapped to fields once, each column's date format and sign convention
+# are decided once, and every distinct cell value is parsed once (statements
+# repeat the same dates and amounts many times). Payees are categorized once
+# per distinct vendor, and all rows are saved with one multi-row INSERT in a
+# single database transaction.
+
+
+class StatementImportError(ValueError):
+    """Raised when an upload cannot be read as a bank statement."""
+
+
+# Rows without a payee
+_FALLBACK_CATEGORY = "Other"
+# Rows whose payee could not be categorized in this import; they are listed in
+# the result so the user can categorize them (the dashboard rolls them up with
+# NULL categories)
+_UNCATEGORIZED = "Uncategorized"
+
+# Header names, lowercased with everything but letters removed, most specific first
+_HEADER_ALIASES = {
+    "date": ("transactiondate", "txndate", "trandate", "date", "postingdate", "valuedate", "valuedt"),
+    "description": ("narration", "description", "particulars", "transactiondetails", "transactionremarks", "details", "remarks"),
+    "debit": ("debit", "debitamount", "debitamt", "withdrawal", "withdrawals", "withdrawalamt", "withdrawalamount", "dr"),
+    "credit": ("credit", "creditamount", "creditamt", "deposit", "deposits", "depositamt", "depositamount", "cr"),
+    "amount": ("amount", "transactionamount", "amt"),
+    "type": ("drcr", "crdr", "type", "transactiontype", "debitcredit"),
+}
+# The header row is looked for among the first rows, after any account details
+_HEADER_SEARCH_ROWS = 50
+
+# Day-first formats come first: Indian statements use them, and they win
+# over month-first ones when every day in the column is 12 or less
+_DATE_FORMATS = (
+    "%d/%m/%Y", "%d/%m/%y", "%d-%m-%Y", "%d-%m-%y", "%d.%m.%Y", "%d.%m.%y",
+    "%d %b %Y", "%d-%b-%Y", "%d %b %y", "%d-%b-%y", "%d %B %Y", "%b %d, %Y",
+    "%Y-%m-%d", "%Y-%m-%d %H:%M:%S", "%d/%m/%Y %H:%M:%S", "%d/%m/%Y %H:%M", "%d-%m-%Y %H:%M:%S",
+    "%m/%d/%Y", "%m/%d/%y",
+)
+_DATE_FORMAT_SAMPLE_SIZE = 500
+
+_AMOUNT_NOISE_RE = re.compile(r"rs\.?|inr|₹|,|\s", re.IGNORECASE)
+_CENTS = Decimal("0.01")
+
+_NARRATION_SEPARATOR_RE = re.compile(r"[/|:*\\-]+|\s{2,}")
+# Words of a narration that name the payment channel rather than the payee
+_CHANNEL_WORDS = {
+    "upi", "neft", "imps", "rtgs", "pos", "ach", "atm", "ecs", "nach", "mmt", "inb", "ib", "mb", "bil", "billpay",
+    "onl", "vps", "vin", "int", "txn", "ref", "to", "by", "from", "transfer", "trf", "payment", "paid", "sent",
+    "via", "using", "p", "d", "c", "dr", "cr", "debit", "credit", "card", "wdl", "cash", "withdrawal", "chq", "cheque",
+    "clg", "net", "banking",
+}
+
+
+def parse_statement(file_bytes: bytes, filename: str | None, content_type: str | None) -> dict:
+    """
+    Reads the transactions of a bank or card statement.
+
+    Args:
+        file_bytes: A CSV export or a digital (not scanned) PDF statement.
+        filename: The uploaded file name.
+        content_type: The uploaded content type.
+
+    Returns:
+        A dictionary with "rows" (the debits, as dictionaries with
+        transaction_date, amount, description and vendor_name), "total_rows",
+        "credits" and "invalid".
+
+    Raises:
+        StatementImportError: If the file is not a readable statement.
+    """
+    if len(file_bytes) > settings.STATEMENT_IMPORT_MAX_FILE_BYTES:
+        raise StatementImportError("File is too large.")
+    name = (filename or "").lower()
+    if content_type == "application/pdf" or name.endswith(".pdf") or file_bytes.startswith(b"%PDF"):
+        table = _read_pdf_tables(file_bytes)
+    elif name.endswith((".xls", ".xlsx")) or file_bytes.startswith((b"PK", b"\xd0\xcf\x11\xe0")):
+        raise StatementImportError("Excel statements are not supported; export the statement as CSV or PDF.")
+    else:
+        table = _read_csv(file_bytes)
+    return parse_statement_table(table)
+
+
+def parse_statement_table(table: list[list[str]]) -> dict:
+    """
+    Turns the rows of a statement table, including the header row and any
+    account details above it, into transactions. See parse_statement.
+    """
+    header_index, columns = _find_header(table)
+    header = table[header_index]
+    body = [row for row in table[header_index + 1:] if row != header and any(cell.strip() for cell in row)]
+    if len(body) > settings.STATEMENT_IMPORT_MAX_ROWS:
+        raise StatementImportError(f"Too many rows; at most {settings.STATEMENT_IMPORT_MAX_ROWS} can be imported at once.")
+
+    def column(field: str) -> list[str]:
+        index = columns.get(field)
+        if index is None:
+            return [""] * len(body)
+        return [row[index].strip() if index < len(row) else "" for row in body]
+
+    dates = _parse_dates(column("date"))
+    descriptions = column("description")
+    signed_amounts = _signed_amounts(columns, column)
+
+    rows = []
+    credits = invalid = 0
+    for transaction_date, description, amount in zip(dates, descriptions, signed_amounts):
+        if transaction_date is None or not amount:
+            invalid += 1
+        elif amount > 0:
+            credits += 1
+        else:
+            rows.append({
+                "transaction_date": transaction_date,
+                "amount": -amount,
+                "description": description or None,
+                "vendor_name": extract_vendor(description),
+            })
+    return {"rows": rows, "total_rows": len(body), "credits": credits, "invalid": invalid}
+
+
+def extract_vendor(narration: str) -> str | None:
+    """
+    Finds the payee in a bank narration, e.g. "Swiggy" in
+    "UPI/SWIGGY/412345678901/Payment" or "Dmart Avenue" in
+    "POS 4512XXXXXXXX1234 DMART AVENUE".
+    """
+    for segment in _NARRATION_SEPARATOR_RE.split(narration):
+        words = [
+            word for word in segment.split()
+            if word.lower().strip(".") not in _CHANNEL_WORDS and "@" not in word and not any(ch.isdigit() for ch in word)
+        ]
+        vendor = " ".join(words)
+        if len(vendor) >= 3:
+            return (vendor.title() if vendor.isupper() else vendor)[:255]
+    return None
+
+
+async def import_statement(db: Session, file_bytes: bytes, filename: str | None, content_type: str | None, owner_id: int) -> dict:
+    """
+    Imports the debits of a bank or card statement as transactions of the
+    user, skipping those already imported.
+
+    Returns:
+        A dictionary matching the StatementImportResponse schema.
+
+    Raises:
+        StatementImportError: If the file is not a readable statement.
+    """
+    start = time.perf_counter()
+    statement = await run_cpu_bound(parse_statement, file_bytes, filename, content_type)
+    rows = statement["rows"]
+
+    vendor_counts = Counter(row["vendor_name"] for row in rows if row["vendor_name"])
+    categories = await _categorize_vendors(vendor_counts, owner_id)
+    for row in rows:
+        if row["vendor_name"] is None:
+            row["category"] = _FALLBACK_CATEGORY
+        else:
+            row["category"] = categories.get(row["vendor_name"], _UNCATEGORIZED)
+    imported, duplicates = await run_blocking_io(crud.import_user_transactions, db=db, rows=rows, owner_id=owner_id)
+
+    elapsed = time.perf_counter() - start
+    return {
+        "total_rows": statement["total_rows"],
+        "imported": imported,
+        "duplicates": duplicates,
+        "credits_skipped": statement["credits"],
+        "invalid_rows": statement["invalid"],
+        "uncategorized_vendors": [vendor for vendor, _ in vendor_counts.most_common() if vendor not in categories],
+        "elapsed_seconds": round(elapsed, 3),
+        "rows_per_second": round(statement["total_rows"] / elapsed, 2) if elapsed > 0 else 0.0,
+    }
+
+
+async def _categorize_vendors(vendor_counts: Counter, owner_id: int) -> dict[str, str]:
+    # One memo lookup for every payee (the user's own corrections first); the
+    # AI model only sees the ones it does not know, several per call, and its
+    # answers are memoized in one write. Payees left out are returned uncategorized.
+    categories = await run_blocking_io(vendor_category_memo.lookup_many, vendor_counts, owner_id)
+    unknown = [vendor for vendor, _ in vendor_counts.most_common() if vendor not in categories]
+    unknown = unknown[:settings.STATEMENT_IMPORT_MAX_AI_VENDORS]
+    if unknown:
+        try:
+            answers = await expense_analysis_service.categorize_vendors_async(unknown)
+        except LLMRateLimitedError as e:
+            logging.error(f"Not categorizing {len(unknown)} statement payees for user {owner_id}: {e}")
+            return categories
+        learned = {vendor: category for vendor, category in zip(unknown, answers) if category}
+        await run_blocking_io(vendor_category_memo.seed, learned, source="llm")
+        categories.update(learned)
+    return categories
+
+
+def _read_csv(file_bytes: bytes) -> list[list[str]]:
+    try:
+        text = file_bytes.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        text = file_bytes.decode("latin-1")
+    try:
+        dialect = csv.Sniffer().sniff(text[:8192], delimiters=",;\t|")
+    except csv.Error:
+        dialect = csv.excel
+    return list(csv.reader(io.StringIO(text), dialect))
+
+
+def _read_pdf_tables(file_bytes: bytes) -> list[list[str]]:
+    try:
+        doc = fitz.open(stream=file_bytes, filetype="pdf")
+    except (fitz.FileDataError, fitz.EmptyFileError):
+        raise StatementImportError("Not a valid PDF file.")
+    with doc:
+        if doc.needs_pass:
+            raise StatementImportError("The PDF is password-protected; upload an unlocked copy.")
+        if doc.page_count > settings.STATEMENT_IMPORT_MAX_PDF_PAGES:
+            raise StatementImportError(f"Too many pages; at most {settings.STATEMENT_IMPORT_MAX_PDF_PAGES} can be imported at once.")
+        table = []
+        for page in doc:
+            # Ruled tables first, then tables laid out with whitespace only
+            tables = page.find_tables().tables or page.find_tables(strategy="text").tables
+            for found in tables:
+                # Cells can hold wrapped, multi-line narrations
+                table += [[" ".join((cell or "").split()) for cell in row] for row in found.extract()]
+    if not table:
+        raise StatementImportError(
+            "No transaction table was found in the PDF. Scanned statements are not supported; "
+            "upload a downloaded statement or its CSV export."
+        )
+    return table
+
+
+def _find_header(table: list[list[str]]) -> tuple[int, dict[str, int]]:
+    for index, row in enumerate(table[:_HEADER_SEARCH_ROWS]):
+        columns = _map_header(row)
+        if "date" in columns and "description" in columns and ("debit" in columns or "amount" in columns):
+            return index, columns
+    raise StatementImportError("Could not find the date, description and amount columns of the statement.")
+
+
+def _map_header(row: list[str]) -> dict[str, int]:
+    names = [re.sub(r"[^a-z]", "", cell.lower()) for cell in row]
+    columns: dict[str, int] = {}
+    # Exact names first, then names that merely start with an alias
+    # (e.g. "Withdrawal Amount (INR)"), never reusing a column
+    for matches in (lambda name, alias: name == alias, lambda name, alias: len(alias) > 3 and name.startswith(alias)):
+        for field, aliases in _HEADER_ALIASES.items():
+            if field in columns:
+                continue
+            for alias in aliases:
+                index = next(
+                    (i for i, name in enumerate(names) if matches(name, alias) and i not in columns.values()), None
+                )
+                if index is not None:
+                    columns[field] = index
+                    break
+    return columns
+
+
+def _parse_column(cells: list[str], parse: Callable[[str], object]) -> list:
+    parsed = {cell: parse(cell) for cell in set(cells)}
+    return [parsed[cell] for cell in cells]
+
+
+def _parse_dates(cells: list[str]) -> list[datetime | None]:
+    distinct = [cell for cell in set(cells) if cell]
+    date_format = _detect_date_format(distinct[:_DATE_FORMAT_SAMPLE_SIZE])
+    return _parse_column(cells, lambda cell: _parse_date(cell, date_format))
+
+
+def _detect_date_format(sample: list[str]) -> str:
+    # The format that reads the most values of the column; summary and
+    # footer rows mean it need not read all of them
+    best_format, best_count = _DATE_FORMATS[0], 0
+    for date_format in _DATE_FORMATS:
+        count = sum(_parse_date(value, date_format) is not None for value in sample)
+        if count == len(sample):
+            return date_format
+        if count > best_count:
+            best_format, best_count = date_format, count
+    return best_format
+
+
+def _parse_date(cell: str, date_format: str) -> datetime | None:
+    try:
+        return datetime.strptime(cell, date_format)
+    except ValueError:
+        return None
+
+
+def _parse_amount(cell: str) -> Decimal | None:
+    """Parses '1,84,220.00', 'Rs. 450', '450.00 Dr' or '(450.00)'; debits marked Dr or (...) are negative."""
+    text = cell.strip()
+    sign = 1
+    if text[-2:].lower() == "dr":
+        sign, text = -1, text[:-2]
+    elif text[-2:].lower() == "cr":
+        text = text[:-2]
+    text = text.strip()
+    if text.startswith("(") and text.endswith(")"):
+        sign, text = -1, text[1:-1]
+    try:
+        value = Decimal(_AMOUNT_NOISE_RE.sub("", text))
+    except InvalidOperation:
+        return None
+    return (sign * value).quantize(_CENTS) if value.is_finite() else None
+
+
+def _signed_amounts(columns: dict[str, int], column: Callable[[str], list[str]]) -> list[Decimal | None]:
+    # Debits negative, credits positive, None when the row has neither
+    if "debit" in columns:
+        debits = _parse_column(column("debit"), _parse_amount)
+        credits = _parse_column(column("credit"), _parse_amount)
+        return [-abs(debit) if debit else (abs(credit) if credit else None) for debit, credit in zip(debits, credits)]
+
+    amounts = _parse_column(column("amount"), _parse_amount)
+    if "type" in columns:
+        types = column("type")
+        return [
+            None if amount is None else (-abs(amount) if kind.lower().startswith("d") else abs(amount))
+            for amount, kind in zip(amounts, types)
+        ]
+    if any(amount is not None and amount < 0 for amount in amounts):
+        return amounts
+    # A single column of positive amounts, as in card statements, lists spending
+    return [None if amount is None else -amount for amount in amounts]
@@ -0,0 +1,201 @@
+import logging
+import re
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import Iterable
+
+from backend.app.core.config import settings
+from backend.db import crud, session
+
+# Legal-entity words that vary between receipts of the same merchant
+_LEGAL_SUFFIXES = {"pvt", "private", "ltd", "limited", "llp", "inc", "corp", "corporation"}
+
+
+def normalize_vendor(vendor_name: str) -> str:
+    """
+    Normalizes a vendor name so spelling variants share one memo entry, e.g.
+    "SWIGGY  Pvt. Ltd." and "Swiggy" both become "swiggy". Store or branch
+    numbers are dropped as well.
+    """
+    tokens = re.sub(r"[^a-z0-9]+", " ", vendor_name.lower()).split()
+    tokens = [token for token in tokens if token not in _LEGAL_SUFFIXES and not token.isdigit()]
+    return " ".join(tokens)[:255]
+
+
+class VendorCategoryMemo:
+    """
+    Memo of vendor -> expense category, consulted before asking the AI model.
+
+    Two layers: the shared memo of AI answers and seeded categories, and each
+    user's own corrections on top of it, which apply to that user only. The
+    first tier is an in-process LRU with a TTL (so corrections made through
+    other workers are picked up); the second is the `vendor_categories` and
+    `user_vendor_categories` tables. Failures in the persistent tier are
+    logged and treated as misses.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: int):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        # (None, vendor_key) for the shared memo, (owner_id, vendor_key) for a
+        # user's correction; None as category caches "this user has none"
+        self._entries: OrderedDict[tuple[int | None, str], tuple[float, str | None]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters: Counter[str] = Counter()
+
+    def lookup(self, vendor_name: str, owner_id: int | None = None) -> str | None:
+        """Returns the memoized category for a vendor (the user's own, if any), or None on a miss."""
+        return self.lookup_many([vendor_name], owner_id=owner_id).get(vendor_name)
+
+    def lookup_many(self, vendor_names: Iterable[str], owner_id: int | None = None) -> dict[str, str]:
+        """
+        Looks up many vendors at once, with at most one query per layer for
+        those not in memory.
+
+        Args:
+            vendor_names: The vendor names as read from receipts or statements.
+            owner_id: The user whose corrections take precedence, if any.
+
+        Returns:
+            Vendor name -> memoized category, for the vendors found.
+        """
+        names_by_key: dict[str, list[str]] = {}
+        for vendor_name in set(vendor_names):
+            vendor_key = normalize_vendor(vendor_name)
+            if vendor_key:
+                names_by_key.setdefault(vendor_key, []).append(vendor_name)
+
+        categories: dict[str, str] = {}
+        if owner_id is not None and names_by_key:
+            categories = self._lookup_layer(
+                owner_id, list(names_by_key),
+                lambda db, keys: crud.get_user_vendor_categories(db, owner_id, keys),
+            )
+        remaining = [vendor_key for vendor_key in names_by_key if vendor_key not in categories]
+        if remaining:
+            categories.update(self._lookup_layer(None, remaining, crud.get_vendor_categories))
+        return {
+            vendor_name: categories[vendor_key]
+            for vendor_key, vendor_names_for_key in names_by_key.items() if vendor_key in categories
+            for vendor_name in vendor_names_for_key
+        }
+
+    def remember(self, vendor_name: str, category: str, source: str = "llm") -> None:
+        """
+        Stores the category of a vendor in the shared memo. 'seed' entries
+        override 'llm' answers; never the other way round.
+        """
+        vendor_key = normalize_vendor(vendor_name)
+        if vendor_key:
+            self.seed({vendor_key: category}, source=source)
+
+    def remember_correction(self, owner_id: int, vendor_name: str, category: str) -> None:
+        """
+        Stores a user's manual correction of a vendor's category. It applies
+        to that user's future expenses only; other users keep the shared memo.
+        """
+        vendor_key = normalize_vendor(vendor_name)
+        if not vendor_key:
+            return
+        db = session.SessionLocal()
+        try:
+            crud.upsert_user_vendor_category(db, owner_id, vendor_key, category)
+        except Exception as e:
+            db.rollback()
+            logging.error(f"Error writing to the vendor category memo: {e}")
+            return
+        finally:
+            db.close()
+        self._set_memory((owner_id, vendor_key), category)
+        with self._lock:
+            self._counters["user_writes"] += 1
+
+    def seed(self, categories: dict[str, str], source: str = "seed") -> int:
+        """
+        Stores the categories of many vendors at once in the shared memo.
+
+        Args:
+            categories: Vendor name (normalized here) -> category.
+            source: 'llm' or 'seed'.
+
+        Returns:
+            The number of memo entries inserted or updated.
+        """
+        normalized = {normalize_vendor(vendor): category for vendor, category in categories.items()}
+        normalized.pop("", None)
+        db = session.SessionLocal()
+        try:
+            changed = crud.upsert_vendor_categories(db, normalized, source=source)
+        except Exception as e:
+            db.rollback()
+            logging.error(f"Error writing to the vendor category memo: {e}")
+            return 0
+        finally:
+            db.close()
+
+        # The stored category depends on the source ranking, so re-read on next use
+        with self._lock:
+            for vendor_key in normalized:
+                self._entries.pop((None, vendor_key), None)
+            self._counters[f"{source}_writes"] += changed
+        return changed
+
+    def stats(self) -> dict:
+        """Returns hit/miss/write counters and the in-memory size."""
+        with self._lock:
+            return {"memory_entries": len(self._entries), **self._counters}
+
+    def _lookup_layer(self, owner_id: int | None, vendor_keys: list[str], fetch) -> dict[str, str]:
+        """Looks up normalized vendor names in one layer: memory first, then one query for the rest."""
+        layer = "shared" if owner_id is None else "user"
+        found: dict[str, str] = {}
+        missing = []
+        now = time.monotonic()
+        with self._lock:
+            for vendor_key in vendor_keys:
+                cached = self._entries.get((owner_id, vendor_key))
+                if cached is not None and cached[0] > now:
+                    self._entries.move_to_end((owner_id, vendor_key))
+                    self._counters[f"{layer}_memory_hits"] += 1
+                    if cached[1] is not None:
+                        found[vendor_key] = cached[1]
+                else:
+                    missing.append(vendor_key)
+        if not missing:
+            return found
+
+        db = session.SessionLocal()
+        try:
+            entries = fetch(db, missing)
+        except Exception as e:
+            logging.error(f"Error reading from the vendor category memo: {e}")
+            return found
+        finally:
+            db.close()
+
+        for entry in entries:
+            found[entry.vendor_key] = entry.category
+            self._set_memory((owner_id, entry.vendor_key), entry.category)  # type: ignore
+        not_found = [vendor_key for vendor_key in missing if vendor_key not in found]
+        if owner_id is not None:
+            # Most users correct few vendors; remember that they have none for these
+            for vendor_key in not_found:
+                self._set_memory((owner_id, vendor_key), None)
+        with self._lock:
+            self._counters[f"{layer}_persistent_hits"] += len(entries)
+            self._counters[f"{layer}_misses"] += len(not_found)
+        return found
+
+    def _set_memory(self, key: tuple[int | None, str], category: str | None) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, category)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+vendor_category_memo = VendorCategoryMemo(
+    max_entries=settings.VENDOR_CATEGORY_MEMO_MAX_ENTRIES,
+    ttl_seconds=settings.VENDOR_CATEGORY_MEMO_TTL_SECONDS,
+)
@@ -0,0 +1,100 @@
+"""
+Benchmark: size and build time of the agent's conversation context as a
+user's chat history grows.
+
+Seeds a temporary SQLite database with 10 to 10,000 chat messages for one
+user (plus a stored running summary) and compares:
+  - build_conversation_context: running summary + recent-message window,
+  - the naive alternative: every message from get_user_chat_history.
+No AI calls are made.
+
+Run from the repository root:
+    python -m backend.benchmarks.bench_conversation_context
+"""
+import datetime
+import os
+import statistics
+import tempfile
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from backend.app.services.conversation_memory_service import build_conversation_context
+from backend.app.services.prompt_compaction_service import estimate_tokens
+from backend.db import crud
+from backend.db.session import Base
+from backend.models.chat_message import ChatMessage
+from backend.models.conversation_summary import ConversationSummary
+from backend.models.user import User
+
+USER_MESSAGES = [
+    "How much did I spend on food delivery last month?",
+    "Is this message a scam? 'Your KYC has expired, update at bit.ly/kyc-upd now'",
+    "Please save my electricity bill of Rs 1,842 from BESCOM.",
+    "Can you suggest how to cut my grocery spending?",
+]
+AI_MESSAGES = [
+    "You spent Rs 4,210 on Swiggy and Zomato last month, about 18% of your expenses.",
+    "Yes, this looks like a scam: banks never ask you to update KYC through a short link.",
+    "Saved: BESCOM, Rs 1,842, categorized as Utilities.",
+    "Buying staples in bulk from DMart and planning weekly menus could save about Rs 1,500 a month.",
+]
+REPEATS = 50
+
+
+def seed(db, user_id: int, count: int) -> None:
+    start = datetime.datetime(2024, 1, 1)
+    db.bulk_insert_mappings(ChatMessage, [  # type: ignore
+        {
+            "message": (USER_MESSAGES if i % 2 == 0 else AI_MESSAGES)[(i // 2) % 4],
+            "is_from_user": i % 2 == 0,
+            "timestamp": start + datetime.timedelta(minutes=i),
+            "owner_id": user_id,
+        }
+        for i in range(count)
+    ])
+    db.commit()
+    if count > 20:
+        # As left by update_running_summary: everything but the latest messages is summarized
+        last_id = db.query(ChatMessage.id).filter(ChatMessage.owner_id == user_id).order_by(ChatMessage.id.desc()).offset(20).first()[0]
+        db.add(ConversationSummary(
+            owner_id=user_id, summarized_through_id=last_id,
+            summary="The user tracks food delivery and grocery spending, saved several utility bills and asked about KYC scams. " * 4,
+        ))
+        db.commit()
+
+
+def timed(func) -> tuple[float, object]:
+    timings = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        result = func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings), result
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Base.metadata.create_all(bind=engine)
+        db = sessionmaker(bind=engine)()
+
+        print(f"{'messages':>9} {'context tokens':>15} {'context ms':>11} {'full history tokens':>20} {'full history ms':>16}")
+        for user_id, count in enumerate((10, 100, 1_000, 10_000), start=1):
+            db.add(User(id=user_id, email=f"user{user_id}@example.com", hashed_password="x"))
+            db.commit()
+            seed(db, user_id, count)
+
+            context_ms, context = timed(lambda: build_conversation_context(db, user_id))
+            history_ms, history = timed(lambda: crud.get_user_chat_history(db, user_id, limit=count))
+            history_text = "\n".join(message.message for message in history)  # type: ignore
+            print(
+                f"{count:>9} {estimate_tokens(context):>15} {context_ms:>11.2f} "  # type: ignore
+                f"{estimate_tokens(history_text):>20} {history_ms:>16.2f}"
+            )
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
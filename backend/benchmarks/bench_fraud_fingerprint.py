@@ -0,0 +1,101 @@
+"""
+Benchmark: recall, false matches and lookup latency of the scam-template index.
+
+Seeds an in-memory FraudFingerprintIndex (nothing is written to the database)
+with one message from each of a few synthetic scam campaigns, then looks up:
+  - campaign variants: new links, phone numbers, amounts and names, plus
+    occasional small wording edits; these should hit the index,
+  - unrelated messages (genuine alerts, chat, other scams); these should not.
+Repeats for several similarity thresholds.
+
+Run from the repository root:
+    python -m backend.benchmarks.bench_fraud_fingerprint
+"""
+import random
+import statistics
+import time
+
+from backend.app.services.fraud_fingerprint_service import FraudFingerprintIndex, minhash, normalize_message
+
+CAMPAIGNS = [
+    "Dear customer your {bank} account KYC has expired and will be blocked today. Update KYC immediately at {url} or call {phone}",
+    "Congratulations {name}! You have won Rs {amount} in the KBC lucky draw. To claim your prize pay processing fee at {url}",
+    "Your electricity connection will be disconnected tonight at 9.30 pm as your previous month bill was not updated. Contact electricity officer {phone}",
+    "Hi {name}, we are hiring part time workers. Earn Rs {amount} daily from home by liking youtube videos. Whatsapp {phone}",
+    "ALERT: Your {bank} credit card reward points worth Rs {amount} expire today. Redeem now at {url} to avoid losing them",
+    "Income tax refund of Rs {amount} has been approved for your PAN. Verify your bank account at {url} to receive the refund",
+    "Dear {name} your parcel could not be delivered due to incomplete address. Update your address at {url} within 24 hours",
+    "Your SIM card will be deactivated within 24 hours as per TRAI guidelines. Complete e-KYC by calling {phone} now",
+]
+
+UNRELATED = [
+    "Rs 1,250.00 debited from your HDFC Bank account XX4821 on 12-04-24 to VPA swiggy@icici. Not you? Call 18002586161",
+    "Your OTP for login to SBI YONO is 482913. Do not share it with anyone. SBI never asks for your OTP.",
+    "Hey, are we still meeting at the cafe tomorrow at 6? Let me know if the plan changes.",
+    "Your Amazon order #402-8812 containing 'Boat Airdopes' has been shipped and will arrive by Thursday.",
+    "Reminder: your BESCOM bill of Rs 1,842 for account 7730012 is due on 15 April. Pay via the BESCOM app.",
+    "Mom said dinner is at 8 today, please bring the sweets from the shop near the station.",
+    "Your Zomato order from Meghana Foods is out for delivery. Track it in the app.",
+    "Dear investor, your SIP of Rs 5,000 in Axis Bluechip Fund has been processed successfully on 05-04-2024.",
+    "URGENT: your son has been arrested, send Rs 50,000 immediately to this UPI ID to settle the case with police",
+    "You are selected for a free iPhone 15 in our anniversary giveaway. Just pay delivery charges of Rs 99 at bit.ly/free-iph",
+    "Your Jio plan expires in 3 days. Recharge with Rs 299 for 2GB/day and unlimited calls via MyJio.",
+    "Meeting moved to 3 pm, conference room B. Please bring the quarterly numbers.",
+]
+
+BANKS = ["SBI", "HDFC", "ICICI", "Axis", "Kotak", "PNB"]
+NAMES = ["Ravi", "Priya", "Amit", "Sunita", "Rahul", "Anjali", "Vikram"]
+FILLERS = ["please", "kindly", "urgent", "now", "today"]
+
+
+def fill(template: str, rng: random.Random) -> str:
+    return template.format(
+        bank=rng.choice(BANKS),
+        name=rng.choice(NAMES),
+        amount=f"{rng.randint(1, 99)},{rng.randint(100, 999)}",
+        url=rng.choice(["http://", "https://", ""]) + f"{rng.choice(['kyc-upd', 'sbi-rwd', 'refund-it', 'indpost'])}{rng.randint(1, 999)}.{rng.choice(['xyz', 'in', 'top', 'co'])}/{rng.randint(1000, 9999)}",
+        phone=f"+91 {rng.randint(60000, 99999)} {rng.randint(10000, 99999)}",
+    )
+
+
+def perturb(message: str, rng: random.Random) -> str:
+    """Drops or inserts one word in about half of the variants."""
+    words = message.split()
+    if rng.random() < 0.25:
+        del words[rng.randrange(len(words))]
+    elif rng.random() < 0.33:
+        words.insert(rng.randrange(len(words)), rng.choice(FILLERS))
+    return " ".join(words)
+
+
+def main() -> None:
+    rng = random.Random(7)
+    seeds = [fill(template, rng) for template in CAMPAIGNS]
+    variants = [perturb(fill(template, rng), rng) for template in CAMPAIGNS for _ in range(50)]
+
+    print(f"{'min similarity':>14} {'variant recall':>15} {'false matches':>14} {'p50 µs':>8} {'p99 µs':>8}")
+    for min_similarity in (0.4, 0.5, 0.6, 0.7, 0.8):
+        index = FraudFingerprintIndex(min_similarity=min_similarity, max_entries=10_000, ttl_seconds=3600)
+        index.load(
+            (i + 1, minhash(normalize_message(seed)), {"is_scam": True, "reason": "campaign"}, time.time())
+            for i, seed in enumerate(seeds)
+        )
+
+        latencies, hits = [], 0
+        for message in variants:
+            start = time.perf_counter()
+            verdict = index.lookup(message)
+            latencies.append((time.perf_counter() - start) * 1e6)
+            hits += verdict is not None
+        false_matches = sum(index.lookup(message) is not None for message in UNRELATED)
+
+        ordered = sorted(latencies)
+        p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+        print(
+            f"{min_similarity:>14} {hits / len(variants):>15.1%} {false_matches:>8}/{len(UNRELATED):<5}"
+            f" {statistics.median(ordered):>8.1f} {p99:>8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
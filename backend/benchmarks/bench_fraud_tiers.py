@@ -0,0 +1,92 @@
+"""
+Benchmark: latency and agreement of tiered fraud detection.
+
+Runs every message of the labelled fixture set (scripts/fraud_fixtures.csv)
+through the local classifier tier and, for reference, through the AI model
+with the same prompt /fraud/analyze uses. Reports:
+  - p50/p99 latency of the classifier tier, of the AI model, and of the
+    tiered path (classifier, then the AI model for the uncertain band),
+  - how many messages the classifier decides on its own,
+  - how often those local verdicts agree with the AI model's, and how often
+    both agree with the fixture labels.
+The fingerprint tier is left out: it only answers repeats of past AI verdicts.
+
+The AI model is called once per message; pass --reference labels to compare
+against the fixture labels only, without calling it. Requires the usual
+backend env vars (and a valid GEMINI_API_KEY for the default reference).
+
+Run from the repository root:
+    python -m backend.benchmarks.bench_fraud_tiers [--reference {llm,labels}]
+"""
+import argparse
+import statistics
+import time
+
+from backend.app.services import fraud_detection_service
+from backend.app.services.chat_service import generate_gemini_response
+from backend.app.services.fraud_classifier_service import fraud_classifier
+from backend.scripts.train_fraud_classifier import DEFAULT_CSV, load_csv
+
+REPEATS = 200
+
+
+def percentiles(latencies: list[float]) -> tuple[float, float]:
+    ordered = sorted(latencies)
+    return statistics.median(ordered), ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--csv", default=DEFAULT_CSV, help="CSV file with text,is_scam columns")
+    parser.add_argument("--reference", choices=["llm", "labels"], default="llm")
+    args = parser.parse_args()
+
+    fixtures = load_csv(args.csv)
+    if not fraud_classifier.load():
+        raise SystemExit("No classifier weights; run backend.scripts.train_fraud_classifier first.")
+
+    classifier_latencies, local_verdicts = [], []
+    for text, _ in fixtures:
+        start = time.perf_counter()
+        for _ in range(REPEATS):
+            verdict = fraud_classifier.classify(text)
+        classifier_latencies.append((time.perf_counter() - start) / REPEATS * 1e3)
+        local_verdicts.append(verdict)
+
+    llm_latencies, references = [], []
+    for text, label in fixtures:
+        if args.reference == "labels":
+            references.append(bool(label))
+            continue
+        start = time.perf_counter()
+        response = generate_gemini_response(fraud_detection_service._build_fraud_prompt(text))
+        llm_latencies.append((time.perf_counter() - start) * 1e3)
+        try:
+            references.append(fraud_detection_service._parse_fraud_response(response)["is_scam"])
+        except fraud_detection_service.FraudAnalysisError:
+            references.append(None)
+
+    decided = [(verdict["is_scam"], reference, bool(label))
+               for verdict, reference, (_, label) in zip(local_verdicts, references, fixtures) if verdict is not None]
+    # Messages the AI model could not answer for have no reference to agree with
+    compared = [(is_scam, reference) for is_scam, reference, _ in decided if reference is not None]
+    agreed = sum(is_scam == reference for is_scam, reference in compared)
+
+    print(f"{len(fixtures)} messages, reference: {args.reference}")
+    print(f"{'tier':<24} {'p50 ms':>9} {'p99 ms':>9}")
+    print(f"{'classifier':<24} {percentiles(classifier_latencies)[0]:>9.3f} {percentiles(classifier_latencies)[1]:>9.3f}")
+    if llm_latencies:
+        tiered = [c if v is not None else c + l for c, l, v in zip(classifier_latencies, llm_latencies, local_verdicts)]
+        print(f"{'llm':<24} {percentiles(llm_latencies)[0]:>9.1f} {percentiles(llm_latencies)[1]:>9.1f}")
+        print(f"{'tiered (classifier+llm)':<24} {percentiles(tiered)[0]:>9.1f} {percentiles(tiered)[1]:>9.1f}")
+    print(f"decided locally: {len(decided)}/{len(fixtures)} ({len(decided) / len(fixtures):.1%})")
+    print(f"local agreement with {args.reference}: {agreed}/{len(compared)} ({agreed / max(len(compared), 1):.1%})")
+    if args.reference == "llm":
+        llm_correct = sum(reference == bool(label) for reference, (_, label) in zip(references, fixtures))
+        local_correct = sum(is_scam == label for is_scam, _, label in decided)
+        print(f"llm agreement with labels: {llm_correct}/{len(fixtures)} ({llm_correct / len(fixtures):.1%})")
+        print(f"local agreement with labels: {local_correct}/{len(decided)} ({local_correct / max(len(decided), 1):.1%})")
+
+
+if __name__ == "__main__":
+    main()
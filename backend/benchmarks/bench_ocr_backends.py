@@ -0,0 +1,64 @@
+"""
+Benchmark: in-process tesserocr engine vs. pytesseract (one subprocess per call).
+
+OCRs a batch of small synthetic receipts with each available backend and
+reports the mean and p95 latency per image. The first tesserocr call, which
+loads the language model, is reported separately.
+
+Run from the repository root:
+    python -m backend.benchmarks.bench_ocr_backends --images 50
+"""
+import argparse
+import statistics
+import time
+
+from PIL import Image, ImageDraw, ImageFont
+
+from backend.app.services import ocr_service
+
+
+def make_small_receipt(index: int) -> Image.Image:
+    image = Image.new("L", (600, 300), 255)
+    draw = ImageDraw.Draw(image)
+    font = ImageFont.load_default(size=24)
+    lines = ["CHAI POINT", f"Bill No {1000 + index}", "Masala Chai   40.00", f"TOTAL        {40 + index}.00"]
+    for i, line in enumerate(lines):
+        draw.text((20, 20 + i * 60), line, fill=0, font=font)
+    return image
+
+
+def bench(backend: ocr_service.OcrBackend, images: list[Image.Image]) -> tuple[float, list[float]]:
+    start = time.perf_counter()
+    backend.image_to_string(images[0])
+    first = (time.perf_counter() - start) * 1000
+
+    latencies = []
+    for image in images[1:]:
+        start = time.perf_counter()
+        backend.image_to_string(image)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return first, latencies
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--images", type=int, default=50)
+    args = parser.parse_args()
+    images = [make_small_receipt(i) for i in range(args.images)]
+
+    backends: list[ocr_service.OcrBackend] = [ocr_service.PytesseractBackend()]
+    configured = ocr_service.get_ocr_backend()
+    if configured.name == "tesserocr":
+        backends.append(configured)
+    else:
+        print("The in-process engine is unavailable (see log); only pytesseract is measured.")
+
+    print(f"{'backend':<12} {'first (ms)':>11} {'mean (ms)':>10} {'p95 (ms)':>9}")
+    for backend in backends:
+        first, latencies = bench(backend, images)
+        p95 = sorted(latencies)[int(len(latencies) * 0.95)]
+        print(f"{backend.name:<12} {first:>11.1f} {statistics.mean(latencies):>10.1f} {p95:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Benchmark: latency of one page of a heavy user's transactions and chat
+history at increasing depth, with skip/limit (OFFSET) and with the keyset
+cursor.
+
+Seeds a temporary SQLite database with --rows transactions and chat messages
+for one user (plus as many for other users), then times a 50-row page at
+depths from 0 to almost the end of the history through get_user_transactions
+and get_user_chat_history: once with `skip`, once with the (date, id) of the
+row just before the page, which is what the cursor of the previous page holds.
+
+Run from the repository root:
+    python -m backend.benchmarks.bench_pagination [--rows 200000]
+"""
+import argparse
+import datetime
+import os
+import random
+import statistics
+import tempfile
+import time
+from decimal import Decimal
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from backend.db import crud
+from backend.db.session import Base
+from backend.models.chat_message import ChatMessage
+from backend.models.transaction import Transaction
+from backend.models.user import User
+
+PAGE = 50
+CHUNK = 50_000
+FIRST_DAY = datetime.datetime(2020, 1, 1)
+
+
+def seed(engine, rows: int) -> None:
+    rng = random.Random(7)
+    with engine.begin() as conn:
+        conn.execute(User.__table__.insert(), [  # type: ignore
+            {"id": user_id, "email": f"user{user_id}@example.com", "hashed_password": "x"} for user_id in (1, 2)
+        ])
+        for offset in range(0, 2 * rows, CHUNK):
+            # Spread over five years, to the second, so some rows share a timestamp
+            count = min(CHUNK, 2 * rows - offset)
+            dates = [FIRST_DAY + datetime.timedelta(seconds=rng.randrange(5 * 365 * 86400)) for _ in range(count)]
+            owners = [1 if (offset + i) % 2 == 0 else 2 for i in range(count)]
+            conn.execute(Transaction.__table__.insert(), [  # type: ignore
+                {"description": "seeded", "amount": Decimal("100.00"), "category": "Groceries",
+                 "vendor_name": "DMart", "transaction_date": day, "owner_id": owner}
+                for day, owner in zip(dates, owners)
+            ])
+            conn.execute(ChatMessage.__table__.insert(), [  # type: ignore
+                {"message": "How much did I spend on groceries?", "is_from_user": True, "timestamp": day, "owner_id": owner}
+                for day, owner in zip(dates, owners)
+            ])
+
+
+def timed(func, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200_000, help="Transactions and chat messages of the heavy user.")
+    parser.add_argument("--repeat", type=int, default=10, help="Timing repetitions per page.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Base.metadata.create_all(bind=engine)
+        seed(engine, args.rows)
+        db = sessionmaker(bind=engine)()
+
+        depths = [depth for depth in (0, 1_000, 10_000, 100_000, 1_000_000) if depth < args.rows - PAGE]
+        depths.append(args.rows - PAGE)
+        print(f"{'depth':>9} {'transactions skip ms':>21} {'cursor ms':>10} {'chat skip ms':>13} {'cursor ms':>10}")
+        for depth in depths:
+            row = []
+            for list_rows, key, keyword in (
+                (crud.get_user_transactions, lambda t: (t.transaction_date, t.id), "before"),
+                (crud.get_user_chat_history, lambda m: (m.timestamp, m.id), "after"),
+            ):
+                # The cursor of the previous page is the key of its last row
+                cursor = {keyword: key(list_rows(db, 1, skip=depth - 1, limit=1)[0])} if depth else {}
+                offset_page = list_rows(db, 1, skip=depth, limit=PAGE)
+                assert list_rows(db, 1, limit=PAGE, **cursor) == offset_page
+                row.append(timed(lambda: list_rows(db, 1, skip=depth, limit=PAGE), args.repeat))
+                row.append(timed(lambda: list_rows(db, 1, limit=PAGE, **cursor), args.repeat))
+                db.expunge_all()
+            print(f"{depth:>9} {row[0]:>21.2f} {row[1]:>10.2f} {row[2]:>13.2f} {row[3]:>10.2f}")
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
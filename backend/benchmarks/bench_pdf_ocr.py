@@ -0,0 +1,80 @@
+"""
+Benchmark: serial vs. parallel PDF OCR.
+
+Generates synthetic statement PDFs of increasing page count and times
+ocr_service.extract_text_from_pdf on scanned (image-only) copies, on the
+serial path (1 worker) and on the process pool, plus the digital original,
+which is served from its text layer. Requires the `tesseract` binary and the
+usual backend env vars.
+
+Run from the repository root:
+    python -m backend.benchmarks.bench_pdf_ocr --pages 1 5 10 20
+"""
+import argparse
+import time
+
+import fitz  # PyMuPDF
+
+from backend.app.core.config import settings
+from backend.app.services import ocr_service
+
+
+def make_statement_pdf(page_count: int, scanned: bool = False) -> bytes:
+    """
+    Builds a PDF that looks roughly like a bank statement, one table per page.
+    With scanned=True every page is replaced by a picture of itself, so the
+    document has no text layer.
+    """
+    doc = fitz.open()
+    for page_number in range(page_count):
+        page = doc.new_page()
+        lines = [f"HELIOS BANK - STATEMENT PAGE {page_number + 1}"]
+        lines += [
+            f"{(row % 28) + 1:02d}/03/2024  UPI/SWIGGY/{100000 + row}   {row * 13.5:>10.2f}"
+            for row in range(40)
+        ]
+        page.insert_text((40, 60), "\n".join(lines), fontsize=10)
+    if scanned:
+        image_doc = fitz.open()
+        for page in doc:
+            pix = page.get_pixmap(matrix=fitz.Matrix(2, 2))
+            image_page = image_doc.new_page(width=page.rect.width, height=page.rect.height)
+            image_page.insert_image(image_page.rect, pixmap=pix)
+        doc.close()
+        doc = image_doc
+    pdf_bytes = doc.tobytes()
+    doc.close()
+    return pdf_bytes
+
+
+def time_call(pdf_bytes: bytes, max_workers: int | None) -> float:
+    start = time.perf_counter()
+    ocr_service.extract_text_from_pdf(pdf_bytes, max_workers=max_workers)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 5, 10, 20])
+    args = parser.parse_args()
+
+    # Warm the pool so process start-up is not billed to the first run.
+    time_call(make_statement_pdf(2, scanned=True), max_workers=None)
+
+    print(f"workers={settings.OCR_MAX_WORKERS}")
+    print(f"{'pages':>6} {'serial (s)':>11} {'parallel (s)':>13} {'speedup':>8} {'text layer (s)':>15}")
+    for page_count in args.pages:
+        scanned_pdf = make_statement_pdf(page_count, scanned=True)
+        serial = time_call(scanned_pdf, max_workers=1)
+        parallel = time_call(scanned_pdf, max_workers=None)
+        text_layer = time_call(make_statement_pdf(page_count), max_workers=None)
+        print(
+            f"{page_count:>6} {serial:>11.2f} {parallel:>13.2f} {serial / parallel:>7.2f}x"
+            f" {text_layer:>15.4f}"
+        )
+
+    ocr_service.shutdown_pdf_ocr_pool()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Benchmark: OCR time, image size and accuracy with and without preprocessing.
+
+Builds a small fixture corpus of synthetic receipt "photos" (12 MP, JPEG,
+some stored sideways with an EXIF orientation tag, uneven lighting) and runs
+ocr_service.extract_text_from_image on each with OCR_PREPROCESSING_ENABLED off,
+on, and on with OCR_BINARIZE. Accuracy is the difflib similarity between the OCR output and the
+known receipt text. Requires the `tesseract` binary and the usual backend env vars.
+
+Run from the repository root:
+    python -m backend.benchmarks.bench_preprocessing
+"""
+import difflib
+import io
+import time
+
+from PIL import Image, ImageDraw, ImageFont
+
+from backend.app.core.config import settings
+from backend.app.services import ocr_service
+from backend.app.services.image_preprocessing_service import preprocess_image, preprocessing_stats
+
+RECEIPTS = [
+    ["SWIGGY INSTAMART", "Order #48213", "Milk 1L        64.00", "Bread          45.00", "TOTAL         109.00"],
+    ["BESCOM", "Electricity Bill", "Account 7730012", "Due date 12/04/2024", "Amount due   1,842.00"],
+    ["ZOMATO", "Paneer Tikka   280.00", "Naan x2         90.00", "GST             18.50", "Grand Total    388.50"],
+    ["APOLLO PHARMACY", "Bill No 55102", "Dolo 650       30.00", "Vitamin C     120.00", "Net Amount    150.00"],
+]
+
+EXIF_ORIENTATION = 0x0112
+
+
+def make_receipt_photo(lines: list[str], sideways: bool) -> bytes:
+    """Renders receipt lines as a 4000x3000 JPEG with a lighting gradient."""
+    image = Image.new("L", (3000, 4000), 255)
+    draw = ImageDraw.Draw(image)
+    for y in range(0, 4000, 8):
+        draw.rectangle([0, y, 3000, y + 8], fill=255 - y // 60)
+    font = ImageFont.load_default(size=110)
+    for i, line in enumerate(lines):
+        draw.text((250, 400 + i * 220), line, fill=20, font=font)
+
+    image = image.convert("RGB")
+    exif = Image.Exif()
+    if sideways:
+        # Stored rotated, with the tag telling viewers to rotate it back
+        image = image.transpose(Image.Transpose.ROTATE_90)
+        exif[EXIF_ORIENTATION] = 6
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=90, exif=exif)
+    return buffer.getvalue()
+
+
+def similarity(expected: str, actual: str) -> float:
+    normalize = lambda text: " ".join(text.split()).lower()
+    return difflib.SequenceMatcher(None, normalize(expected), normalize(actual)).ratio()
+
+
+def run(corpus: list[tuple[str, bytes]], enabled: bool, binarize: bool) -> tuple[float, float, float]:
+    settings.OCR_PREPROCESSING_ENABLED = enabled
+    settings.OCR_BINARIZE = binarize
+    elapsed, scores, megapixels = 0.0, [], []
+    for expected, photo in corpus:
+        processed, _ = preprocess_image(Image.open(io.BytesIO(photo)))
+        megapixels.append(processed.width * processed.height / 1e6)
+        start = time.perf_counter()
+        text = ocr_service.extract_text_from_image(photo)
+        elapsed += time.perf_counter() - start
+        scores.append(similarity(expected, text))
+    count = len(corpus)
+    return elapsed / count, sum(megapixels) / count, sum(scores) / count
+
+
+def main() -> None:
+    corpus = [
+        ("\n".join(lines), make_receipt_photo(lines, sideways=i % 2 == 1))
+        for i, lines in enumerate(RECEIPTS)
+    ]
+
+    print(f"{'preprocessing':<14} {'avg OCR (s)':>12} {'avg MP to OCR':>14} {'accuracy':>9}")
+    for label, enabled, binarize in (("off", False, False), ("on", True, False), ("on + binarize", True, True)):
+        seconds, megapixels, accuracy = run(corpus, enabled, binarize)
+        print(f"{label:<14} {seconds:>12.2f} {megapixels:>14.2f} {accuracy:>9.3f}")
+
+    print("\nper-stage timings (ms):")
+    for stage, stats in preprocessing_stats.snapshot().items():
+        print(f"  {stage:<15} avg {stats['avg_ms']:8.2f}")
+
+
+if __name__ == "__main__":
+    main()
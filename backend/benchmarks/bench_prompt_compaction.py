@@ -0,0 +1,101 @@
+"""
+Benchmark: prompt tokens saved by OCR text compaction, and what it keeps.
+
+Builds synthetic OCR output shaped like our largest uploads: multi-page bank
+statements and utility bills with a letterhead and footer on every page,
+Tesseract's padding whitespace, dot leaders, table borders and speckle read as
+text. For each document size it reports the estimated tokens of the raw text,
+after normalization and header/footer removal, and after trimming to the
+budget, the time compaction takes, and whether every amount, date and account
+number of the summary lines survived.
+
+Run from the repository root:
+    python -m backend.benchmarks.bench_prompt_compaction [--budget 2000]
+"""
+import argparse
+import random
+import statistics
+import time
+
+from backend.app.services.prompt_compaction_service import (
+    compact_ocr_text,
+    estimate_tokens,
+    normalize_ocr_text,
+    remove_repeated_lines,
+)
+
+NOISE = ["|||  __ |", "~~ -- == ~~", ". ' , ` .", "|_|_|_|_|_|", "@#%^ &*", "=================="]
+NARRATIONS = ["UPI/SWIGGY/", "NEFT/RENT/", "POS/DMART/", "ATM/WDL/", "UPI/ZOMATO/", "IMPS/SALARY/", "ACH/SIP AXIS/"]
+PROSE = [
+    "Please ensure that your account details are kept confidential at all times.",
+    "For any discrepancy in this statement please contact your home branch within 30 days.",
+    "Customers are advised not to share their card details or OTP with anyone.",
+    "Interest rates are subject to change as per the bank's policy from time to time.",
+]
+
+
+def make_statement(pages: int, rng: random.Random) -> tuple[str, list[str]]:
+    """Returns the OCR text of a statement and the key values the model must see."""
+    key_values = ["501004218873", "Rs. 1,84,220.00", "15/04/2024"]
+    lines = []
+    for page in range(1, pages + 1):
+        if page > 1:
+            lines.append("\f")
+        lines += [
+            "      HDFC   BANK   LIMITED      ",
+            "  Statement of Account   ",
+            f"  Page {page} of {pages}  ",
+            rng.choice(NOISE),
+            "",
+        ]
+        if page == 1:
+            lines += [
+                "Account No : 501004218873        Customer ID : 84412290",
+                "Statement period : 01/03/2024 to 31/03/2024",
+                "",
+            ]
+        for _ in range(30):
+            day = rng.randint(1, 31)
+            amount = f"{rng.randint(10, 50000)}.{rng.randint(0, 99):02d}"
+            lines.append(
+                f"{day:02d}/03/24    {rng.choice(NARRATIONS)}{rng.randint(100000, 999999)}      "
+                f"{amount}          {rng.randint(1000, 200000)}.00"
+            )
+            if rng.random() < 0.2:
+                lines.append(rng.choice(NOISE))
+        lines += ["", *rng.sample(PROSE, 2)]
+        lines += ["   This is a computer generated statement and does not require a signature.   ", "", ""]
+    lines += [
+        "STATEMENT SUMMARY",
+        "Closing Balance ........................ Rs. 1,84,220.00",
+        "Payment due date: 15/04/2024",
+    ]
+    return "\n".join(lines), key_values
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--budget", type=int, default=2000, help="Token budget for the compacted text.")
+    parser.add_argument("--repeat", type=int, default=20, help="Timing repetitions per document.")
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    print(f"{'pages':>5} {'raw':>8} {'cleaned':>8} {'compact':>8} {'saved':>6} {'ms':>7}  key values kept")
+    for pages in (1, 2, 5, 10, 25):
+        text, key_values = make_statement(pages, rng)
+        cleaned = "\n".join(remove_repeated_lines([normalize_ocr_text(page) for page in text.split("\f")]))
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            compacted = compact_ocr_text(text, token_budget=args.budget)
+            timings.append((time.perf_counter() - start) * 1000)
+        raw_tokens, compact_tokens = estimate_tokens(text), estimate_tokens(compacted)
+        kept = sum(value in compacted for value in key_values)
+        print(
+            f"{pages:>5} {raw_tokens:>8} {estimate_tokens(cleaned):>8} {compact_tokens:>8} "
+            f"{1 - compact_tokens / raw_tokens:>6.0%} {statistics.median(timings):>7.2f}  {kept}/{len(key_values)}"
+        )
+
+
+if __name__ == "__main__":
+    main()
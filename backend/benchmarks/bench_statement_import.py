@@ -0,0 +1,114 @@
+"""
+Benchmark: importing a large bank statement.
+
+Generates a CSV statement shaped like an HDFC export (account details above
+the header, debits and credits in separate columns, Indian digit grouping)
+and imports it into a temporary SQLite database, timing:
+  - parse:     parse_statement (header mapping, column-wise date/amount parsing, payees),
+  - insert:    crud.import_user_transactions (duplicate check, one multi-row
+               INSERT, rollup upsert, one commit),
+  - re-import: the same rows again, which must all be detected as duplicates,
+  - per-row:   crud.create_user_transaction for a sample of the rows (a commit
+               and refresh each, the only way to add transactions before),
+               extrapolated to the whole statement.
+Categorization is left out (payees get a fixed category), since it depends
+on the AI model and the vendor category memo.
+
+Run from the repository root:
+    python -m backend.benchmarks.bench_statement_import [--rows 50000]
+"""
+import argparse
+import datetime
+import os
+import random
+import tempfile
+import time
+from decimal import Decimal
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from backend.app.schemas.transactions import TransactionCreate
+from backend.app.services.statement_import_service import parse_statement
+from backend.db import crud
+from backend.db.session import Base
+from backend.models.user import User
+
+PAYEES = ["SWIGGY", "ZOMATO", "DMART", "AMAZON PAY", "UBER INDIA", "BESCOM", "NETFLIX", "APOLLO PHARMACY", "IRCTC", "BIGBASKET"]
+PER_ROW_SAMPLE = 1_000
+
+
+def indian_grouping(amount: Decimal) -> str:
+    whole, fraction = f"{amount:.2f}".split(".")
+    head, tail = whole[:-3], whole[-3:]
+    groups = []
+    while len(head) > 2:
+        groups.insert(0, head[-2:])
+        head = head[:-2]
+    return ",".join(([head] if head else []) + groups + [tail]) + "." + fraction
+
+
+def make_statement(rows: int, rng: random.Random) -> bytes:
+    lines = ["HDFC BANK Ltd.,,,,,,", "Account No : 501004218873,,,,,,", ",,,,,,",
+             "Date,Narration,Chq./Ref.No.,Value Dt,Withdrawal Amt.,Deposit Amt.,Closing Balance"]
+    day = datetime.date(2022, 1, 1)
+    for i in range(rows):
+        day += datetime.timedelta(days=rng.random() < 0.03)
+        reference = rng.randint(10**11, 10**12 - 1)
+        amount = indian_grouping(Decimal(rng.randint(100, 2_500_000)) / 100)
+        if rng.random() < 0.05:
+            narration, debit, credit = f"NEFT CR-HDFC0000123-ACME CORP-SALARY {i}", "", amount
+        else:
+            payee = rng.choice(PAYEES)
+            narration, debit, credit = f"UPI-{payee}-{payee.lower().replace(' ', '')}@icici-ICIC0000001-{reference}-Payment", amount, ""
+        date = day.strftime("%d/%m/%y")
+        lines.append(f'{date},{narration},{reference},{date},"{debit}","{credit}","1,00,000.00"')
+    return "\n".join(lines).encode()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=50_000, help="Rows in the statement.")
+    args = parser.parse_args()
+
+    statement = make_statement(args.rows, random.Random(7))
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Base.metadata.create_all(bind=engine)
+        db = sessionmaker(bind=engine)()
+        db.add_all([User(id=1, email="user1@example.com", hashed_password="x"),
+                    User(id=2, email="user2@example.com", hashed_password="x")])
+        db.commit()
+
+        start = time.perf_counter()
+        parsed = parse_statement(statement, "statement.csv", "text/csv")
+        parse_seconds = time.perf_counter() - start
+        rows = [{**row, "category": "Food & Dining"} for row in parsed["rows"]]
+
+        start = time.perf_counter()
+        imported, _ = crud.import_user_transactions(db, rows, owner_id=1)
+        insert_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        reimported, duplicates = crud.import_user_transactions(db, rows, owner_id=1)
+        reimport_seconds = time.perf_counter() - start
+
+        sample = rows[:PER_ROW_SAMPLE]
+        start = time.perf_counter()
+        for row in sample:
+            crud.create_user_transaction(db, TransactionCreate(
+                description=row["description"], amount=row["amount"], category=row["category"], vendor_name=row["vendor_name"]
+            ), owner_id=2)
+        per_row_seconds = (time.perf_counter() - start) / len(sample) * len(rows)
+        db.close()
+
+    print(f"{parsed['total_rows']:,} rows ({len(statement) / 1e6:.1f} MB): {len(rows):,} debits, "
+          f"{parsed['credits']:,} credits, {parsed['invalid']:,} invalid")
+    print(f"parse      {parse_seconds:8.2f} s")
+    print(f"insert     {insert_seconds:8.2f} s  ({imported:,} inserted)")
+    print(f"re-import  {reimport_seconds:8.2f} s  ({reimported:,} inserted, {duplicates:,} duplicates)")
+    print(f"per-row    {per_row_seconds:8.2f} s  (extrapolated from {len(sample):,} rows)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+Benchmark: per-user transaction queries on a large table, before and after
+the composite (owner_id, transaction_date) and (owner_id, category,
+transaction_date) indexes.
+
+Seeds a transactions table (10 million rows by default, spread over two years
+and --users users), then for one user prints the query plan and the median
+latency of:
+  - month (extract): the old dashboard filter, extract(year/month) on the column,
+  - month (range):   the half-open range transaction_date >= start AND < end,
+  - latest page:     the 50 most recent transactions,
+  - category range:  one category's spending over a quarter,
+first with only the single-column indexes the table had before, then with the
+composite indexes. Uses a temporary SQLite database unless --database-url
+points at an empty Postgres database (plans then come from EXPLAIN ANALYZE).
+
+Run from the repository root:
+    python -m backend.benchmarks.bench_transaction_queries [--rows 10000000]
+"""
+import argparse
+import datetime
+import os
+import random
+import statistics
+import tempfile
+import time
+from decimal import Decimal
+
+from sqlalchemy import create_engine, func, select, text
+
+from backend.db.session import Base
+from backend.models.transaction import Transaction
+from backend.models.user import User
+
+CATEGORIES = ["Food & Dining", "Groceries", "Shopping", "Transportation", "Utilities",
+              "Entertainment", "Health & Wellness", "Travel", "Bills & EMI", None]
+VENDORS = ["Swiggy", "Zomato", "DMart", "Amazon", "Uber", "BESCOM", "Netflix", "Apollo Pharmacy", "IRCTC", "HDFC"]
+FIRST_DAY = datetime.datetime(2023, 1, 1)
+DAYS = 730
+CHUNK = 50_000
+
+transactions = Transaction.__table__
+users = User.__table__
+COMPOSITE_INDEXES = [
+    index for index in transactions.indexes  # type: ignore
+    if index.name in ("ix_transactions_owner_id_transaction_date", "ix_transactions_owner_id_category_transaction_date")
+]
+
+
+def seed(engine, rows: int, user_count: int) -> None:
+    rng = random.Random(7)
+    with engine.begin() as conn:
+        conn.execute(users.insert(), [
+            {"id": user_id, "email": f"user{user_id}@example.com", "hashed_password": "x"}
+            for user_id in range(1, user_count + 1)
+        ])
+    start = time.perf_counter()
+    for offset in range(0, rows, CHUNK):
+        with engine.begin() as conn:
+            conn.execute(transactions.insert(), [
+                {
+                    "description": "seeded",
+                    "amount": Decimal(rng.randint(100, 500_000)) / 100,
+                    "category": rng.choice(CATEGORIES),
+                    "vendor_name": rng.choice(VENDORS),
+                    "transaction_date": FIRST_DAY + datetime.timedelta(seconds=rng.randrange(DAYS * 86400)),
+                    "owner_id": rng.randint(1, user_count),
+                }
+                for _ in range(min(CHUNK, rows - offset))
+            ])
+    print(f"Seeded {rows:,} transactions for {user_count:,} users in {time.perf_counter() - start:.0f}s")
+
+
+def queries(user_id: int) -> dict:
+    month_start, month_end = datetime.datetime(2024, 3, 1), datetime.datetime(2024, 4, 1)
+    return {
+        "month (extract)": select(transactions.c.category, func.sum(transactions.c.amount)).where(
+            transactions.c.owner_id == user_id,
+            func.extract("year", transactions.c.transaction_date) == 2024,
+            func.extract("month", transactions.c.transaction_date) == 3,
+        ).group_by(transactions.c.category),
+        "month (range)": select(transactions.c.category, func.sum(transactions.c.amount)).where(
+            transactions.c.owner_id == user_id,
+            transactions.c.transaction_date >= month_start,
+            transactions.c.transaction_date < month_end,
+        ).group_by(transactions.c.category),
+        "latest page": select(transactions).where(
+            transactions.c.owner_id == user_id,
+        ).order_by(transactions.c.transaction_date.desc()).limit(50),
+        "category range": select(func.sum(transactions.c.amount)).where(
+            transactions.c.owner_id == user_id,
+            transactions.c.category == "Groceries",
+            transactions.c.transaction_date >= datetime.datetime(2024, 1, 1),
+            transactions.c.transaction_date < datetime.datetime(2024, 4, 1),
+        ),
+    }
+
+
+def explain(conn, statement) -> str:
+    sql = str(statement.compile(conn.engine, compile_kwargs={"literal_binds": True}))
+    if conn.dialect.name == "postgresql":
+        rows = conn.exec_driver_sql(f"EXPLAIN ANALYZE {sql}").all()
+        return "\n".join(f"    {row[0]}" for row in rows)
+    rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}").all()
+    return "\n".join(f"    {row[-1]}" for row in rows)
+
+
+def measure(engine, user_id: int, repeat: int) -> dict:
+    results = {}
+    with engine.connect() as conn:
+        for name, statement in queries(user_id).items():
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                conn.execute(statement).all()
+                timings.append((time.perf_counter() - start) * 1000)
+            results[name] = statistics.median(timings)
+            print(f"  {name}: {results[name]:.2f} ms\n{explain(conn, statement)}")
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10_000_000, help="Transactions to seed.")
+    parser.add_argument("--users", type=int, default=1_000, help="Users the transactions are spread over.")
+    parser.add_argument("--repeat", type=int, default=5, help="Timing repetitions per query.")
+    parser.add_argument("--database-url", help="An empty database to seed instead of a temporary SQLite file.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(args.database_url or f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Base.metadata.create_all(bind=engine, tables=[users, transactions])  # type: ignore
+        for index in COMPOSITE_INDEXES:
+            index.drop(bind=engine)
+        seed(engine, args.rows, args.users)
+        user_id = args.users // 2
+
+        print("\nSingle-column indexes only:")
+        before = measure(engine, user_id, args.repeat)
+
+        start = time.perf_counter()
+        for index in COMPOSITE_INDEXES:
+            index.create(bind=engine)
+        with engine.begin() as conn:
+            conn.execute(text("ANALYZE"))
+        print(f"\nCreated the composite indexes in {time.perf_counter() - start:.0f}s")
+        after = measure(engine, user_id, args.repeat)
+
+        print(f"\n{'query':<16} {'before ms':>10} {'after ms':>10} {'speedup':>8}")
+        for name in before:
+            print(f"{name:<16} {before[name]:>10.2f} {after[name]:>10.2f} {before[name] / after[name]:>7.0f}x")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Load test: /health latency while OCR uploads are in flight.
+
+Probes GET /health/ every 50 ms, first on an idle server and then while
+`--concurrency` clients keep uploading `--file` to `--endpoint`. If OCR ran on
+the event loop, health latency would jump to the duration of an OCR call;
+with the executor pools it should stay flat.
+
+Run against a live server (uvicorn backend.main:app) from the repository root:
+    python -m backend.benchmarks.load_health_during_ocr --token <JWT> --file receipt.jpg
+"""
+import argparse
+import asyncio
+import mimetypes
+import os
+import statistics
+import time
+
+import httpx
+
+
+async def probe_health(client: httpx.AsyncClient, base_url: str, duration: float) -> list[float]:
+    latencies = []
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        response = await client.get(f"{base_url}/health/")
+        response.raise_for_status()
+        latencies.append((time.perf_counter() - start) * 1000)
+        await asyncio.sleep(0.05)
+    return latencies
+
+
+async def upload_loop(client: httpx.AsyncClient, url: str, token: str, path: str, stop: asyncio.Event) -> int:
+    with open(path, "rb") as f:
+        file_bytes = f.read()
+    content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+    completed = 0
+    while not stop.is_set():
+        response = await client.post(
+            url,
+            headers={"Authorization": f"Bearer {token}"},
+            files={"file": (os.path.basename(path), file_bytes, content_type)},
+        )
+        response.raise_for_status()
+        completed += 1
+    return completed
+
+
+def summarize(label: str, latencies: list[float]) -> None:
+    ordered = sorted(latencies)
+    p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+    print(
+        f"{label:<10} n={len(ordered):<5} p50={statistics.median(ordered):7.1f} ms"
+        f"  p99={p99:7.1f} ms  max={ordered[-1]:7.1f} ms"
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--base-url", default="http://localhost:8000/api/v1")
+    parser.add_argument("--endpoint", default="/ocr/upload")
+    parser.add_argument("--token", required=True)
+    parser.add_argument("--file", required=True)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=15.0)
+    args = parser.parse_args()
+
+    async with httpx.AsyncClient(timeout=300.0) as client:
+        idle = await probe_health(client, args.base_url, args.duration)
+
+        stop = asyncio.Event()
+        uploaders = [
+            asyncio.create_task(upload_loop(client, args.base_url + args.endpoint, args.token, args.file, stop))
+            for _ in range(args.concurrency)
+        ]
+        loaded = await probe_health(client, args.base_url, args.duration)
+        stop.set()
+        completed = sum(await asyncio.gather(*uploaders))
+
+    summarize("idle", idle)
+    summarize("under OCR", loaded)
+    print(f"OCR uploads completed during the loaded phase: {completed}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
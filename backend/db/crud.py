@@ -1,15 +1,25 @@
-from sqlalchemy import desc, func
+from collections import Counter
+
+from sqlalchemy import desc, func, or_
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from backend.app.schemas.transactions import TransactionCreate
 from backend.models.transaction import Transaction
 from backend.models.user import User
 from backend.models.document import Document
 from backend.models.chat_message import ChatMessage
+from backend.models.conversation_summary import ConversationSummary
+from backend.models.extraction_cache import ExtractionCacheEntry
+from backend.models.ocr_job import OcrJob
+from backend.models.vendor_category import UserVendorCategory, VendorCategory
+from backend.models.fraud_fingerprint import FraudFingerprint
+from backend.models.monthly_spending import MonthlySpending
 from backend.app.schemas.user import UserCreate
 from backend.app.schemas.document import DocumentCreate
 from backend.app.schemas.chat_message import ChatMessageCreateDB
 from backend.app.core.security import get_password_hash
-from datetime import datetime
+from datetime import date, datetime, timedelta
 from decimal import Decimal
 
 # --- User CRUD Functions ---
@@ -45,9 +55,16 @@ def create_user_document(db: Session, doc: DocumentCreate, owner_id: int) -> Doc
     return db_document
 
 
-def get_user_documents(db: Session, user_id: int, skip: int = 0, limit: int = 100) -> list[Document]:
-    """Retrieves a list of documents for a specific user."""
-    return db.query(Document).filter(Document.owner_id == user_id).offset(skip).limit(limit).all()
+def get_user_documents(db: Session, user_id: int, skip: int = 0, limit: int = 100, after_id: int | None = None) -> list[Document]:
+    """
+    Retrieves a list of documents for a specific user, oldest first. Pass the
+    id of the last document of a page as `after_id` to get the next page;
+    unlike `skip`, that costs the same at any depth.
+    """
+    query = db.query(Document).filter(Document.owner_id == user_id)
+    if after_id is not None:
+        query = query.filter(Document.id > after_id)
+    return query.order_by(Document.id).offset(skip).limit(limit).all()
 
 
 # --- Chat Message CRUD Functions ---
@@ -70,20 +87,77 @@ def create_chat_message(db: Session, msg: ChatMessageCreateDB, owner_id: int) ->
     db.refresh(db_message)
     return db_message
 
-def get_user_chat_history(db: Session, user_id: int, skip: int = 0, limit: int = 100) -> list[ChatMessage]:
+def get_user_chat_history(
+    db: Session, user_id: int, skip: int = 0, limit: int = 100, after: tuple[datetime, int] | None = None
+) -> list[ChatMessage]:
     """
-    Retrieves the chat history for a specific user.
+    Retrieves the chat history for a specific user, oldest first.
 
     Args:
         db: The database session.
         user_id: The ID of the user whose chat history to retrieve.
         skip: The number of records to skip (for pagination).
         limit: The maximum number of records to return.
+        after: The (timestamp, id) of the last message of the previous page;
+            only later messages are returned. Unlike `skip`, this costs the
+            same at any depth.
 
     Returns:
         A list of ChatMessage objects.
     """
-    return db.query(ChatMessage).filter(ChatMessage.owner_id == user_id).order_by(ChatMessage.timestamp.asc()).offset(skip).limit(limit).all()
+    query = db.query(ChatMessage).filter(ChatMessage.owner_id == user_id)
+    if after is not None:
+        timestamp, message_id = after
+        # Written so the timestamp bound alone can use the (owner_id, timestamp) index
+        query = query.filter(
+            ChatMessage.timestamp >= timestamp,
+            or_(ChatMessage.timestamp > timestamp, ChatMessage.id > message_id),
+        )
+    return query.order_by(ChatMessage.timestamp.asc(), ChatMessage.id.asc()).offset(skip).limit(limit).all()
+
+
+def get_recent_chat_messages(db: Session, user_id: int, after_id: int, limit: int) -> list[ChatMessage]:
+    """
+    Retrieves a user's latest chat messages, newest first, that are newer
+    than `after_id`. Served by the (owner_id, id) index, so the cost does not
+    depend on the length of the history.
+    """
+    return (
+        db.query(ChatMessage)
+        .filter(ChatMessage.owner_id == user_id, ChatMessage.id > after_id)
+        .order_by(ChatMessage.id.desc())
+        .limit(limit)
+        .all()
+    )
+
+
+# --- Conversation Summary CRUD Functions ---
+
+def get_conversation_summary(db: Session, user_id: int) -> ConversationSummary | None:
+    """Fetches the running summary of a user's conversation with the agent, if any."""
+    return db.query(ConversationSummary).filter(ConversationSummary.owner_id == user_id).first()
+
+
+def upsert_conversation_summary(db: Session, user_id: int, summary: str, summarized_through_id: int) -> ConversationSummary:
+    """
+    Stores a user's running conversation summary, unless a concurrent update
+    already folded in newer messages.
+    """
+    row = get_conversation_summary(db, user_id)
+    if row is None:
+        row = ConversationSummary(owner_id=user_id, summary=summary, summarized_through_id=summarized_through_id)
+        db.add(row)
+        try:
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+            row = get_conversation_summary(db, user_id)
+    if row.summarized_through_id < summarized_through_id:  # type: ignore
+        row.summary = summary  # type: ignore
+        row.summarized_through_id = summarized_through_id  # type: ignore
+        db.commit()
+    db.refresh(row)
+    return row  # type: ignore
 
 # --- Transaction CRUD Functions ---
 
@@ -103,65 +177,662 @@ def create_user_transaction(db: Session, transaction: TransactionCreate, owner_i
     """
     db_transaction = Transaction(**transaction.model_dump(), owner_id=owner_id)
     db.add(db_transaction)
+    db.flush()
+    _add_to_monthly_spending(db, [db_transaction])
     db.commit()
     db.refresh(db_transaction)
     return db_transaction
 
 
-def get_user_transactions(db: Session, user_id: int, skip: int = 0, limit: int = 100) -> list[Transaction]:
+def create_user_transactions_bulk(db: Session, transactions: list[TransactionCreate], owner_id: int) -> list[Transaction]:
+    """
+    Creates many transactions for a user in one batched INSERT and a single commit.
+
+    Args:
+        db: The database session.
+        transactions: The transaction creation data.
+        owner_id: The ID of the user who owns these transactions.
+
+    Returns:
+        The newly created Transaction objects, in the same order.
+    """
+    if not transactions:
+        return []
+    db_transactions = [Transaction(**transaction.model_dump(), owner_id=owner_id) for transaction in transactions]
+    db.add_all(db_transactions)
+    db.flush()
+    _add_to_monthly_spending(db, db_transactions)
+    ids = [db_transaction.id for db_transaction in db_transactions]
+    db.commit()
+    # One SELECT reloads all rows expired by the commit, instead of a refresh per row
+    loaded = {t.id: t for t in db.query(Transaction).filter(Transaction.id.in_(ids)).all()}
+    return [loaded[transaction_id] for transaction_id in ids]
+
+
+def import_user_transactions(db: Session, rows: list[dict], owner_id: int) -> tuple[int, int]:
     """
-    Retrieves a list of transactions for a specific user.
+    Inserts imported transactions (e.g. the rows of a bank statement) with
+    one multi-row INSERT, updates the monthly spending rollup, and commits
+    once. Rows that duplicate a transaction the user already has, on the same
+    day with the same amount and vendor, are skipped. Duplicates are counted,
+    so re-importing a statement adds nothing while two identical payments
+    within one statement are both kept.
+
+    Args:
+        db: The database session.
+        rows: Dictionaries with transaction_date, amount, category,
+            vendor_name and description.
+        owner_id: The ID of the user who owns these transactions.
+
+    Returns:
+        The number of transactions inserted and of duplicates skipped.
+    """
+    if not rows:
+        return 0, 0
+    start = min(row["transaction_date"] for row in rows).replace(hour=0, minute=0, second=0, microsecond=0)
+    end = max(row["transaction_date"] for row in rows).replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+    existing = Counter(
+        _import_key(transaction_date, amount, vendor_name)
+        for transaction_date, amount, vendor_name in db.query(
+            Transaction.transaction_date, Transaction.amount, Transaction.vendor_name
+        ).filter(
+            Transaction.owner_id == owner_id,
+            Transaction.transaction_date >= start,
+            Transaction.transaction_date < end,
+        )
+    )
+
+    new_rows = []
+    for row in rows:
+        key = _import_key(row["transaction_date"], row["amount"], row["vendor_name"])
+        if existing[key] > 0:
+            existing[key] -= 1
+        else:
+            new_rows.append({**row, "owner_id": owner_id})
+    if new_rows:
+        db.bulk_insert_mappings(Transaction, new_rows)  # type: ignore
+        _add_rows_to_monthly_spending(db, [
+            (owner_id, row["transaction_date"], row["category"], row["amount"]) for row in new_rows
+        ])
+    db.commit()
+    return len(new_rows), len(rows) - len(new_rows)
+
+
+def _import_key(transaction_date: datetime, amount, vendor_name: str | None) -> tuple:
+    return transaction_date.date(), Decimal(amount).quantize(Decimal("0.01")), (vendor_name or "").strip().lower()
+
+
+def get_user_transactions(
+    db: Session, user_id: int, skip: int = 0, limit: int = 100,
+    start: datetime | None = None, end: datetime | None = None,
+    before: tuple[datetime, int] | None = None,
+) -> list[Transaction]:
+    """
+    Retrieves a list of transactions for a specific user, latest first.
 
     Args:
         db: The database session.
         user_id: The ID of the user whose transactions to retrieve.
         skip: The number of records to skip (for pagination).
         limit: The maximum number of records to return.
+        start: Only transactions dated at or after this.
+        end: Only transactions dated before this.
+        before: The (transaction_date, id) of the last transaction of the
+            previous page; only older transactions are returned. Unlike
+            `skip`, this costs the same at any depth.
 
     Returns:
         A list of Transaction objects.
     """
-    return db.query(Transaction).filter(Transaction.owner_id == user_id).order_by(desc(Transaction.transaction_date)).offset(skip).limit(limit).all()
+    query = db.query(Transaction).filter(Transaction.owner_id == user_id)
+    if start is not None:
+        query = query.filter(Transaction.transaction_date >= start)
+    if end is not None:
+        query = query.filter(Transaction.transaction_date < end)
+    if before is not None:
+        transaction_date, transaction_id = before
+        # Written so the date bound alone can use the (owner_id, transaction_date) index
+        query = query.filter(
+            Transaction.transaction_date <= transaction_date,
+            or_(Transaction.transaction_date < transaction_date, Transaction.id < transaction_id),
+        )
+    return query.order_by(desc(Transaction.transaction_date), desc(Transaction.id)).offset(skip).limit(limit).all()
+
+
+def get_user_transaction(db: Session, transaction_id: int, user_id: int) -> Transaction | None:
+    """Fetches a single transaction if it belongs to the given user."""
+    return db.query(Transaction).filter(Transaction.id == transaction_id, Transaction.owner_id == user_id).first()
+
+
+def update_transaction_category(db: Session, transaction: Transaction, category: str) -> Transaction:
+    """Changes the category of a transaction, moving its amount between categories in the rollup."""
+    _add_to_monthly_spending(db, [transaction], sign=-1)
+    transaction.category = category  # type: ignore
+    _add_to_monthly_spending(db, [transaction])
+    db.commit()
+    db.refresh(transaction)
+    return transaction
+
+
+def delete_user_transaction(db: Session, transaction: Transaction) -> None:
+    """Deletes a transaction and takes it out of the monthly spending rollup."""
+    _add_to_monthly_spending(db, [transaction], sign=-1)
+    db.delete(transaction)
+    db.commit()
+
+
+def _add_to_monthly_spending(db: Session, transactions: list[Transaction], sign: int = 1) -> None:
+    """
+    Adds (sign=1) or removes (sign=-1) transactions to/from the monthly
+    spending rollup with one upsert, without committing, so the rollup
+    changes in the same database transaction as the transactions themselves.
+    """
+    _add_rows_to_monthly_spending(db, [
+        (transaction.owner_id, transaction.transaction_date, transaction.category, transaction.amount)  # type: ignore
+        for transaction in transactions
+    ], sign=sign)
+
+
+def _add_rows_to_monthly_spending(db: Session, rows: list[tuple], sign: int = 1) -> None:
+    """
+    Like _add_to_monthly_spending, for (owner_id, transaction_date, category,
+    amount) tuples, e.g. of rows inserted without loading them as objects.
+    """
+    deltas: dict[tuple[int, date, str], list] = {}
+    for owner_id, transaction_date, category, amount in rows:
+        key = (owner_id, _month_start(transaction_date), _rollup_category(category))
+        delta = deltas.setdefault(key, [Decimal("0.00"), 0])
+        delta[0] += sign * Decimal(amount)
+        delta[1] += sign
+    if not deltas:
+        return
+
+    insert = postgresql.insert if db.get_bind().dialect.name == "postgresql" else sqlite.insert
+    statement = insert(MonthlySpending).values([
+        {"owner_id": owner_id, "month": month, "category": category, "total": total, "transaction_count": count}
+        for (owner_id, month, category), (total, count) in deltas.items()
+    ])
+    db.execute(statement.on_conflict_do_update(
+        index_elements=["owner_id", "month", "category"],
+        set_={
+            "total": MonthlySpending.total + statement.excluded.total,
+            "transaction_count": MonthlySpending.transaction_count + statement.excluded.transaction_count,
+        },
+    ))
+    if sign < 0:
+        db.query(MonthlySpending).filter(
+            MonthlySpending.owner_id.in_({owner_id for owner_id, _, _ in deltas}),
+            MonthlySpending.transaction_count <= 0,
+        ).delete(synchronize_session=False)
+
+
+def _month_start(value: datetime | None) -> date:
+    # Transactions without a date count towards the month they were saved in
+    return (value or datetime.utcnow()).date().replace(day=1)
+
+
+def _rollup_category(category: str | None) -> str:
+    return category or "Uncategorized"
 
 
 # --- Dashboard CRUD Functions ---
 
-def get_monthly_spending_summary(db: Session, user_id: int) -> dict:
+def get_spending_rollup(db: Session, user_id: int, start: date, end: date) -> dict:
     """
-    Calculates the total spending and spending per category for the current month for a given user.
+    Reads a user's total spending and spending per category for whole
+    calendar months from the monthly spending rollup.
 
     Args:
         db: The database session.
         user_id: The ID of the user to summarize.
+        start: First day of the first month to include.
+        end: First day of the month after the last one to include.
 
     Returns:
         A dictionary containing the total spending and a breakdown by category.
     """
-    today = datetime.utcnow()
-    
-    # Calculate total spending for the current month
-    total_spending = db.query(func.sum(Transaction.amount)).filter(
-        Transaction.owner_id == user_id,
-        func.extract('year', Transaction.transaction_date) == today.year,
-        func.extract('month', Transaction.transaction_date) == today.month
-    ).scalar() or Decimal('0.00')
-
-    # Calculate spending by category for the current month
-    spending_by_category_query = db.query(
-        Transaction.category,
-        func.sum(Transaction.amount).label("total")
-    ).filter(
+    rows = db.query(MonthlySpending.category, func.sum(MonthlySpending.total)).filter(
+        MonthlySpending.owner_id == user_id,
+        MonthlySpending.month >= start,
+        MonthlySpending.month < end,
+    ).group_by(MonthlySpending.category).all()
+    spending_by_category = {category: total for category, total in rows}
+    return {
+        "total_spending": sum(spending_by_category.values(), Decimal("0.00")),
+        "spending_by_category": spending_by_category,
+    }
+
+
+def get_monthly_spending_rollup(db: Session, user_id: int, month: date) -> dict:
+    """Reads a user's spending for the month containing `month` from the rollup (see get_spending_rollup)."""
+    start = month.replace(day=1)
+    return get_spending_rollup(db, user_id, start, _next_month(start))
+
+
+def get_spending_summary(db: Session, user_id: int, start: datetime, end: datetime) -> dict:
+    """
+    Calculates a user's total spending and spending per category for
+    transactions dated in [start, end), with one grouped query. The plain
+    range on transaction_date is served by the (owner_id, transaction_date) index.
+
+    Args:
+        db: The database session.
+        user_id: The ID of the user to summarize.
+        start: Start of the period (inclusive).
+        end: End of the period (exclusive).
+
+    Returns:
+        A dictionary containing the total spending and a breakdown by category.
+    """
+    rows = db.query(Transaction.category, func.sum(Transaction.amount)).filter(
         Transaction.owner_id == user_id,
-        func.extract('year', Transaction.transaction_date) == today.year,
-        func.extract('month', Transaction.transaction_date) == today.month
+        Transaction.transaction_date >= start,
+        Transaction.transaction_date < end,
     ).group_by(Transaction.category).all()
-
-    spending_by_category = {
-        category: total for category, total in spending_by_category_query
+    spending_by_category = {category: total for category, total in rows}
+    return {
+        "total_spending": sum(spending_by_category.values(), Decimal("0.00")),
+        "spending_by_category": spending_by_category,
     }
 
-    return {
-        "total_spending": total_spending,
-        "spending_by_category": spending_by_category
+
+def _next_month(day: date) -> date:
+    return date(day.year + day.month // 12, day.month % 12 + 1, 1)
+
+
+def rebuild_monthly_spending(db: Session, user_id: int | None = None) -> int:
+    """
+    Recomputes the monthly spending rollup from the transactions table, for
+    one user or everyone, in a single database transaction.
+
+    Returns:
+        The number of rollup rows written.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        month_start = func.date_trunc("month", Transaction.transaction_date)
+    else:
+        month_start = func.strftime("%Y-%m-01", Transaction.transaction_date)
+    query = db.query(
+        Transaction.owner_id, month_start, Transaction.category,
+        func.sum(Transaction.amount), func.count(Transaction.id),
+    ).filter(Transaction.transaction_date.isnot(None))
+    rollup = db.query(MonthlySpending)
+    if user_id is not None:
+        query = query.filter(Transaction.owner_id == user_id)
+        rollup = rollup.filter(MonthlySpending.owner_id == user_id)
+    rows = query.group_by(Transaction.owner_id, month_start, Transaction.category).all()
+
+    rollup.delete(synchronize_session=False)
+    totals: dict[tuple[int, date, str], list] = {}
+    for owner_id, month, category, total, count in rows:
+        if isinstance(month, str):
+            month = date.fromisoformat(month)
+        elif isinstance(month, datetime):
+            month = month.date()
+        # Categories that are NULL and 'Uncategorized' share a rollup row
+        entry = totals.setdefault((owner_id, month, _rollup_category(category)), [Decimal("0.00"), 0])
+        entry[0] += Decimal(total)
+        entry[1] += count
+    db.bulk_insert_mappings(MonthlySpending, [  # type: ignore
+        {"owner_id": owner_id, "month": month, "category": category, "total": total, "transaction_count": count}
+        for (owner_id, month, category), (total, count) in totals.items()
+    ])
+    db.commit()
+    return len(totals)
+
+
+def get_monthly_spending_summary(db: Session, user_id: int) -> dict:
+    """
+    Calculates the total spending and spending per category for the current month for a given user.
+    Scans the transactions table; the dashboard reads the monthly spending
+    rollup instead, and this is kept to check the rollup against (see
+    backend/scripts/rebuild_monthly_spending.py).
+
+    Args:
+        db: The database session.
+        user_id: The ID of the user to summarize.
+
+    Returns:
+        A dictionary containing the total spending and a breakdown by category.
+    """
+    month = datetime.utcnow().date().replace(day=1)
+    return get_spending_summary(
+        db, user_id, datetime.combine(month, datetime.min.time()), datetime.combine(_next_month(month), datetime.min.time())
+    )
+
+
+# --- Extraction Cache CRUD Functions ---
+
+def get_extraction_cache_entry(db: Session, content_hash: str, kind: str, max_age: timedelta) -> ExtractionCacheEntry | None:
+    """Fetches a cached OCR/extraction result that is younger than max_age."""
+    return db.query(ExtractionCacheEntry).filter(
+        ExtractionCacheEntry.content_hash == content_hash,
+        ExtractionCacheEntry.kind == kind,
+        ExtractionCacheEntry.created_at >= datetime.utcnow() - max_age,
+    ).first()
+
+
+def upsert_extraction_cache_entry(db: Session, content_hash: str, kind: str, value: str) -> None:
+    """Stores a cached OCR/extraction result, replacing any previous value."""
+    entry = db.query(ExtractionCacheEntry).filter(
+        ExtractionCacheEntry.content_hash == content_hash,
+        ExtractionCacheEntry.kind == kind,
+    ).first()
+    if entry is None:
+        db.add(ExtractionCacheEntry(content_hash=content_hash, kind=kind, value=value))
+    else:
+        entry.value = value  # type: ignore
+        entry.created_at = datetime.utcnow()  # type: ignore
+    try:
+        db.commit()
+    except IntegrityError:
+        # A concurrent request stored the same result first
+        db.rollback()
+
+
+def evict_extraction_cache_entries(db: Session, max_age: timedelta, max_entries: int) -> int:
+    """
+    Deletes expired cache rows and, if the table is still over max_entries,
+    the oldest rows beyond that limit.
+
+    Returns:
+        The number of deleted rows.
+    """
+    deleted = db.query(ExtractionCacheEntry).filter(
+        ExtractionCacheEntry.created_at < datetime.utcnow() - max_age
+    ).delete(synchronize_session=False)
+
+    cutoff = db.query(ExtractionCacheEntry.created_at).order_by(
+        desc(ExtractionCacheEntry.created_at)
+    ).offset(max_entries).limit(1).scalar()
+    if cutoff is not None:
+        deleted += db.query(ExtractionCacheEntry).filter(
+            ExtractionCacheEntry.created_at <= cutoff
+        ).delete(synchronize_session=False)
+
+    db.commit()
+    return deleted
+
+
+# --- Vendor Category CRUD Functions ---
+
+# An entry is only replaced by a source of equal or higher rank, so curated
+# seed entries survive later AI answers for the same vendor. Rows from other
+# sources (user corrections were once stored here, shared by everyone) are
+# ignored by lookups and replaced by the next write.
+VENDOR_CATEGORY_SOURCE_RANK = {"llm": 0, "seed": 1}
+
+
+def get_vendor_category(db: Session, vendor_key: str) -> VendorCategory | None:
+    """Fetches the memoized category of a normalized vendor name."""
+    return db.query(VendorCategory).filter(
+        VendorCategory.vendor_key == vendor_key, VendorCategory.source.in_(list(VENDOR_CATEGORY_SOURCE_RANK))
+    ).first()
+
+
+def get_vendor_categories(db: Session, vendor_keys: list[str]) -> list[VendorCategory]:
+    """Fetches the memoized categories of many normalized vendor names with one query."""
+    if not vendor_keys:
+        return []
+    return db.query(VendorCategory).filter(
+        VendorCategory.vendor_key.in_(vendor_keys), VendorCategory.source.in_(list(VENDOR_CATEGORY_SOURCE_RANK))
+    ).all()
+
+
+def upsert_vendor_categories(db: Session, categories: dict[str, str], source: str) -> int:
+    """
+    Stores the categories of many normalized vendor names with one lookup
+    query and a single commit. If a concurrent request memoized one of them
+    first, the batch is retried row by row, so only that row is affected.
+
+    Args:
+        db: The database session.
+        categories: Normalized vendor name -> category.
+        source: Where the categories came from ('llm' or 'seed').
+
+    Returns:
+        The number of rows inserted or updated.
+    """
+    if not categories:
+        return 0
+    existing = {
+        entry.vendor_key: entry
+        for entry in db.query(VendorCategory).filter(VendorCategory.vendor_key.in_(list(categories)))
     }
+    changed = sum(
+        _set_vendor_category(db, existing.get(vendor_key), vendor_key, category, source)
+        for vendor_key, category in categories.items()
+    )
+    try:
+        db.commit()
+        return changed
+    except IntegrityError:
+        db.rollback()
+
+    changed = 0
+    for vendor_key, category in categories.items():
+        entry = db.query(VendorCategory).filter(VendorCategory.vendor_key == vendor_key).first()
+        if not _set_vendor_category(db, entry, vendor_key, category, source):
+            continue
+        try:
+            db.commit()
+            changed += 1
+        except IntegrityError:
+            # Inserted by someone else since the lookup; theirs is as good as ours
+            db.rollback()
+    return changed
+
+
+def _set_vendor_category(db: Session, entry: VendorCategory | None, vendor_key: str, category: str, source: str) -> bool:
+    """Adds or updates one memo entry if the source may replace it; returns whether it did."""
+    if entry is None:
+        db.add(VendorCategory(vendor_key=vendor_key, category=category, source=source))
+    elif VENDOR_CATEGORY_SOURCE_RANK.get(entry.source, -1) <= VENDOR_CATEGORY_SOURCE_RANK[source]:  # type: ignore
+        entry.category = category  # type: ignore
+        entry.source = source  # type: ignore
+    else:
+        return False
+    return True
+
+
+def get_user_vendor_categories(db: Session, owner_id: int, vendor_keys: list[str]) -> list[UserVendorCategory]:
+    """Fetches a user's own corrections for many normalized vendor names with one query."""
+    if not vendor_keys:
+        return []
+    return db.query(UserVendorCategory).filter(
+        UserVendorCategory.owner_id == owner_id, UserVendorCategory.vendor_key.in_(vendor_keys)
+    ).all()
+
+
+def upsert_user_vendor_category(db: Session, owner_id: int, vendor_key: str, category: str) -> None:
+    """Stores a user's own category for a normalized vendor name, replacing their earlier correction."""
+    for _ in range(2):
+        entry = db.query(UserVendorCategory).filter(
+            UserVendorCategory.owner_id == owner_id, UserVendorCategory.vendor_key == vendor_key
+        ).first()
+        if entry is None:
+            db.add(UserVendorCategory(owner_id=owner_id, vendor_key=vendor_key, category=category))
+        else:
+            entry.category = category  # type: ignore
+        try:
+            db.commit()
+            return
+        except IntegrityError:
+            # The same user corrected this vendor concurrently; update their row instead
+            db.rollback()
+
+
+def get_vendor_category_counts(db: Session) -> list[tuple[str, str, int]]:
+    """
+    Counts how often each (vendor_name, category) pair occurs across all
+    transactions; used to seed the vendor category memo from history.
+    """
+    return db.query(
+        Transaction.vendor_name, Transaction.category, func.count(Transaction.id)
+    ).filter(
+        Transaction.vendor_name.isnot(None), Transaction.category.isnot(None)
+    ).group_by(Transaction.vendor_name, Transaction.category).all()  # type: ignore
+
+
+# --- Fraud Fingerprint CRUD Functions ---
+
+def create_fraud_fingerprint(db: Session, signature: bytes, template: str, is_scam: bool, reason: str) -> FraudFingerprint:
+    """Stores the verdict for a new scam template."""
+    entry = FraudFingerprint(signature=signature, template=template, is_scam=is_scam, reason=reason)
+    db.add(entry)
+    db.commit()
+    db.refresh(entry)
+    return entry
+
+
+def create_fraud_fingerprints_bulk(db: Session, rows: list[dict]) -> None:
+    """Stores many scam templates with one batched INSERT and a single commit."""
+    db.bulk_insert_mappings(FraudFingerprint, rows)  # type: ignore
+    db.commit()
+
+
+def get_fraud_fingerprints(db: Session, since_id: int, max_age: timedelta) -> list[FraudFingerprint]:
+    """Fetches unexpired scam templates with an id greater than since_id, oldest first."""
+    return db.query(FraudFingerprint).filter(
+        FraudFingerprint.id > since_id,
+        FraudFingerprint.created_at >= datetime.utcnow() - max_age,
+    ).order_by(FraudFingerprint.id).all()
+
+
+def update_fraud_fingerprint_signatures(db: Session, signatures: dict[int, bytes]) -> None:
+    """Replaces the signatures of many templates (id -> signature) in one batch."""
+    db.bulk_update_mappings(FraudFingerprint, [{"id": i, "signature": sig} for i, sig in signatures.items()])  # type: ignore
+    db.commit()
+
+
+def delete_fraud_fingerprints(db: Session, ids: list[int]) -> None:
+    """Deletes the given scam templates."""
+    if ids:
+        db.query(FraudFingerprint).filter(FraudFingerprint.id.in_(ids)).delete(synchronize_session=False)
+        db.commit()
 
+
+def evict_fraud_fingerprints(db: Session, max_age: timedelta, max_entries: int) -> int:
+    """
+    Deletes expired scam templates and, if the table is still over
+    max_entries, the oldest templates beyond that limit.
+
+    Returns:
+        The number of deleted rows.
+    """
+    deleted = db.query(FraudFingerprint).filter(
+        FraudFingerprint.created_at < datetime.utcnow() - max_age
+    ).delete(synchronize_session=False)
+
+    cutoff = db.query(FraudFingerprint.id).order_by(
+        desc(FraudFingerprint.id)
+    ).offset(max_entries).limit(1).scalar()
+    if cutoff is not None:
+        deleted += db.query(FraudFingerprint).filter(
+            FraudFingerprint.id <= cutoff
+        ).delete(synchronize_session=False)
+
+    db.commit()
+    return deleted
+
+
+# --- OCR Job CRUD Functions ---
+
+def create_ocr_job(db: Session, job: OcrJob) -> OcrJob:
+    """Saves a newly submitted background job."""
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+def get_ocr_job(db: Session, job_id: str) -> OcrJob | None:
+    """Fetches a background job by its id."""
+    return db.query(OcrJob).filter(OcrJob.id == job_id).first()
+
+
+def requeue_expired_ocr_jobs(db: Session) -> list[str]:
+    """
+    Marks running jobs whose lease has expired, i.e. whose worker process
+    stopped without finishing them, as queued again. Jobs still leased to a
+    live process (this one or another) are left alone.
+
+    Returns:
+        The ids of the jobs that were requeued, oldest first.
+    """
+    expired = (OcrJob.status == "running") & (
+        OcrJob.lease_expires_at.is_(None) | (OcrJob.lease_expires_at < datetime.utcnow())
+    )
+    rows = db.query(OcrJob.id).filter(expired).order_by(OcrJob.created_at.asc()).all()
+    job_ids = [job_id for (job_id,) in rows]
+    if job_ids:
+        db.query(OcrJob).filter(OcrJob.id.in_(job_ids), expired).update(
+            {OcrJob.status: "queued", OcrJob.worker_id: None, OcrJob.lease_expires_at: None},
+            synchronize_session=False,
+        )
+        db.commit()
+    return job_ids
+
+
+def get_queued_ocr_job_ids(db: Session) -> list[str]:
+    """Returns the ids of all queued jobs, oldest first."""
+    rows = db.query(OcrJob.id).filter(OcrJob.status == "queued").order_by(OcrJob.created_at.asc()).all()
+    return [job_id for (job_id,) in rows]
+
+
+def claim_ocr_job(db: Session, job_id: str, worker_id: str, lease_seconds: int) -> OcrJob | None:
+    """
+    Atomically moves a queued job to running and leases it to a worker process.
+
+    Returns:
+        The job, or None if it was already claimed by another worker.
+    """
+    now = datetime.utcnow()
+    claimed = db.query(OcrJob).filter(OcrJob.id == job_id, OcrJob.status == "queued").update(
+        {
+            OcrJob.status: "running",
+            OcrJob.worker_id: worker_id,
+            OcrJob.lease_expires_at: now + timedelta(seconds=lease_seconds),
+            OcrJob.updated_at: now,
+        },
+        synchronize_session=False,
+    )
+    db.commit()
+    return get_ocr_job(db, job_id) if claimed else None
+
+
+def renew_ocr_job_leases(db: Session, worker_id: str, job_ids: list[str], lease_seconds: int) -> None:
+    """Extends the leases of the given running jobs held by a worker process."""
+    db.query(OcrJob).filter(
+        OcrJob.id.in_(job_ids), OcrJob.status == "running", OcrJob.worker_id == worker_id
+    ).update(
+        {OcrJob.lease_expires_at: datetime.utcnow() + timedelta(seconds=lease_seconds)},
+        synchronize_session=False,
+    )
+    db.commit()
+
+
+def release_ocr_job(db: Session, job_id: str, worker_id: str) -> None:
+    """Puts a running job leased to a worker process back in the queue, e.g. when the process shuts down."""
+    db.query(OcrJob).filter(
+        OcrJob.id == job_id, OcrJob.status == "running", OcrJob.worker_id == worker_id
+    ).update(
+        {OcrJob.status: "queued", OcrJob.worker_id: None, OcrJob.lease_expires_at: None},
+        synchronize_session=False,
+    )
+    db.commit()
+
+
+def update_ocr_job(db: Session, job: OcrJob, **fields) -> OcrJob:
+    """Updates the status/result fields of a background job."""
+    for name, value in fields.items():
+        setattr(job, name, value)
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+def delete_ocr_job(db: Session, job: OcrJob) -> None:
+    """Deletes a background job."""
+    db.delete(job)
+    db.commit()
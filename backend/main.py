@@ -1,8 +1,18 @@
-from fastapi import FastAPI
+import math
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from sqlalchemy import inspect, text
 from backend.app.core.config import settings
 from backend.app.api.api_v1.api import api_router
 from backend.db.session import engine, Base
 from backend.models import user
+from backend.app.core import executors
+from backend.app.services import ocr_service, ocr_job_service
+from backend.app.services.fraud_classifier_service import fraud_classifier
+from backend.app.services.fraud_fingerprint_service import fraud_fingerprint_index
+from backend.app.services.llm_gateway_service import LLMRateLimitedError, LLMUnavailableError
+from backend.app.api.pagination import NEXT_CURSOR_HEADER
 import os
 import sys
 from backend.app.api.api_v1.api import api_router
@@ -17,6 +27,19 @@ if PROJECT_ROOT not in sys.path:
 
 def create_db_and_tables():
     Base.metadata.create_all(bind=engine)
+    # ...and columns added to them later (nullable ones only)
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing and column.nullable:
+                    column_type = column.type.compile(dialect=engine.dialect)
+                    conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"))
+    # create_all skips existing tables, so indexes added to them later are created here
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
 
 from contextlib import asynccontextmanager
 
@@ -24,9 +47,15 @@ from contextlib import asynccontextmanager
 async def lifespan(app: FastAPI):
     print("--- Starting up: Creating database tables ---")
     create_db_and_tables()
+    fraud_classifier.ensure_loaded()
+    fraud_fingerprint_index.ensure_loaded()
+    ocr_job_service.start_workers()
     print("--- Startup complete ---")
     yield
     print("--- Shutting down ---")
+    ocr_job_service.stop_workers()
+    ocr_service.shutdown_pdf_ocr_pool()
+    executors.shutdown_executors()
 
 
 app = FastAPI(
@@ -48,11 +77,26 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"], # Allows all methods (GET, POST, etc.)
     allow_headers=["*"], # Allows all headers
+    expose_headers=[NEXT_CURSOR_HEADER], # Lets browsers read the next-page cursor of list endpoints
      # Allow all subdomains of vercel.app
 )
 
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
+
+@app.exception_handler(LLMUnavailableError)
+async def llm_unavailable_handler(request: Request, exc: LLMUnavailableError):
+    """
+    Answers requests that needed an AI provider which is down, overloaded or
+    rate-limited with 503 (429 for per-user limits) instead of a guessed result.
+    """
+    if isinstance(exc, LLMRateLimitedError):
+        status_code, detail = 429, "Too many AI requests. Please slow down and try again shortly."
+    else:
+        status_code, detail = 503, "The AI service is temporarily unavailable. Please try again shortly."
+    headers = {"Retry-After": str(math.ceil(exc.retry_after))} if exc.retry_after else None
+    return JSONResponse(status_code=status_code, content={"detail": detail}, headers=headers)
+
 @app.get("/")
 async def read_root():
     """
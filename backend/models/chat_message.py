@@ -1,5 +1,5 @@
 import datetime
-from sqlalchemy import Column, Integer, Text, ForeignKey, Boolean, DateTime
+from sqlalchemy import Column, Integer, Text, ForeignKey, Boolean, DateTime, Index
 from sqlalchemy.orm import relationship
 
 from backend.db.session import Base
@@ -20,3 +20,9 @@ class ChatMessage(Base):
 
     # Relationship to the User model
     owner = relationship("User", back_populates="chat_messages")
+
+    # The agent's context reads a user's latest messages; the history is paged by timestamp
+    __table_args__ = (
+        Index("ix_chat_messages_owner_id_id", "owner_id", "id"),
+        Index("ix_chat_messages_owner_id_timestamp", "owner_id", "timestamp"),
+    )
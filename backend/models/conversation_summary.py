@@ -0,0 +1,19 @@
+import datetime
+from sqlalchemy import Column, Integer, Text, ForeignKey, DateTime
+
+from backend.db.session import Base
+
+class ConversationSummary(Base):
+    """
+    Database model for the running summary of a user's conversation with the
+    agent. Messages that fall out of the agent's recent-message window are
+    folded into `summary`; `summarized_through_id` is the ID of the newest
+    chat message folded in so far.
+    """
+    __tablename__ = "conversation_summaries"
+
+    id = Column(Integer, primary_key=True, index=True)
+    owner_id = Column(Integer, ForeignKey("users.id"), unique=True, nullable=False, index=True)
+    summary = Column(Text, nullable=False)
+    summarized_through_id = Column(Integer, nullable=False)
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
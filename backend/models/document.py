@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from backend.db.session import Base
 
@@ -12,3 +12,6 @@ class Document(Base):
     extracted_text = Column(Text)
     owner_id = Column(Integer, ForeignKey("users.id"))
     owner = relationship("User", back_populates="documents")
+
+    # Documents are listed per user in id order
+    __table_args__ = (Index("ix_documents_owner_id_id", "owner_id", "id"),)
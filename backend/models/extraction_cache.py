@@ -0,0 +1,19 @@
+import datetime
+from sqlalchemy import Column, Integer, String, Text, DateTime, UniqueConstraint
+
+from backend.db.session import Base
+
+class ExtractionCacheEntry(Base):
+    """
+    Database model for the persistent tier of the OCR / extraction result cache.
+    Entries are keyed by the SHA-256 of the uploaded file and the kind of result
+    ('ocr_pages' for per-page OCR text, 'structured' for the AI extraction).
+    """
+    __tablename__ = "extraction_cache"
+    __table_args__ = (UniqueConstraint("content_hash", "kind", name="uq_extraction_cache_hash_kind"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    content_hash = Column(String(64), nullable=False)
+    kind = Column(String(32), nullable=False)
+    value = Column(Text, nullable=False)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow, index=True)
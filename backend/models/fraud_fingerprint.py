@@ -0,0 +1,21 @@
+import datetime
+from sqlalchemy import Column, Integer, Boolean, LargeBinary, String, Text, DateTime
+
+from backend.db.session import Base
+
+class FraudFingerprint(Base):
+    """
+    Database model for the persistent tier of the scam-template index: the
+    MinHash signature of a normalized message (URLs, e-mails and numbers
+    masked) and the verdict the AI model gave for it. `template` is the
+    normalized text, kept so the index can be rebuilt when the fingerprinting
+    changes.
+    """
+    __tablename__ = "fraud_fingerprints"
+
+    id = Column(Integer, primary_key=True, index=True)
+    signature = Column(LargeBinary, nullable=False)
+    template = Column(Text, nullable=False)
+    is_scam = Column(Boolean, nullable=False)
+    reason = Column(String, nullable=False)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow, index=True)
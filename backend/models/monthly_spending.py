@@ -0,0 +1,23 @@
+from sqlalchemy import Column, Integer, String, Numeric, Date, ForeignKey, UniqueConstraint
+
+from backend.db.session import Base
+
+class MonthlySpending(Base):
+    """
+    Database model for the dashboard's spending rollup: the total and number
+    of a user's transactions per calendar month (`month` is its first day)
+    and category. Kept in step with `transactions` by the transaction
+    functions in crud, in the same database transaction; rebuilt from
+    scratch with `python -m backend.scripts.rebuild_monthly_spending`.
+    """
+    __tablename__ = "monthly_spending"
+
+    id = Column(Integer, primary_key=True, index=True)
+    owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    month = Column(Date, nullable=False)
+    category = Column(String, nullable=False)
+    total = Column(Numeric(14, 2), nullable=False)
+    transaction_count = Column(Integer, nullable=False)
+
+    # Also serves the dashboard's lookup of one user's month
+    __table_args__ = (UniqueConstraint("owner_id", "month", "category", name="uq_monthly_spending_owner_month_category"),)
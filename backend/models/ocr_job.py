@@ -0,0 +1,29 @@
+import datetime
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey
+
+from backend.db.session import Base
+
+class OcrJob(Base):
+    """
+    Database model for a background document-processing job.
+    The uploaded file is spooled to disk so queued jobs survive a restart.
+    A running job is leased to the worker process that claimed it; the
+    process renews the lease while it works, and jobs whose lease lapsed
+    (the process died) are queued again.
+    """
+    __tablename__ = "ocr_jobs"
+
+    id = Column(String(32), primary_key=True)
+    kind = Column(String(32), nullable=False)
+    status = Column(String(16), nullable=False, default="queued", index=True)
+    filename = Column(String, nullable=False)
+    content_type = Column(String, nullable=True)
+    input_path = Column(String, nullable=False)
+    callback_url = Column(String, nullable=True)
+    worker_id = Column(String(64), nullable=True)
+    lease_expires_at = Column(DateTime, nullable=True)
+    result = Column(Text, nullable=True)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
+    owner_id = Column(Integer, ForeignKey("users.id"), index=True)
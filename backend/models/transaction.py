@@ -1,5 +1,5 @@
 import datetime
-from sqlalchemy import Column, Integer, String, Numeric, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Numeric, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from pgvector.sqlalchemy import Vector  
 
@@ -20,4 +20,11 @@ class Transaction(Base):
     transaction_date = Column(DateTime, default=datetime.datetime.utcnow)
     embedding = Column(Vector(768)) 
     owner_id = Column(Integer, ForeignKey("users.id"))
-    owner = relationship("User", back_populates="transactions")
\ No newline at end of file
+    owner = relationship("User", back_populates="transactions")
+
+    # Every query is per user and by date (latest first, or a date range);
+    # the second index serves per-category ranges
+    __table_args__ = (
+        Index("ix_transactions_owner_id_transaction_date", "owner_id", "transaction_date"),
+        Index("ix_transactions_owner_id_category_transaction_date", "owner_id", "category", "transaction_date"),
+    )
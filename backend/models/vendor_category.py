@@ -0,0 +1,37 @@
+import datetime
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, UniqueConstraint
+
+from backend.db.session import Base
+
+class VendorCategory(Base):
+    """
+    Database model for the vendor -> expense category memo, so known vendors
+    are categorized without an AI call. `vendor_key` is the normalized vendor
+    name; `source` records where the category came from ('llm' or 'seed'),
+    since curated seed entries must not be overwritten by the model. Shared
+    by all users; a user's own corrections are kept in UserVendorCategory.
+    """
+    __tablename__ = "vendor_categories"
+
+    id = Column(Integer, primary_key=True, index=True)
+    vendor_key = Column(String(255), unique=True, nullable=False, index=True)
+    category = Column(String, nullable=False)
+    source = Column(String(16), nullable=False)
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
+
+
+class UserVendorCategory(Base):
+    """
+    Database model for one user's correction of a vendor's category, made by
+    recategorizing a transaction. It applies to that user only, on top of the
+    shared VendorCategory memo.
+    """
+    __tablename__ = "user_vendor_categories"
+
+    id = Column(Integer, primary_key=True, index=True)
+    owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    vendor_key = Column(String(255), nullable=False)
+    category = Column(String, nullable=False)
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
+
+    __table_args__ = (UniqueConstraint("owner_id", "vendor_key", name="uq_user_vendor_categories_owner_vendor"),)
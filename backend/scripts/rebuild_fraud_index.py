@@ -0,0 +1,44 @@
+"""
+Rebuilds the scam-template fingerprint index in bulk.
+
+Recomputes the MinHash signature of every stored template (needed after
+changing the normalization or signature size), evicts expired and excess
+templates, and optionally imports a labelled corpus of known scam messages
+from a CSV with `text,is_scam,reason` columns. Non-scam rows are skipped.
+
+Run from the repository root:
+    python -m backend.scripts.rebuild_fraud_index [--import PATH]
+"""
+import argparse
+import csv
+
+from backend.app.services.fraud_fingerprint_service import fraud_fingerprint_index
+from backend.db import session
+
+
+def load_csv(path: str) -> list[tuple[str, dict]]:
+    with open(path, newline="", encoding="utf-8") as f:
+        return [
+            (row["text"], {"is_scam": row["is_scam"].strip().lower() in ("1", "true", "yes"), "reason": row.get("reason") or ""})
+            for row in csv.DictReader(f)
+            if row.get("text")
+        ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--import", dest="import_path", default=None, help="CSV file with text,is_scam,reason columns")
+    args = parser.parse_args()
+
+    # Same as application startup, in case the app has not run since the table was added
+    session.Base.metadata.create_all(bind=session.engine)
+
+    print(f"Rebuilt index: {fraud_fingerprint_index.rebuild()} templates.")
+    print(f"Evicted {fraud_fingerprint_index.evict()} expired or excess templates.")
+    if args.import_path:
+        verdicts = load_csv(args.import_path)
+        print(f"Imported {fraud_fingerprint_index.add_many(verdicts)} new templates from {len(verdicts)} rows.")
+
+
+if __name__ == "__main__":
+    main()
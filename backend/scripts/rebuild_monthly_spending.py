@@ -0,0 +1,65 @@
+"""
+Rebuilds or checks the monthly spending rollup behind /dashboard/summary.
+
+The rollup is kept up to date as transactions are saved, recategorized and
+deleted. Run this once after deploying it, to backfill existing
+transactions, or whenever the table may have drifted (e.g. after editing
+transactions directly in the database).
+
+With --check, nothing is written: the current month of every user is
+recomputed from the transactions table (crud.get_monthly_spending_summary)
+and compared with the rollup, and mismatches are listed.
+
+Run from the repository root:
+    python -m backend.scripts.rebuild_monthly_spending [--user-id ID] [--check]
+"""
+import argparse
+import sys
+from datetime import datetime
+
+from backend.db import crud, session
+from backend.models.transaction import Transaction
+from backend.models.user import User
+
+
+def check(db, user_ids: list[int]) -> int:
+    month = datetime.utcnow().date()
+    mismatches = 0
+    for user_id in user_ids:
+        expected = crud.get_monthly_spending_summary(db, user_id)
+        expected_by_category = {
+            category or "Uncategorized": total for category, total in expected["spending_by_category"].items()
+        }
+        actual = crud.get_monthly_spending_rollup(db, user_id, month)
+        if expected_by_category != actual["spending_by_category"]:
+            mismatches += 1
+            print(f"User {user_id}: transactions say {expected_by_category}, rollup says {actual['spending_by_category']}")
+    return mismatches
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--user-id", type=int, default=None, help="Only this user (default: everyone)")
+    parser.add_argument("--check", action="store_true", help="Compare the current month with the transactions table instead of rebuilding")
+    args = parser.parse_args()
+
+    # Same as application startup, in case the app has not run since the table was added
+    session.Base.metadata.create_all(bind=session.engine)
+
+    db = session.SessionLocal()
+    try:
+        if args.check:
+            if args.user_id is not None:
+                user_ids = [args.user_id]
+            else:
+                user_ids = [user_id for (user_id,) in db.query(User.id).join(Transaction).distinct()]
+            mismatches = check(db, user_ids)
+            print(f"Checked {len(user_ids)} users: {mismatches} mismatches.")
+            sys.exit(1 if mismatches else 0)
+        print(f"Rebuilt monthly spending rollup: {crud.rebuild_monthly_spending(db, user_id=args.user_id)} rows.")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
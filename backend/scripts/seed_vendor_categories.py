@@ -0,0 +1,67 @@
+"""
+Seeds the vendor -> category memo in bulk.
+
+By default loads scripts/vendor_categories.csv (common Indian merchants). Pass
+--csv to load another file with `vendor,category` columns, and/or
+--from-transactions to learn the most frequent category of every vendor in
+the existing transactions table (i.e. past AI answers and corrections).
+
+Entries seeded here replace AI answers but never manual corrections made
+through PATCH /expense/transactions/{id}/category.
+
+Run from the repository root:
+    python -m backend.scripts.seed_vendor_categories [--csv PATH] [--from-transactions]
+"""
+import argparse
+import csv
+import os
+from collections import Counter, defaultdict
+
+from backend.app.services.vendor_category_service import normalize_vendor, vendor_category_memo
+from backend.db import crud, session
+
+DEFAULT_CSV = os.path.join(os.path.dirname(__file__), "vendor_categories.csv")
+
+
+def load_csv(path: str) -> dict[str, str]:
+    with open(path, newline="", encoding="utf-8") as f:
+        return {row["vendor"]: row["category"] for row in csv.DictReader(f) if row.get("vendor") and row.get("category")}
+
+
+def load_from_transactions() -> dict[str, str]:
+    """Returns the most frequent category of every normalized vendor name."""
+    db = session.SessionLocal()
+    try:
+        rows = crud.get_vendor_category_counts(db)
+    finally:
+        db.close()
+
+    counts: defaultdict[str, Counter[str]] = defaultdict(Counter)
+    for vendor_name, category, count in rows:
+        counts[normalize_vendor(vendor_name)][category] += count
+    return {vendor_key: categories.most_common(1)[0][0] for vendor_key, categories in counts.items() if vendor_key}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--csv", default=None, help="CSV file with vendor,category columns")
+    parser.add_argument("--from-transactions", action="store_true")
+    args = parser.parse_args()
+
+    # Same as application startup, in case the app has not run since the table was added
+    session.Base.metadata.create_all(bind=session.engine)
+
+    if args.from_transactions:
+        # History goes in as 'llm' so it never overrides curated seed entries
+        learned = load_from_transactions()
+        print(f"Learned {len(learned)} vendors from transactions; "
+              f"{vendor_category_memo.seed(learned, source='llm')} memo entries written.")
+
+    if args.csv or not args.from_transactions:
+        seeded = load_csv(args.csv or DEFAULT_CSV)
+        print(f"Loaded {len(seeded)} vendors from CSV; "
+              f"{vendor_category_memo.seed(seeded, source='seed')} memo entries written.")
+
+
+if __name__ == "__main__":
+    main()
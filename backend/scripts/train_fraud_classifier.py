@@ -0,0 +1,107 @@
+"""
+Trains the local fraud classifier (a local tier of /fraud/analyze, ahead of the AI model).
+
+Fits a logistic regression over the keyword/regex features in
+`fraud_classifier_service` on a labelled CSV with `text,is_scam` columns and
+writes the weights to FRAUD_CLASSIFIER_WEIGHTS_PATH (or --output). Also prints
+5-fold cross-validated accuracy and how many messages would be decided
+locally at the configured thresholds.
+
+Run from the repository root:
+    python -m backend.scripts.train_fraud_classifier [--csv PATH] [--output PATH]
+"""
+import argparse
+import csv
+import json
+import math
+import os
+import random
+
+from backend.app.core.config import settings
+from backend.app.services.fraud_classifier_service import FEATURE_NAMES, extract_features
+
+DEFAULT_CSV = os.path.join(os.path.dirname(__file__), "fraud_fixtures.csv")
+
+
+def load_csv(path: str) -> list[tuple[str, int]]:
+    with open(path, newline="", encoding="utf-8") as f:
+        return [
+            (row["text"], 1 if row["is_scam"].strip().lower() in ("1", "true", "yes") else 0)
+            for row in csv.DictReader(f)
+            if row.get("text")
+        ]
+
+
+def train(samples: list[tuple[list[int], int]], l2: float, epochs: int, learning_rate: float) -> tuple[float, list[float]]:
+    """Batch gradient descent on the L2-regularized log loss. Returns (bias, weights)."""
+    bias, weights = 0.0, [0.0] * len(FEATURE_NAMES)
+    n = len(samples)
+    for _ in range(epochs):
+        grad_bias, grad = 0.0, [0.0] * len(weights)
+        for features, label in samples:
+            z = bias + sum(w for w, x in zip(weights, features) if x)
+            error = 1.0 / (1.0 + math.exp(-z)) - label
+            grad_bias += error
+            for i, x in enumerate(features):
+                if x:
+                    grad[i] += error
+        bias -= learning_rate * grad_bias / n
+        weights = [w - learning_rate * (g / n + l2 * w) for w, g in zip(weights, grad)]
+    return bias, weights
+
+
+def predict(bias: float, weights: list[float], features: list[int]) -> float:
+    return 1.0 / (1.0 + math.exp(-(bias + sum(w for w, x in zip(weights, features) if x))))
+
+
+def cross_validate(samples: list[tuple[list[int], int]], folds: int, **train_args) -> None:
+    shuffled = samples[:]
+    random.Random(0).shuffle(shuffled)
+    correct = decided = decided_correct = 0
+    for fold in range(folds):
+        test = shuffled[fold::folds]
+        training = [s for i, s in enumerate(shuffled) if i % folds != fold]
+        bias, weights = train(training, **train_args)
+        for features, label in test:
+            probability = predict(bias, weights, features)
+            correct += (probability >= 0.5) == bool(label)
+            if probability >= settings.FRAUD_CLASSIFIER_SCAM_THRESHOLD or probability <= settings.FRAUD_CLASSIFIER_SAFE_THRESHOLD:
+                decided += 1
+                decided_correct += (probability >= 0.5) == bool(label)
+    n = len(samples)
+    print(f"{folds}-fold cross-validation: accuracy {correct / n:.1%}")
+    print(
+        f"  decided locally at thresholds {settings.FRAUD_CLASSIFIER_SAFE_THRESHOLD}/{settings.FRAUD_CLASSIFIER_SCAM_THRESHOLD}: "
+        f"{decided / n:.1%} of messages, {decided_correct / max(decided, 1):.1%} of them correct"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--csv", default=DEFAULT_CSV, help="CSV file with text,is_scam columns")
+    parser.add_argument("--output", default=settings.FRAUD_CLASSIFIER_WEIGHTS_PATH)
+    parser.add_argument("--l2", type=float, default=0.001)
+    parser.add_argument("--epochs", type=int, default=5000)
+    parser.add_argument("--learning-rate", type=float, default=1.0)
+    args = parser.parse_args()
+
+    rows = load_csv(args.csv)
+    samples = [(extract_features(text), label) for text, label in rows]
+    train_args = {"l2": args.l2, "epochs": args.epochs, "learning_rate": args.learning_rate}
+    print(f"{len(samples)} labelled messages, {sum(label for _, label in samples)} scams.")
+    cross_validate(samples, folds=5, **train_args)
+
+    bias, weights = train(samples, **train_args)
+    model = {
+        "bias": round(bias, 4),
+        "weights": {name: round(weight, 4) for name, weight in zip(FEATURE_NAMES, weights)},
+        "training_samples": len(samples),
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(model, f, indent=2)
+        f.write("\n")
+    print(f"Wrote weights to {os.path.normpath(args.output)}.")
+
+
+if __name__ == "__main__":
+    main()